@@ -6,20 +6,27 @@ AceFlow v2.0 CLI工具 - Agent集成版本
 
 import sys
 import json
-import yaml
 import argparse
+from itertools import tee
+from collections import Counter
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Iterator, TYPE_CHECKING
 from datetime import datetime
 
-# 导入决策引擎
+# 决策引擎和yaml延迟导入，守护进程客户端路径无需加载
 sys.path.append(str(Path(__file__).parent.parent))
-from engines.rule_based_engine import get_decision_engine, DecisionResult
+from cli import daemon, workspace
+from engines import tracing
+
+if TYPE_CHECKING:
+    from engines.rule_based_engine import DecisionResult, ProjectProfile
 
 class AceFlowCLI:
     """AceFlow CLI工具"""
     
     def __init__(self):
+        from engines.rule_based_engine import get_decision_engine
+        
         self.project_root = Path.cwd()
         self.aceflow_dir = self.project_root / ".aceflow"
         self.version = "2.0.0"
@@ -60,7 +67,8 @@ class AceFlowCLI:
                     "suggest": {
                         "description": "智能工作流推荐",
                         "usage": "aceflow suggest --task '任务描述' [选项]",
-                        "example": "aceflow suggest --task '修复登录bug' --format json"
+                        "example": "aceflow suggest --task '修复登录bug' --format json",
+                        "batch_usage": "aceflow suggest --batch tasks.jsonl [选项]"
                     },
                     "plan": {
                         "description": "项目规划建议",
@@ -69,13 +77,28 @@ class AceFlowCLI:
                     },
                     "track": {
                         "description": "进度跟踪",
-                        "usage": "aceflow track --stage current [选项]",
+                        "usage": "aceflow track --stage current [--all] [选项]",
                         "example": "aceflow track --stage current --format json"
                     },
                     "status": {
-                        "description": "项目状态查询",
-                        "usage": "aceflow status [选项]",
-                        "example": "aceflow status --format json"
+                        "description": "项目状态查询，--all 汇总工作区内所有登记的项目",
+                        "usage": "aceflow status [--all [--workers N]] [选项]",
+                        "example": "aceflow status --all"
+                    },
+                    "workspace": {
+                        "description": "工作区项目登记",
+                        "usage": "aceflow workspace {list,add,remove,scan} [路径...]",
+                        "example": "aceflow workspace scan ~/repos"
+                    },
+                    "cache": {
+                        "description": "决策结果缓存的命中率统计和清空",
+                        "usage": "aceflow cache {stats,clear}",
+                        "example": "aceflow cache stats"
+                    },
+                    "serve": {
+                        "description": "常驻决策守护进程，运行期间suggest/plan/track/status自动转发",
+                        "usage": "aceflow serve [--port PORT] [--stop]",
+                        "example": "aceflow serve"
                     }
                 },
                 "output_formats": ["json", "yaml", "text"],
@@ -107,6 +130,7 @@ class AceFlowCLI:
         }
         
         if output_format == "yaml":
+            import yaml
             return yaml.dump(description, default_flow_style=False, allow_unicode=True)
         elif output_format == "text":
             return self._format_description_text(description)
@@ -119,15 +143,7 @@ class AceFlowCLI:
             raise ValueError("任务描述不能为空")
         
         # 构建上下文
-        context = {}
-        if kwargs.get("team_size"):
-            context["team_size"] = int(kwargs["team_size"])
-        if kwargs.get("project_type"):
-            context["project_type"] = kwargs["project_type"]
-        if kwargs.get("complexity"):
-            context["complexity"] = kwargs["complexity"]
-        if kwargs.get("urgency"):
-            context["urgency"] = kwargs["urgency"]
+        context = self._build_context(kwargs)
         
         # 获取决策结果
         result = self.engine.make_decision(task, context)
@@ -135,6 +151,59 @@ class AceFlowCLI:
         # 格式化输出
         return self._format_decision_result(result)
     
+    def suggest_batch(self, batch_file: str, **kwargs) -> Iterator[Dict[str, Any]]:
+        """批量工作流推荐，逐条产出结果"""
+        context = self._build_context(kwargs)
+        
+        records, task_records = tee(self._read_batch_records(batch_file))
+        tasks = (record.get("task") or "" for record in task_records)
+        
+        for record, result in zip(records, self.engine.make_decisions(tasks, context)):
+            if not record.get("task"):
+                output = {"error": "任务描述不能为空"}
+            else:
+                output = self._format_decision_result(result)
+                output["task"] = record["task"]
+            if "id" in record:
+                output["id"] = record["id"]
+            yield output
+    
+    def _build_context(self, options: Dict[str, Any]) -> Dict[str, Any]:
+        """根据命令行选项构建决策上下文"""
+        context = {}
+        if options.get("team_size"):
+            context["team_size"] = int(options["team_size"])
+        if options.get("project_type"):
+            context["project_type"] = options["project_type"]
+        if options.get("complexity"):
+            context["complexity"] = options["complexity"]
+        if options.get("urgency"):
+            context["urgency"] = options["urgency"]
+        return context
+    
+    def _read_batch_records(self, batch_file: str) -> Iterator[Dict[str, Any]]:
+        """读取JSONL任务文件，每行为任务字符串或包含task/id字段的对象（'-' 表示标准输入）"""
+        f = sys.stdin if batch_file == "-" else open(batch_file, 'r', encoding='utf-8')
+        try:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    item = json.loads(line)
+                except ValueError:
+                    item = line
+                
+                if isinstance(item, dict):
+                    record = dict(item)
+                    record["task"] = item.get("task") or item.get("description") or ""
+                    yield record
+                else:
+                    yield {"task": str(item)}
+        finally:
+            if f is not sys.stdin:
+                f.close()
+    
     def plan(self, **kwargs) -> Dict[str, Any]:
         """项目规划建议"""
         # 构建虚拟任务描述
@@ -163,77 +232,16 @@ class AceFlowCLI:
     
     def track(self, **kwargs) -> Dict[str, Any]:
         """进度跟踪"""
-        stage = kwargs.get("stage", "current")
-        
-        # 读取项目状态
-        project_state = self._load_project_state()
-        
-        if not project_state:
-            return {
-                "error": "未找到项目状态，请先初始化项目",
-                "suggestion": "运行 'aceflow init' 初始化项目"
-            }
-        
-        # 构建跟踪结果
-        tracking_result = {
-            "project_id": project_state.get("project_id", "unknown"),
-            "flow_mode": project_state.get("flow_mode", "unknown"),
-            "current_stage": project_state.get("current_stage", "unknown"),
-            "overall_progress": project_state.get("progress", {}).get("overall", 0),
-            "stage_states": project_state.get("stage_states", {}),
-            "last_updated": project_state.get("last_updated", "unknown"),
-            "recommendations": []
-        }
-        
-        # 添加进度建议
-        if tracking_result["overall_progress"] < 30:
-            tracking_result["recommendations"].append("项目处于早期阶段，建议专注于需求分析和设计")
-        elif tracking_result["overall_progress"] < 70:
-            tracking_result["recommendations"].append("项目进展良好，建议保持当前开发节奏")
-        else:
-            tracking_result["recommendations"].append("项目接近完成，建议重点关注测试和部署准备")
-        
-        return tracking_result
+        return build_track_result(load_project_state(self.aceflow_dir), kwargs.get("stage", "current"))
     
     def status(self, **kwargs) -> Dict[str, Any]:
         """项目状态查询"""
-        # 读取项目状态和配置
-        project_state = self._load_project_state()
-        project_config = self._load_project_config()
-        
-        # 分析项目特征
-        project_profile = self.engine.project_analyzer.analyze_project()
-        
-        status_result = {
-            "project_info": {
-                "name": project_config.get("project", {}).get("name", "unknown"),
-                "type": project_profile.project_type,
-                "team_size": project_profile.team_size,
-                "complexity": project_profile.complexity.value,
-                "tech_stack": project_profile.tech_stack
-            },
-            "current_state": project_state or {},
-            "project_health": {
-                "has_tests": project_profile.has_tests,
-                "has_ci_cd": project_profile.has_ci_cd,
-                "has_documentation": project_profile.has_documentation,
-                "file_count": project_profile.file_count,
-                "git_activity": project_profile.git_activity
-            },
-            "recommendations": []
-        }
-        
-        # 生成健康建议
-        if not project_profile.has_tests:
-            status_result["recommendations"].append("建议添加测试用例以提高代码质量")
-        
-        if not project_profile.has_ci_cd:
-            status_result["recommendations"].append("建议配置CI/CD流程以自动化部署")
-        
-        if not project_profile.has_documentation:
-            status_result["recommendations"].append("建议完善项目文档以提高可维护性")
-        
-        return status_result
+        return build_status_result(
+            load_project_state(self.aceflow_dir),
+            load_project_config(self.aceflow_dir),
+            # 分析项目特征
+            self.engine.project_analyzer.analyze_project()
+        )
     
     def memory(self, action: str, **kwargs) -> Dict[str, Any]:
         """记忆管理"""
@@ -242,14 +250,22 @@ class AceFlowCLI:
         if action == "list":
             return self._list_memories(memory_dir)
         elif action == "search":
-            query = kwargs.get("query", "")
-            return self._search_memories(memory_dir, query)
+            query = kwargs.get("query") or ""
+            return self._search_memories(memory_dir, query, kwargs.get("page") or 1, kwargs.get("page_size") or 20)
         elif action == "clean":
             return self._clean_memories(memory_dir)
         else:
             return {"error": f"不支持的记忆操作: {action}"}
     
-    def _format_decision_result(self, result: DecisionResult) -> Dict[str, Any]:
+    def cache(self, action: str = "stats") -> Dict[str, Any]:
+        """决策缓存：stats 查看命中率，clear 清空"""
+        decision_cache = self.engine.decision_cache
+        if action == "clear":
+            decision_cache.clear()
+            return {"cleared": True}
+        return decision_cache.stats()
+    
+    def _format_decision_result(self, result: "DecisionResult") -> Dict[str, Any]:
         """格式化决策结果"""
         return {
             "recommended_flow": result.recommended_flow,
@@ -285,32 +301,6 @@ class AceFlowCLI:
         
         return recommendations
     
-    def _load_project_state(self) -> Optional[Dict[str, Any]]:
-        """加载项目状态"""
-        state_file = self.aceflow_dir / "state" / "project_state.json"
-        
-        if state_file.exists():
-            try:
-                with open(state_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except Exception:
-                return None
-        
-        return None
-    
-    def _load_project_config(self) -> Optional[Dict[str, Any]]:
-        """加载项目配置"""
-        config_file = self.aceflow_dir / "config.yaml"
-        
-        if config_file.exists():
-            try:
-                with open(config_file, 'r', encoding='utf-8') as f:
-                    return yaml.safe_load(f)
-            except Exception:
-                return None
-        
-        return None
-    
     def _list_memories(self, memory_dir: Path) -> Dict[str, Any]:
         """列出记忆"""
         if not memory_dir.exists():
@@ -332,52 +322,60 @@ class AceFlowCLI:
         
         return {"memories": memories, "count": len(memories)}
     
-    def _search_memories(self, memory_dir: Path, query: str) -> Dict[str, Any]:
-        """搜索记忆"""
+    def _search_memories(self, memory_dir: Path, query: str, page: int = 1, page_size: int = 20) -> Dict[str, Any]:
+        """搜索记忆（倒排索引 + BM25排序，分页返回）"""
         if not memory_dir.exists():
-            return {"results": [], "count": 0}
+            return {"results": [], "count": 0, "total": 0, "page": page, "page_size": page_size}
         
-        results = []
-        query_lower = query.lower()
+        index = self._memory_index(memory_dir)
+        page = max(page, 1)
+        total, hits = index.search(query, limit=page_size, offset=(page - 1) * page_size)
+        index.close()
         
+        results = []
+        for memory_id, score in hits:
+            memory_data = self._load_memory(memory_dir, memory_id)
+            if memory_data is None:
+                continue
+            results.append({
+                "id": memory_id,
+                "timestamp": memory_data.get("timestamp", "unknown"),
+                "content": memory_data.get("content", ""),
+                "relevance": score
+            })
+        
+        return {"results": results, "count": len(results), "total": total, "page": page, "page_size": page_size}
+    
+    def _memory_index(self, memory_dir: Path):
+        """打开记忆索引并按文件签名增量同步，仅重新索引新增或修改的记忆"""
+        # 记忆索引位于 scripts/core；scripts/cli 是常规包，须在导入 cli.daemon 之后再加入路径
+        scripts_dir = str(Path(__file__).parent.parent.parent / "scripts")
+        if scripts_dir not in sys.path:
+            sys.path.append(scripts_dir)
+        from core.memory_index import MemoryIndex, memory_text
+        
+        index = MemoryIndex(str(self.aceflow_dir / "cache" / "memory_index.db"))
+        signatures = {}
         for memory_file in memory_dir.glob("*.json"):
             try:
-                with open(memory_file, 'r', encoding='utf-8') as f:
-                    memory_data = json.load(f)
-                    
-                    # 简单的关键词匹配
-                    content = memory_data.get("content", "").lower()
-                    keywords = [k.lower() for k in memory_data.get("keywords", [])]
-                    
-                    if query_lower in content or any(query_lower in keyword for keyword in keywords):
-                        results.append({
-                            "id": memory_file.stem,
-                            "timestamp": memory_data.get("timestamp", "unknown"),
-                            "content": memory_data.get("content", ""),
-                            "relevance": self._calculate_relevance(query_lower, content, keywords)
-                        })
-            except Exception:
+                st = memory_file.stat()
+            except OSError:
                 continue
+            signatures[memory_file.stem] = f"{st.st_mtime_ns}:{st.st_size}"
         
-        # 按相关性排序
-        results.sort(key=lambda x: x["relevance"], reverse=True)
+        def load_text(memory_id: str) -> Optional[str]:
+            memory_data = self._load_memory(memory_dir, memory_id)
+            return memory_text(memory_data) if memory_data is not None else None
         
-        return {"results": results, "count": len(results)}
+        index.sync(signatures, load_text)
+        return index
     
-    def _calculate_relevance(self, query: str, content: str, keywords: List[str]) -> float:
-        """计算相关性分数"""
-        score = 0.0
-        
-        # 内容匹配
-        if query in content:
-            score += 1.0
-        
-        # 关键词匹配
-        for keyword in keywords:
-            if query in keyword:
-                score += 0.5
-        
-        return score
+    def _load_memory(self, memory_dir: Path, memory_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(memory_dir / f"{memory_id}.json", 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception:
+            return None
     
     def _clean_memories(self, memory_dir: Path) -> Dict[str, Any]:
         """清理记忆"""
@@ -421,6 +419,182 @@ class AceFlowCLI:
         
         return text
 
+def load_project_state(aceflow_dir: Path) -> Optional[Dict[str, Any]]:
+    """加载项目状态"""
+    state_file = aceflow_dir / "state" / "project_state.json"
+    
+    if state_file.exists():
+        try:
+            with open(state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception:
+            return None
+    
+    return None
+
+def load_project_config(aceflow_dir: Path) -> Optional[Dict[str, Any]]:
+    """加载项目配置"""
+    config_file = aceflow_dir / "config.yaml"
+    
+    if config_file.exists():
+        try:
+            import yaml
+            with open(config_file, 'r', encoding='utf-8') as f:
+                return yaml.safe_load(f)
+        except Exception:
+            return None
+    
+    return None
+
+def build_track_result(project_state: Optional[Dict[str, Any]], stage: str = "current") -> Dict[str, Any]:
+    """由项目状态构建进度跟踪结果"""
+    if not project_state:
+        return {
+            "error": "未找到项目状态，请先初始化项目",
+            "suggestion": "运行 'aceflow init' 初始化项目"
+        }
+    
+    # 构建跟踪结果
+    tracking_result = {
+        "project_id": project_state.get("project_id", "unknown"),
+        "flow_mode": project_state.get("flow_mode", "unknown"),
+        "current_stage": project_state.get("current_stage", "unknown"),
+        "overall_progress": project_state.get("progress", {}).get("overall", 0),
+        "stage_states": project_state.get("stage_states", {}),
+        "last_updated": project_state.get("last_updated", "unknown"),
+        "recommendations": []
+    }
+    
+    # 添加进度建议
+    if tracking_result["overall_progress"] < 30:
+        tracking_result["recommendations"].append("项目处于早期阶段，建议专注于需求分析和设计")
+    elif tracking_result["overall_progress"] < 70:
+        tracking_result["recommendations"].append("项目进展良好，建议保持当前开发节奏")
+    else:
+        tracking_result["recommendations"].append("项目接近完成，建议重点关注测试和部署准备")
+    
+    return tracking_result
+
+def build_status_result(project_state: Optional[Dict[str, Any]], project_config: Optional[Dict[str, Any]],
+                        project_profile: "ProjectProfile") -> Dict[str, Any]:
+    """由项目状态、配置和画像构建状态查询结果"""
+    status_result = {
+        "project_info": {
+            "name": (project_config or {}).get("project", {}).get("name", "unknown"),
+            "type": project_profile.project_type,
+            "team_size": project_profile.team_size,
+            "complexity": project_profile.complexity.value,
+            "tech_stack": project_profile.tech_stack
+        },
+        "current_state": project_state or {},
+        "project_health": {
+            "has_tests": project_profile.has_tests,
+            "has_ci_cd": project_profile.has_ci_cd,
+            "has_documentation": project_profile.has_documentation,
+            "file_count": project_profile.file_count,
+            "git_activity": project_profile.git_activity
+        },
+        "recommendations": []
+    }
+    
+    # 生成健康建议
+    if not project_profile.has_tests:
+        status_result["recommendations"].append("建议添加测试用例以提高代码质量")
+    
+    if not project_profile.has_ci_cd:
+        status_result["recommendations"].append("建议配置CI/CD流程以自动化部署")
+    
+    if not project_profile.has_documentation:
+        status_result["recommendations"].append("建议完善项目文档以提高可维护性")
+    
+    return status_result
+
+def sweep_workspace(command: str, stage: str = "current", workers: int = workspace.DEFAULT_WORKERS,
+                    registry_file: Optional[str] = None) -> Dict[str, Any]:
+    """对工作区内所有登记项目并行执行 status/track，返回汇总文档"""
+    registry = workspace.WorkspaceRegistry(registry_file)
+    
+    if command == "track":
+        def handler(root: Path) -> Dict[str, Any]:
+            return build_track_result(load_project_state(root / ".aceflow"), stage)
+    else:
+        from engines.rule_based_engine import ProjectAnalyzer
+        
+        def handler(root: Path) -> Dict[str, Any]:
+            aceflow_dir = root / ".aceflow"
+            # 每个项目独立的分析器，画像缓存未失效的字段直接复用
+            return build_status_result(
+                load_project_state(aceflow_dir),
+                load_project_config(aceflow_dir),
+                ProjectAnalyzer(root).analyze_project()
+            )
+    
+    report = workspace.sweep(registry.projects(), handler, workers)
+    report["workspace"] = str(registry.registry_file)
+    report["summary"] = _summarize_workspace(command, report["projects"])
+    return report
+
+def _summarize_workspace(command: str, projects: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """汇总各项目结果的分布"""
+    results = [project["result"] for project in projects if "result" in project]
+    
+    if command == "track":
+        tracked = [result for result in results if "error" not in result]
+        return {
+            "uninitialized": len(results) - len(tracked),
+            "by_flow_mode": dict(Counter(result["flow_mode"] for result in tracked)),
+            "by_current_stage": dict(Counter(str(result["current_stage"]) for result in tracked)),
+            "average_progress": round(sum(result["overall_progress"] for result in tracked) / len(tracked), 1) if tracked else 0
+        }
+    
+    health = [result["project_health"] for result in results]
+    return {
+        "by_project_type": dict(Counter(result["project_info"]["type"] for result in results)),
+        "by_complexity": dict(Counter(result["project_info"]["complexity"] for result in results)),
+        "missing_tests": sum(1 for item in health if not item["has_tests"]),
+        "missing_ci_cd": sum(1 for item in health if not item["has_ci_cd"]),
+        "missing_documentation": sum(1 for item in health if not item["has_documentation"])
+    }
+
+def _command_kwargs(args: argparse.Namespace) -> Dict[str, Any]:
+    """提取命令参数，本地执行和守护进程请求共用"""
+    if args.command == "suggest":
+        return {
+            "task": args.task,
+            "team_size": args.team_size,
+            "project_type": args.project_type,
+            "complexity": args.complexity,
+            "urgency": args.urgency
+        }
+    elif args.command == "plan":
+        return {
+            "project_type": args.project_type,
+            "team_size": args.team_size,
+            "complexity": args.complexity,
+            "urgency": args.urgency
+        }
+    elif args.command == "track":
+        return {"stage": args.stage}
+    elif args.command == "cache":
+        return {"action": args.action}
+    return {}
+
+def _workspace_command(args: argparse.Namespace) -> Dict[str, Any]:
+    """执行 workspace 子命令"""
+    registry = workspace.WorkspaceRegistry(args.registry)
+    paths = args.paths or ([str(Path.cwd())] if args.action != "list" else [])
+    
+    if args.action == "add":
+        return {"added": registry.add(paths), "projects": [str(root) for root in registry.projects()]}
+    elif args.action == "remove":
+        return {"removed": registry.remove(paths), "projects": [str(root) for root in registry.projects()]}
+    elif args.action == "scan":
+        added = []
+        for base in paths:
+            added.extend(registry.scan(base))
+        return {"added": added, "projects": [str(root) for root in registry.projects()]}
+    return {"registry": str(registry.registry_file), "projects": [str(root) for root in registry.projects()]}
+
 def main():
     """主函数"""
     parser = argparse.ArgumentParser(
@@ -433,6 +607,9 @@ def main():
                        help="输出格式")
     parser.add_argument("--verbose", action="store_true", help="详细输出")
     parser.add_argument("--quiet", action="store_true", help="静默模式")
+    parser.add_argument("--no-daemon", action="store_true", help="不使用守护进程，直接在本进程内计算")
+    parser.add_argument("--profile", action="store_true", help="在标准错误输出各步骤耗时（在本进程内计算）")
+    parser.add_argument("--trace", metavar="FILE", help="写出 Chrome trace JSON（chrome://tracing、Perfetto 可打开）")
     
     subparsers = parser.add_subparsers(dest="command", help="可用命令")
     
@@ -442,7 +619,9 @@ def main():
     
     # suggest命令
     suggest_parser = subparsers.add_parser("suggest", help="智能工作流推荐")
-    suggest_parser.add_argument("--task", required=True, help="任务描述")
+    suggest_input = suggest_parser.add_mutually_exclusive_group(required=True)
+    suggest_input.add_argument("--task", help="任务描述")
+    suggest_input.add_argument("--batch", metavar="FILE", help="批量任务文件（JSONL，'-' 表示标准输入），每行输出一条JSON结果")
     suggest_parser.add_argument("--team-size", type=int, help="团队规模")
     suggest_parser.add_argument("--project-type", help="项目类型")
     suggest_parser.add_argument("--complexity", choices=["simple", "moderate", "complex", "enterprise"], help="项目复杂度")
@@ -462,10 +641,34 @@ def main():
     # status命令
     status_parser = subparsers.add_parser("status", help="项目状态查询")
     
+    # status/track 的多项目模式
+    for sweep_parser in (track_parser, status_parser):
+        sweep_parser.add_argument("--all", action="store_true", help="汇总工作区内所有登记的项目")
+        sweep_parser.add_argument("--workers", type=int, default=workspace.DEFAULT_WORKERS, help="并行线程数")
+        sweep_parser.add_argument("--registry", help="工作区注册表文件（默认 ~/.aceflow/workspace.json）")
+    
+    # workspace命令
+    workspace_parser = subparsers.add_parser("workspace", help="工作区项目登记")
+    workspace_parser.add_argument("action", choices=["list", "add", "remove", "scan"], help="操作类型")
+    workspace_parser.add_argument("paths", nargs="*", help="项目根目录（scan 时为扫描起点）")
+    workspace_parser.add_argument("--registry", help="工作区注册表文件（默认 ~/.aceflow/workspace.json）")
+    
     # memory命令
     memory_parser = subparsers.add_parser("memory", help="记忆管理")
     memory_parser.add_argument("action", choices=["list", "search", "clean"], help="操作类型")
     memory_parser.add_argument("--query", help="搜索查询")
+    memory_parser.add_argument("--page", type=int, default=1, help="搜索结果页码")
+    memory_parser.add_argument("--page-size", type=int, default=20, help="每页结果数")
+    
+    # cache命令
+    cache_parser = subparsers.add_parser("cache", help="决策缓存")
+    cache_parser.add_argument("action", choices=["stats", "clear"], help="操作类型")
+    
+    # serve命令
+    serve_parser = subparsers.add_parser("serve", help="启动常驻决策守护进程")
+    serve_parser.add_argument("--host", default="127.0.0.1", help="TCP监听地址（指定--port时使用）")
+    serve_parser.add_argument("--port", type=int, help="使用本地TCP端口代替Unix套接字")
+    serve_parser.add_argument("--stop", action="store_true", help="停止正在运行的守护进程")
     
     args = parser.parse_args()
     
@@ -473,42 +676,61 @@ def main():
         parser.print_help()
         return
     
+    # 计时需要在本进程内执行，不转发给守护进程
+    profiling = args.profile or bool(args.trace)
+    if profiling:
+        tracing.enable(trace_events=bool(args.trace))
+    
     try:
+        # 守护进程运行时直接转发请求，避免加载引擎和分析项目
+        if getattr(args, "all", False):
+            result = sweep_workspace(args.command, getattr(args, "stage", "current"), args.workers, args.registry)
+            print(json.dumps(result, indent=2, ensure_ascii=False))
+            return
+        
+        if args.command == "workspace":
+            print(json.dumps(_workspace_command(args), indent=2, ensure_ascii=False))
+            return
+        
+        if (args.command in daemon.DAEMON_COMMANDS and not args.no_daemon and not profiling
+                and not getattr(args, "batch", None)):
+            response = daemon.request(Path.cwd() / ".aceflow", args.command, _command_kwargs(args))
+            if response is not None:
+                if "error" in response:
+                    raise RuntimeError(response["error"])
+                print(json.dumps(response["result"], indent=2, ensure_ascii=False))
+                return
+        
+        if args.command == "serve" and args.stop:
+            stopped = daemon.stop(Path.cwd() / ".aceflow")
+            print(json.dumps({"stopped": stopped}, ensure_ascii=False))
+            return
+        
         cli = AceFlowCLI()
         
-        if args.command == "describe":
+        if args.command == "serve":
+            daemon.serve(cli, host=args.host, port=args.port)
+        
+        elif args.command == "describe":
             result = cli.describe(args.format)
             print(result)
         
-        elif args.command == "suggest":
-            result = cli.suggest(
-                task=args.task,
+        elif args.command == "suggest" and args.batch:
+            for result in cli.suggest_batch(
+                args.batch,
                 team_size=args.team_size,
                 project_type=args.project_type,
                 complexity=args.complexity,
                 urgency=args.urgency
-            )
-            print(json.dumps(result, indent=2, ensure_ascii=False))
-        
-        elif args.command == "plan":
-            result = cli.plan(
-                project_type=args.project_type,
-                team_size=args.team_size,
-                complexity=args.complexity,
-                urgency=args.urgency
-            )
-            print(json.dumps(result, indent=2, ensure_ascii=False))
+            ):
+                print(json.dumps(result, ensure_ascii=False), flush=True)
         
-        elif args.command == "track":
-            result = cli.track(stage=args.stage)
-            print(json.dumps(result, indent=2, ensure_ascii=False))
-        
-        elif args.command == "status":
-            result = cli.status()
+        elif args.command in daemon.DAEMON_COMMANDS:
+            result = getattr(cli, args.command)(**_command_kwargs(args))
             print(json.dumps(result, indent=2, ensure_ascii=False))
         
         elif args.command == "memory":
-            result = cli.memory(args.action, query=args.query)
+            result = cli.memory(args.action, query=args.query, page=args.page, page_size=args.page_size)
             print(json.dumps(result, indent=2, ensure_ascii=False))
     
     except Exception as e:
@@ -518,6 +740,12 @@ def main():
         else:
             print(json.dumps({"error": str(e)}, indent=2, ensure_ascii=False))
         sys.exit(1)
+    
+    finally:
+        if args.profile:
+            print(tracing.format_breakdown(), file=sys.stderr)
+        if args.trace:
+            tracing.write_chrome_trace(args.trace)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
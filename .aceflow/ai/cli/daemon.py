@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+AceFlow v2.0 决策守护进程
+常驻内存保持引擎和项目画像，通过本地套接字响应CLI请求
+
+协议：每行一个JSON请求 {"command": ..., "args": {...}, "token": ...}，
+每行一个JSON响应 {"result": ...} 或 {"error": ...}
+token 为守护进程启动时生成的随机令牌，只写入仅当前用户可读的 agent.json
+"""
+
+import os
+import hmac
+import json
+import secrets
+import socket
+import signal
+import threading
+import socketserver
+from pathlib import Path
+from typing import Dict, Any, Optional, Callable
+
+# 可由守护进程处理的命令
+DAEMON_COMMANDS = ("suggest", "plan", "track", "status", "cache")
+
+CONNECT_TIMEOUT = 0.5
+# 等待守护进程响应的上限，超时（守护进程卡住或已停止）时回退到本地执行
+REQUEST_TIMEOUT = 5.0
+UNAUTHORIZED = "未授权的请求"
+
+
+def runtime_dir(aceflow_dir: Path) -> Path:
+    """守护进程运行时文件目录"""
+    return aceflow_dir / "run"
+
+
+def address_file(aceflow_dir: Path) -> Path:
+    """记录守护进程监听地址的文件"""
+    return runtime_dir(aceflow_dir) / "agent.json"
+
+
+class DecisionRequestHandler(socketserver.StreamRequestHandler):
+    """处理单个连接上的请求，连接可复用发送多条请求"""
+
+    def handle(self):
+        for line in self.rfile:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                request = json.loads(line.decode('utf-8'))
+                response = self.server.dispatch(request)
+            except ValueError as e:
+                response = {"error": f"无效请求: {e}"}
+
+            self.wfile.write((json.dumps(response, ensure_ascii=False) + "\n").encode('utf-8'))
+            self.wfile.flush()
+
+
+class _DecisionServerMixin(socketserver.ThreadingMixIn):
+    """请求分发逻辑，Unix套接字和TCP两种服务器共用"""
+
+    daemon_threads = True
+    request_queue_size = 64
+    handlers: Dict[str, Callable[..., Any]] = {}
+    token = ""
+
+    def dispatch(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        token = request.get("token")
+        if not isinstance(token, str) or not hmac.compare_digest(token, self.token):
+            return {"error": UNAUTHORIZED}
+        command = request.get("command")
+        args = request.get("args") or {}
+
+        if command == "ping":
+            return {"result": {"pid": os.getpid()}}
+        if command == "shutdown":
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return {"result": {"stopping": True}}
+
+        handler = self.handlers.get(command)
+        if handler is None:
+            return {"error": f"不支持的命令: {command}"}
+
+        try:
+            return {"result": handler(**args)}
+        except Exception as e:
+            return {"error": str(e)}
+
+
+if hasattr(socket, "AF_UNIX"):
+    class UnixDecisionServer(_DecisionServerMixin, socketserver.UnixStreamServer):
+        pass
+else:
+    UnixDecisionServer = None
+
+
+class TCPDecisionServer(_DecisionServerMixin, socketserver.TCPServer):
+    allow_reuse_address = True
+
+
+def serve(cli, host: str = None, port: int = None):
+    """启动守护进程（前台运行），默认监听 .aceflow/run/agent.sock"""
+    run_dir = runtime_dir(cli.aceflow_dir)
+    run_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+    os.chmod(run_dir, 0o700)
+
+    if port is None and UnixDecisionServer is not None:
+        socket_path = run_dir / "agent.sock"
+        if socket_path.exists():
+            if _ping({"socket": str(socket_path)}):
+                raise RuntimeError(f"守护进程已在运行: {socket_path}")
+            socket_path.unlink()
+        # 套接字创建时即为仅当前用户可访问
+        old_umask = os.umask(0o077)
+        try:
+            server = UnixDecisionServer(str(socket_path), DecisionRequestHandler)
+        finally:
+            os.umask(old_umask)
+        address = {"socket": str(socket_path)}
+    else:
+        server = TCPDecisionServer((host or "127.0.0.1", port or 0), DecisionRequestHandler)
+        bound_host, bound_port = server.server_address[:2]
+        address = {"host": bound_host, "port": bound_port}
+
+    server.handlers = {command: getattr(cli, command) for command in DAEMON_COMMANDS}
+    server.token = secrets.token_hex(32)
+
+    # 地址文件包含令牌，原子写入且仅当前用户可读
+    addr_file = address_file(cli.aceflow_dir)
+    tmp_file = addr_file.with_name(f"{addr_file.name}.{os.getpid()}.tmp")
+    fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump({**address, "pid": os.getpid(), "token": server.token}, f)
+    os.replace(tmp_file, addr_file)
+
+    def _terminate(signum, frame):
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, _terminate)
+
+    print(json.dumps({"serving": address, "pid": os.getpid()}, ensure_ascii=False), flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        for path in (addr_file, Path(address.get("socket", ""))):
+            if path.name:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+
+def _connect(address: Dict[str, Any]) -> socket.socket:
+    if "socket" in address:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        target = address["socket"]
+    else:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        target = (address["host"], address["port"])
+    sock.settimeout(CONNECT_TIMEOUT)
+    try:
+        sock.connect(target)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def _send(address: Dict[str, Any], command: str, args: Dict[str, Any] = None,
+          timeout: float = None) -> Dict[str, Any]:
+    with _connect(address) as sock:
+        sock.settimeout(timeout)
+        payload = json.dumps({"command": command, "args": args or {}, "token": address.get("token")},
+                             ensure_ascii=False) + "\n"
+        sock.sendall(payload.encode('utf-8'))
+        with sock.makefile('rb') as reader:
+            line = reader.readline()
+    if not line:
+        raise ConnectionError("守护进程未返回响应")
+    return json.loads(line.decode('utf-8'))
+
+
+def _ping(address: Dict[str, Any]) -> bool:
+    """守护进程是否存活（未授权的响应也说明有进程在监听）"""
+    try:
+        return isinstance(_send(address, "ping", timeout=CONNECT_TIMEOUT), dict)
+    except (OSError, ValueError):
+        return False
+
+
+def find_daemon(aceflow_dir: Path) -> Optional[Dict[str, Any]]:
+    """读取守护进程地址，未运行时返回 None"""
+    try:
+        with open(address_file(aceflow_dir), 'r', encoding='utf-8') as f:
+            address = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if "socket" in address and not hasattr(socket, "AF_UNIX"):
+        return None
+    return address
+
+
+def request(aceflow_dir: Path, command: str, args: Dict[str, Any] = None) -> Optional[Dict[str, Any]]:
+    """向守护进程发送请求，守护进程不可用时返回 None 由调用方本地执行"""
+    address = find_daemon(aceflow_dir)
+    if address is None:
+        return None
+    try:
+        response = _send(address, command, args, timeout=REQUEST_TIMEOUT)
+    except (OSError, ValueError):
+        # socket.timeout 是 OSError 的子类
+        return None
+    # 令牌不匹配（地址文件属于其他守护进程实例）时同样本地执行
+    return None if response.get("error") == UNAUTHORIZED else response
+
+
+def stop(aceflow_dir: Path) -> bool:
+    """请求守护进程退出"""
+    return request(aceflow_dir, "shutdown") is not None
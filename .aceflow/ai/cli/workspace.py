@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+AceFlow v2.0 工作区注册表
+登记多个项目根目录，用线程池并行汇总各项目的状态
+"""
+
+import os
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Callable, Iterable
+
+# 可通过环境变量指定注册表文件（如团队共享的工作区）
+REGISTRY_ENV = "ACEFLOW_WORKSPACE"
+DEFAULT_WORKERS = 16
+
+# 扫描项目时跳过的目录
+SKIP_DIRS = {"node_modules", "venv", ".venv", "__pycache__", "dist", "build", "target"}
+
+
+def default_registry_file() -> Path:
+    """注册表文件，默认 ~/.aceflow/workspace.json"""
+    return Path(os.environ.get(REGISTRY_ENV) or Path.home() / ".aceflow" / "workspace.json")
+
+
+class WorkspaceRegistry:
+    """项目根目录注册表"""
+
+    def __init__(self, registry_file: Path = None):
+        self.registry_file = Path(registry_file) if registry_file else default_registry_file()
+
+    def load(self) -> List[Dict[str, Any]]:
+        """读取登记的项目条目"""
+        try:
+            with open(self.registry_file, 'r', encoding='utf-8') as f:
+                return json.load(f).get("projects", [])
+        except (OSError, ValueError):
+            return []
+
+    def projects(self) -> List[Path]:
+        """登记的项目根目录"""
+        return [Path(entry["root"]) for entry in self.load() if entry.get("root")]
+
+    def add(self, roots: Iterable[Path]) -> List[str]:
+        """登记项目（须包含 .aceflow 目录），返回新增的根目录"""
+        entries = self.load()
+        known = {entry.get("root") for entry in entries}
+        added = []
+        for root in roots:
+            root = str(Path(root).expanduser().resolve())
+            if root in known:
+                continue
+            if not (Path(root) / ".aceflow").is_dir():
+                raise ValueError(f"不是AceFlow项目: {root}")
+            entries.append({"root": root, "added_at": datetime.now().isoformat()})
+            known.add(root)
+            added.append(root)
+        if added:
+            self._save(entries)
+        return added
+
+    def remove(self, roots: Iterable[Path]) -> List[str]:
+        """取消登记，返回实际移除的根目录"""
+        targets = {str(Path(root).expanduser().resolve()) for root in roots}
+        entries = self.load()
+        kept = [entry for entry in entries if entry.get("root") not in targets]
+        removed = [entry["root"] for entry in entries if entry.get("root") in targets]
+        if removed:
+            self._save(kept)
+        return removed
+
+    def scan(self, base: Path, max_depth: int = 3) -> List[str]:
+        """在 base 下查找包含 .aceflow 的目录并登记（不进入已找到的项目内部）"""
+        base = Path(base).expanduser().resolve()
+        found = []
+        for dirpath, dirnames, _ in os.walk(base):
+            if ".aceflow" in dirnames:
+                found.append(dirpath)
+                dirnames[:] = []
+                continue
+            depth = len(Path(dirpath).relative_to(base).parts)
+            if depth >= max_depth:
+                dirnames[:] = []
+                continue
+            dirnames[:] = [name for name in dirnames if not name.startswith(".") and name not in SKIP_DIRS]
+        return self.add(found)
+
+    def _save(self, entries: List[Dict[str, Any]]):
+        """原子写入注册表"""
+        self.registry_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.registry_file.with_name(f"{self.registry_file.name}.{os.getpid()}.tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({"version": 1, "projects": entries}, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_file, self.registry_file)
+
+
+def sweep(roots: List[Path], handler: Callable[[Path], Dict[str, Any]],
+          workers: int = DEFAULT_WORKERS) -> Dict[str, Any]:
+    """并行对每个项目执行 handler，汇总为一个结果文档（保持登记顺序，单个项目失败不影响其他项目）"""
+    started = time.perf_counter()
+
+    def run(root: Path) -> Dict[str, Any]:
+        try:
+            return {"root": str(root), "result": handler(root)}
+        except Exception as e:
+            return {"root": str(root), "error": str(e)}
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(roots) or 1))) as pool:
+        projects = list(pool.map(run, roots))
+
+    failed = sum(1 for project in projects if "error" in project)
+    return {
+        "generated_at": datetime.now().isoformat(),
+        "project_count": len(projects),
+        "succeeded": len(projects) - failed,
+        "failed": failed,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        "projects": projects
+    }
@@ -4,10 +4,16 @@ AceFlow v2.0 AI训练数据生成器
 为任务分类和流程推荐模型提供训练数据
 """
 
+import os
+import csv
 import json
+import time
 import random
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from typing import List, Dict, Tuple, Any
+from itertools import islice
+from typing import List, Dict, Tuple, Any, Iterator, Optional
 from pathlib import Path
 from dataclasses import dataclass, asdict
 from enum import Enum
@@ -18,10 +24,25 @@ sys.path.append(str(Path(__file__).parent.parent))
 
 from engines.decision_engine import TaskType, ProjectComplexity, TaskContext, ProjectContext
 
+FLOW_TYPES = ["minimal", "standard", "complete"]
+
+# 流式生成的数据集：名称 -> 生成器方法
+STREAM_KINDS = {
+    "task_classification": "iter_task_classification",
+    "flow_recommendation": "iter_flow_recommendation",
+    "progress_prediction": "iter_progress_prediction"
+}
+OUTPUT_FORMATS = ("jsonl", "csv", "npy")
+DEFAULT_CHUNK_SIZE = 10000
+# 每个分片的记录数；分片划分与进程数无关，保证同一种子在任意并行度下输出一致
+DEFAULT_SHARD_SIZE = 1000000
+
 class TrainingDataGenerator:
     """训练数据生成器"""
     
-    def __init__(self):
+    def __init__(self, seed: Any = None):
+        # 独立的随机数生成器，不同进程/分片使用各自的种子
+        self.rng = random.Random(seed)
         self.task_keywords = {
             TaskType.FEATURE_DEVELOPMENT: [
                 "add new feature", "implement functionality", "create component",
@@ -84,7 +105,7 @@ class TrainingDataGenerator:
     def generate_task_description(self, task_type: TaskType) -> str:
         """生成任务描述"""
         keywords = self.task_keywords[task_type]
-        base_keyword = random.choice(keywords)
+        base_keyword = self.rng.choice(keywords)
         
         # 添加上下文信息
         contexts = [
@@ -101,10 +122,10 @@ class TrainingDataGenerator:
             "在后台管理"
         ]
         
-        context = random.choice(contexts)
+        context = self.rng.choice(contexts)
         
         # 生成完整描述
-        if random.random() < 0.5:
+        if self.rng.random() < 0.5:
             return f"{base_keyword} {context}"
         else:
             return f"{base_keyword} to improve {context}"
@@ -112,20 +133,20 @@ class TrainingDataGenerator:
     def generate_task_context(self, task_type: TaskType) -> TaskContext:
         """生成任务上下文"""
         description = self.generate_task_description(task_type)
-        priority = random.choice(self.priorities)
-        complexity = random.choice(self.complexities)
-        impact = random.choice(self.impacts)
+        priority = self.rng.choice(self.priorities)
+        complexity = self.rng.choice(self.complexities)
+        impact = self.rng.choice(self.impacts)
         
         # 生成依赖关系
         dependencies = []
-        if random.random() < 0.3:  # 30%概率有依赖
-            dep_count = random.randint(1, 3)
+        if self.rng.random() < 0.3:  # 30%概率有依赖
+            dep_count = self.rng.randint(1, 3)
             for i in range(dep_count):
                 dependencies.append(f"dependency_{i+1}")
         
         # 生成估算时间
         effort_options = ["1-2 hours", "half day", "1-2 days", "3-5 days", "1 week", "2 weeks"]
-        effort = random.choice(effort_options)
+        effort = self.rng.choice(effort_options)
         
         return TaskContext(
             description=description,
@@ -138,22 +159,22 @@ class TrainingDataGenerator:
     
     def generate_project_context(self, preferred_flow: str = None) -> ProjectContext:
         """生成项目上下文"""
-        project_type = random.choice(self.project_types)
-        tech_stack = random.choice(self.tech_stacks)
+        project_type = self.rng.choice(self.project_types)
+        tech_stack = self.rng.choice(self.tech_stacks)
         
         # 根据流程类型调整项目特征
         if preferred_flow == "minimal":
-            team_size = random.randint(1, 3)
-            duration = random.choice(["1 week", "2 weeks", "1 month"])
-            risk_count = random.randint(0, 2)
+            team_size = self.rng.randint(1, 3)
+            duration = self.rng.choice(["1 week", "2 weeks", "1 month"])
+            risk_count = self.rng.randint(0, 2)
         elif preferred_flow == "complete":
-            team_size = random.randint(8, 15)
-            duration = random.choice(["3 months", "6 months", "1 year"])
-            risk_count = random.randint(3, 6)
+            team_size = self.rng.randint(8, 15)
+            duration = self.rng.choice(["3 months", "6 months", "1 year"])
+            risk_count = self.rng.randint(3, 6)
         else:  # standard
-            team_size = random.randint(3, 8)
-            duration = random.choice(["1 month", "2 months", "3 months"])
-            risk_count = random.randint(1, 3)
+            team_size = self.rng.randint(3, 8)
+            duration = self.rng.choice(["1 month", "2 months", "3 months"])
+            risk_count = self.rng.randint(1, 3)
         
         # 生成风险因素
         risk_factors = []
@@ -164,16 +185,16 @@ class TrainingDataGenerator:
         ]
         
         for _ in range(risk_count):
-            risk_factors.append(random.choice(risk_options))
+            risk_factors.append(self.rng.choice(risk_options))
         
         # 生成其他属性
         stages = ["planning", "development", "testing", "deployment"]
-        current_stage = random.choice(stages)
-        completion = random.uniform(0.1, 0.9)
-        velocity = random.uniform(0.6, 1.2)
+        current_stage = self.rng.choice(stages)
+        completion = self.rng.uniform(0.1, 0.9)
+        velocity = self.rng.uniform(0.6, 1.2)
         
         return ProjectContext(
-            name=f"{project_type}-project-{random.randint(1000, 9999)}",
+            name=f"{project_type}-project-{self.rng.randint(1000, 9999)}",
             team_size=team_size,
             duration_estimate=duration,
             technology_stack=tech_stack,
@@ -194,7 +215,7 @@ class TrainingDataGenerator:
                 training_data.append((task_context.description, task_type))
         
         # 打乱数据顺序
-        random.shuffle(training_data)
+        self.rng.shuffle(training_data)
         return training_data
     
     def generate_flow_recommendation_data(self, samples_per_flow: int = 100) -> List[Tuple[Dict[str, Any], str]]:
@@ -211,59 +232,76 @@ class TrainingDataGenerator:
                 training_data.append((features, flow))
         
         # 打乱数据顺序
-        random.shuffle(training_data)
+        self.rng.shuffle(training_data)
         return training_data
     
     def generate_progress_prediction_data(self, samples: int = 500) -> List[Tuple[Dict[str, Any], int]]:
         """生成进度预测训练数据"""
-        training_data = []
+        return [self._progress_sample() for _ in range(samples)]
+    
+    def _progress_sample(self) -> Tuple[Dict[str, Any], int]:
+        """生成一条进度预测样本"""
+        task_type = self.rng.choice(list(TaskType))
+        task_context = self.generate_task_context(task_type)
+        project_context = self.generate_project_context()
+        
+        # 基于规则生成"真实"持续时间
+        base_hours = {
+            TaskType.BUG_FIX: 4,
+            TaskType.FEATURE_DEVELOPMENT: 16,
+            TaskType.REFACTORING: 8,
+            TaskType.TESTING: 6,
+            TaskType.DOCUMENTATION: 4,
+            TaskType.RESEARCH: 12,
+            TaskType.ARCHITECTURE: 24,
+            TaskType.DEPLOYMENT: 8
+        }
         
-        for _ in range(samples):
-            task_type = random.choice(list(TaskType))
-            task_context = self.generate_task_context(task_type)
-            project_context = self.generate_project_context()
-            
-            # 基于规则生成"真实"持续时间
-            base_hours = {
-                TaskType.BUG_FIX: 4,
-                TaskType.FEATURE_DEVELOPMENT: 16,
-                TaskType.REFACTORING: 8,
-                TaskType.TESTING: 6,
-                TaskType.DOCUMENTATION: 4,
-                TaskType.RESEARCH: 12,
-                TaskType.ARCHITECTURE: 24,
-                TaskType.DEPLOYMENT: 8
-            }
-            
-            hours = base_hours.get(task_type, 8)
-            
-            # 添加随机变化和项目因素影响
-            if task_context.technical_complexity == "high":
-                hours *= random.uniform(1.3, 1.8)
-            elif task_context.technical_complexity == "low":
-                hours *= random.uniform(0.7, 0.9)
-            
-            if project_context.team_size > 5:
-                hours *= random.uniform(1.1, 1.4)
-            elif project_context.team_size == 1:
-                hours *= random.uniform(0.8, 1.0)
-            
-            if len(project_context.risk_factors) > 2:
-                hours *= random.uniform(1.2, 1.6)
-            
-            # 添加随机噪声
-            hours *= random.uniform(0.8, 1.3)
-            
-            # 合并特征
-            features = {
-                **task_context.to_features(),
-                **project_context.to_features(),
-                'task_type_feature': task_type.value
-            }
-            
-            training_data.append((features, int(hours)))
+        hours = base_hours.get(task_type, 8)
         
-        return training_data
+        # 添加随机变化和项目因素影响
+        if task_context.technical_complexity == "high":
+            hours *= self.rng.uniform(1.3, 1.8)
+        elif task_context.technical_complexity == "low":
+            hours *= self.rng.uniform(0.7, 0.9)
+        
+        if project_context.team_size > 5:
+            hours *= self.rng.uniform(1.1, 1.4)
+        elif project_context.team_size == 1:
+            hours *= self.rng.uniform(0.8, 1.0)
+        
+        if len(project_context.risk_factors) > 2:
+            hours *= self.rng.uniform(1.2, 1.6)
+        
+        # 添加随机噪声
+        hours *= self.rng.uniform(0.8, 1.3)
+        
+        # 合并特征
+        features = {
+            **task_context.to_features(),
+            **project_context.to_features(),
+            'task_type_feature': task_type.value
+        }
+        
+        return features, int(hours)
+    
+    def iter_task_classification(self, count: int) -> Iterator[Tuple[str, str]]:
+        """流式生成任务分类样本 (描述, 任务类型)，类型随机抽取，无需整体打乱"""
+        task_types = list(TaskType)
+        for _ in range(count):
+            task_type = self.rng.choice(task_types)
+            yield self.generate_task_description(task_type), task_type.value
+    
+    def iter_flow_recommendation(self, count: int) -> Iterator[Tuple[Dict[str, Any], str]]:
+        """流式生成流程推荐样本 (项目特征, 流程)"""
+        for _ in range(count):
+            flow = self.rng.choice(FLOW_TYPES)
+            yield self.generate_project_context(flow).to_features(), flow
+    
+    def iter_progress_prediction(self, count: int) -> Iterator[Tuple[Dict[str, Any], int]]:
+        """流式生成进度预测样本 (特征, 小时数)"""
+        for _ in range(count):
+            yield self._progress_sample()
     
     def save_training_data(self, output_dir: Path):
         """保存训练数据到文件"""
@@ -323,6 +361,196 @@ class TrainingDataGenerator:
         print(f"📁 所有训练数据保存在: {output_dir}")
 
 
+def _feature_columns(record: Tuple[Any, Any]) -> Optional[List[str]]:
+    """特征列（按名称排序的固定顺序）；文本样本返回 None"""
+    features = record[0]
+    return sorted(features) if isinstance(features, dict) else None
+
+
+# 列式输出中的分类特征：取值按列表下标编码
+CATEGORICAL_COLUMNS = {
+    "task_type_feature": [task_type.value for task_type in TaskType]
+}
+
+
+def _numeric(column: str, value: Any) -> float:
+    """列式输出中布尔值记为 0/1，分类特征记为 CATEGORICAL_COLUMNS 中的下标"""
+    if isinstance(value, (bool, int, float)):
+        return float(value)
+    categories = CATEGORICAL_COLUMNS.get(column)
+    if categories is None or value not in categories:
+        raise ValueError(f"npy 格式无法编码特征 {column}={value!r}，请使用 jsonl 或 csv")
+    return float(categories.index(value))
+
+
+class JsonlSink:
+    """逐块追加 JSON 行，每行为 [特征或描述, 标签]"""
+    
+    def __init__(self, path: Path, count: int):
+        self.path = path
+        self.file = open(path, 'w', encoding='utf-8')
+        self.columns = None
+        self.files = [path.name]
+    
+    def write_chunk(self, records: List[Tuple[Any, Any]]):
+        self.file.write("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records))
+    
+    def close(self):
+        self.file.close()
+
+
+class CsvSink:
+    """逐块写入CSV：特征列 + label 列（文本样本为 description,label）"""
+    
+    def __init__(self, path: Path, count: int):
+        self.path = path
+        self.file = open(path, 'w', encoding='utf-8', newline='')
+        self.writer = csv.writer(self.file)
+        self.columns = None
+        self.files = [path.name]
+    
+    def write_chunk(self, records: List[Tuple[Any, Any]]):
+        if self.columns is None:
+            self.columns = _feature_columns(records[0]) or ["description"]
+            self.writer.writerow(self.columns + ["label"])
+        if isinstance(records[0][0], dict):
+            self.writer.writerows(
+                [int(features[c]) if isinstance(features[c], bool) else features[c] for c in self.columns] + [label]
+                for features, label in records
+            )
+        else:
+            self.writer.writerows(records)
+    
+    def close(self):
+        self.file.close()
+
+
+class NpySink:
+    """列式 .npy 输出：预先按记录数创建内存映射数组，逐块填充，内存占用与总量无关
+    
+    生成 <分片>.features.npy（float32 矩阵）和 <分片>.labels.npy；
+    分类标签存为 FLOW_TYPES 中的下标，分类特征存为 CATEGORICAL_COLUMNS 中的下标。
+    """
+    
+    def __init__(self, path: Path, count: int):
+        try:
+            from numpy.lib.format import open_memmap
+        except ImportError:
+            raise ImportError("npy 格式需要安装 numpy，可改用 jsonl 或 csv")
+        self._open_memmap = open_memmap
+        self.path = path
+        self.count = count
+        self.columns = None
+        self.features_path = path.with_suffix(".features.npy")
+        self.labels_path = path.with_suffix(".labels.npy")
+        self.files = [self.features_path.name, self.labels_path.name]
+        self.features = None
+        self.labels = None
+        self.row = 0
+    
+    def write_chunk(self, records: List[Tuple[Any, Any]]):
+        if self.features is None:
+            self.columns = _feature_columns(records[0])
+            if self.columns is None:
+                raise ValueError("文本数据集不支持 npy 格式，请使用 jsonl 或 csv")
+            label_dtype = "int8" if isinstance(records[0][1], str) else "int32"
+            self.features = self._open_memmap(str(self.features_path), mode="w+",
+                                               dtype="float32", shape=(self.count, len(self.columns)))
+            self.labels = self._open_memmap(str(self.labels_path), mode="w+",
+                                            dtype=label_dtype, shape=(self.count,))
+        
+        end = self.row + len(records)
+        self.features[self.row:end] = [[_numeric(c, features[c]) for c in self.columns] for features, _ in records]
+        self.labels[self.row:end] = [FLOW_TYPES.index(label) if isinstance(label, str) else label
+                                     for _, label in records]
+        self.row = end
+    
+    def close(self):
+        for array in (self.features, self.labels):
+            if array is not None:
+                array.flush()
+        self.features = self.labels = None
+
+
+SINKS = {"jsonl": JsonlSink, "csv": CsvSink, "npy": NpySink}
+
+
+def shard_seed(seed: Any, kind: str, shard: int) -> str:
+    """分片种子：由全局种子、数据集和分片序号确定，与进程数和调度顺序无关"""
+    return f"{seed}:{kind}:{shard}"
+
+
+def write_shard(kind: str, fmt: str, path: Path, count: int, seed: Any,
+                chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, Any]:
+    """生成一个分片：按块从生成器取记录写入输出，内存中最多保留一块"""
+    generator = TrainingDataGenerator(seed=seed)
+    records = getattr(generator, STREAM_KINDS[kind])(count)
+    sink = SINKS[fmt](path, count)
+    written = 0
+    try:
+        while True:
+            chunk = list(islice(records, chunk_size))
+            if not chunk:
+                break
+            sink.write_chunk(chunk)
+            written += len(chunk)
+    finally:
+        sink.close()
+    return {"files": sink.files, "records": written, "seed": seed, "columns": sink.columns}
+
+
+def _write_shard_task(args: Tuple) -> Dict[str, Any]:
+    return write_shard(*args)
+
+
+def generate_corpus(kind: str, total: int, output_dir: Path, fmt: str = "jsonl", seed: Any = 42,
+                    workers: int = 1, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                    shard_size: int = DEFAULT_SHARD_SIZE) -> Dict[str, Any]:
+    """流式生成大规模数据集：按 shard_size 切分为分片，多进程并行写入，最后写出清单 manifest.json"""
+    if kind not in STREAM_KINDS:
+        raise ValueError(f"未知数据集: {kind}，可选: {', '.join(STREAM_KINDS)}")
+    if fmt not in SINKS:
+        raise ValueError(f"未知输出格式: {fmt}，可选: {', '.join(OUTPUT_FORMATS)}")
+    if fmt == "npy" and kind == "task_classification":
+        raise ValueError("文本数据集不支持 npy 格式，请使用 jsonl 或 csv")
+    
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    started = time.perf_counter()
+    
+    tasks = []
+    for shard, offset in enumerate(range(0, total, shard_size)):
+        path = output_dir / f"{kind}-{shard:05d}.{fmt}"
+        tasks.append((kind, fmt, path, min(shard_size, total - offset), shard_seed(seed, kind, shard), chunk_size))
+    
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            shards = list(pool.map(_write_shard_task, tasks))
+    else:
+        shards = [write_shard(*task) for task in tasks]
+    
+    columns = shards[0]["columns"] if shards else None
+    manifest = {
+        "generation_time": datetime.now().isoformat(),
+        "dataset": kind,
+        "format": fmt,
+        "seed": seed,
+        "total_records": sum(shard["records"] for shard in shards),
+        "chunk_size": chunk_size,
+        "shard_size": shard_size,
+        "columns": columns,
+        "labels": FLOW_TYPES if kind == "flow_recommendation" else None,
+        # npy 中分类特征的编码表
+        "categories": {column: values for column, values in CATEGORICAL_COLUMNS.items()
+                       if fmt == "npy" and column in (columns or [])},
+        "shards": shards,
+        "elapsed_seconds": round(time.perf_counter() - started, 2)
+    }
+    with open(output_dir / f"{kind}.manifest.json", 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    return manifest
+
+
 class RealWorldDataCollector:
     """真实项目数据收集器"""
     
@@ -361,7 +589,8 @@ class RealWorldDataCollector:
                 "team_size": config.get("project", {}).get("team_size", "unknown"),
                 "project_type": config.get("project", {}).get("project_type", "unknown"),
                 "agile_framework": config.get("agile", {}).get("framework", "unknown"),
-                "stage_history": state.get("stage_states", {})
+                "stage_history": state.get("stage_states", {}),
+                "stage_transitions": self.collect_stage_transitions()
             }
             
             return project_data
@@ -370,6 +599,34 @@ class RealWorldDataCollector:
             print(f"⚠️ 收集项目数据时出错: {e}")
             return {}
     
+    def collect_stage_transitions(self) -> List[Dict[str, Any]]:
+        """从阶段事件日志中提取状态流转记录（谁在何时将哪个阶段改为什么状态）"""
+        events_file = self.aceflow_dir / "state_events.jsonl"
+        # 轮转出的归档 state_events.jsonl.<最后序号> 按序号在前
+        archives = sorted(
+            (path for path in self.aceflow_dir.glob("state_events.jsonl.*") if path.suffix[1:].isdigit()),
+            key=lambda path: int(path.suffix[1:])
+        )
+        transitions = []
+        for path in archives + [events_file]:
+            if not path.exists():
+                continue
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        continue
+                    status = event.get("changes", {}).get("status")
+                    if event.get("type") == "stage_updated" and status:
+                        transitions.append({
+                            "stage_id": event.get("stage_id"),
+                            "status": status,
+                            "actor": event.get("actor"),
+                            "timestamp": event.get("ts")
+                        })
+        return transitions
+    
     def save_real_data(self, data: Dict[str, Any]):
         """保存真实数据到文件"""
         try:
@@ -401,18 +658,36 @@ class RealWorldDataCollector:
 
 def main():
     """主函数"""
-    print("🤖 AceFlow v2.0 AI训练数据生成器")
-    print("=" * 50)
-    
-    # 设置随机种子以确保可重现性
-    random.seed(42)
+    parser = argparse.ArgumentParser(description="AceFlow AI训练数据生成器")
+    parser.add_argument("--stream", choices=list(STREAM_KINDS),
+                        help="流式生成指定数据集（大规模语料），不指定时生成默认训练集")
+    parser.add_argument("--count", type=int, default=100000, help="记录总数")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="jsonl", help="输出格式")
+    parser.add_argument("--seed", default="42", help="随机种子")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="并行进程数")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="每次写入的记录数")
+    parser.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE, help="每个分片文件的记录数")
+    parser.add_argument("--output", type=Path, help="输出目录")
+    args = parser.parse_args()
     
     # 确定输出目录
     current_dir = Path(__file__).parent
-    output_dir = current_dir / "training_datasets"
+    output_dir = args.output or current_dir / "training_datasets"
+    
+    if args.stream:
+        manifest = generate_corpus(args.stream, args.count, output_dir, fmt=args.format, seed=args.seed,
+                                   workers=args.workers, chunk_size=args.chunk_size,
+                                   shard_size=args.shard_size)
+        print(f"✅ {args.stream}: {manifest['total_records']} 条记录，{len(manifest['shards'])} 个分片，"
+              f"耗时 {manifest['elapsed_seconds']}s")
+        print(f"📁 输出目录: {output_dir}")
+        return
+    
+    print("🤖 AceFlow v2.0 AI训练数据生成器")
+    print("=" * 50)
     
-    # 生成训练数据
-    generator = TrainingDataGenerator()
+    # 固定随机种子以确保可重现性
+    generator = TrainingDataGenerator(seed=42)
     generator.save_training_data(output_dir)
     
     # 收集真实项目数据
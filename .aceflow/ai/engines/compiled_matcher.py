@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+AceFlow v2.0 预编译模式匹配器
+将多组关键词模式编译为单个正则，一次扫描得到所有分类的命中情况
+"""
+
+import re
+from typing import Dict, List, Any, Optional, Set, FrozenSet, Tuple
+
+# 出现这些字符的模式不是纯字面量候选，回退为单独编译
+_REGEX_METACHARS = set('\\.^$*+?{}[]()')
+
+
+def _literal_tokens(pattern: str) -> Optional[List[str]]:
+    """解析 "(a|b|c)" 形式的纯字面量候选，无法解析时返回 None"""
+    body = pattern
+    if body.startswith('(') and body.endswith(')'):
+        body = body[1:-1]
+    if not body or any(ch in _REGEX_METACHARS for ch in body):
+        return None
+
+    tokens = body.split('|')
+    if any(not token for token in tokens):
+        return None
+    return tokens
+
+
+def _trie_regex(tokens: List[str]) -> str:
+    """将词表构造成前缀树正则，匹配位置上最长的词"""
+    trie: Dict[str, Any] = {}
+    for token in tokens:
+        node = trie
+        for ch in token:
+            node = node.setdefault(ch, {})
+        node[''] = True
+
+    def build(node: Dict[str, Any]) -> str:
+        terminal = '' in node
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if terminal:
+            # 贪婪可选，优先匹配更长的词
+            return '(?:' + body + ')?'
+        return body
+
+    return build(trie)
+
+
+class CompiledPatternMatcher:
+    """预编译的多分类模式匹配器
+
+    patterns 为 {分类: [模式, ...]}，每个分类的得分为命中的模式数量，
+    与逐个 re.search 的结果一致。
+    """
+
+    def __init__(self, patterns: Dict[Any, List[str]]):
+        self.labels = list(patterns)
+        self._pattern_labels: List[Any] = []
+        self._fallback: List[Tuple[int, re.Pattern]] = []
+
+        token_patterns: Dict[str, Set[int]] = {}
+        for label, label_patterns in patterns.items():
+            for pattern in label_patterns:
+                index = len(self._pattern_labels)
+                self._pattern_labels.append(label)
+
+                tokens = _literal_tokens(pattern)
+                if tokens is None:
+                    self._fallback.append((index, re.compile(pattern)))
+                    continue
+                for token in tokens:
+                    token_patterns.setdefault(token, set()).add(index)
+
+        # 命中一个词等于同时命中其包含的所有较短的词
+        self._token_hits: Dict[str, FrozenSet[int]] = {}
+        for token in token_patterns:
+            hits = set()
+            for other, indexes in token_patterns.items():
+                if other in token:
+                    hits |= indexes
+            self._token_hits[token] = frozenset(hits)
+
+        # 零宽前瞻使每个位置都参与匹配，重叠的词不会互相遮蔽
+        self._regex = None
+        if token_patterns:
+            self._regex = re.compile('(?=(' + _trie_regex(list(token_patterns)) + '))')
+
+    def matched_patterns(self, text: str) -> Set[int]:
+        """返回文本命中的模式序号"""
+        hits: Set[int] = set()
+        if self._regex is not None:
+            token_hits = self._token_hits
+            for match in self._regex.finditer(text):
+                token = match.group(1)
+                if token:
+                    hits |= token_hits[token]
+
+        for index, regex in self._fallback:
+            if index not in hits and regex.search(text):
+                hits.add(index)
+
+        return hits
+
+    def scores(self, text: str) -> Dict[Any, int]:
+        """按分类统计命中的模式数量（保持分类定义顺序）"""
+        scores = {label: 0 for label in self.labels}
+        for index in self.matched_patterns(text):
+            scores[self._pattern_labels[index]] += 1
+        return scores
+
+    def first_match(self, text: str) -> Optional[Any]:
+        """按定义顺序返回第一个有命中的分类"""
+        scores = self.scores(text)
+        for label in self.labels:
+            if scores[label] > 0:
+                return label
+        return None
+
+    @staticmethod
+    def keywords(words: List[str]) -> str:
+        """将关键词列表转换为字面量候选模式"""
+        return '(' + '|'.join(words) + ')'
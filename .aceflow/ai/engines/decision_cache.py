@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+AceFlow v2.0 决策结果缓存
+按规范化的任务描述、上下文覆盖和项目画像指纹缓存决策，LRU + TTL，可持久化到磁盘供多次CLI调用共享
+"""
+
+import os
+import re
+import copy
+import json
+import time
+import atexit
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+try:
+    import fcntl
+except ImportError:
+    # Windows 下没有 fcntl，仅保留原子替换
+    fcntl = None
+
+CACHE_VERSION = 1
+DEFAULT_MAX_ENTRIES = 512
+# 默认有效期（秒）；画像或规则变化会改变缓存键，TTL只兜底未纳入指纹的输入
+DEFAULT_TTL = 3600
+
+_SPACE_RE = re.compile(r"\s+")
+# 首尾的标点（中英文）不影响决策
+_EDGE_PUNCT = " .,!?;:'\"`~。，！？；：、…"
+
+
+def normalize_task(text: str) -> str:
+    """规范化任务描述：全半角统一、小写、合并空白、去掉首尾标点"""
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    return _SPACE_RE.sub(" ", text).strip(_EDGE_PUNCT)
+
+
+def _json_default(value: Any) -> Any:
+    """Enum 取其值，其余转为字符串"""
+    return getattr(value, "value", str(value))
+
+
+def cache_key(*parts: Any) -> str:
+    """由任意可JSON序列化的部分计算缓存键"""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=_json_default)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class DecisionCache:
+    """有界 LRU + TTL 缓存，值为决策结果的字典形式
+
+    persist_file 不为空时启动时加载、进程退出时写回（只在条目有变化时）；
+    写回时与磁盘上其他进程新写入的条目合并。命中/未命中计数只统计当前进程。
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl: float = DEFAULT_TTL,
+                 persist_file: Path = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.persist_file = Path(persist_file) if persist_file else None
+        # key -> (过期时间, 值)
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        if self.persist_file is not None:
+            self._load()
+            atexit.register(self.save)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """返回缓存值的副本，不存在或已过期时返回 None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.time():
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            value = entry[1]
+        return copy.deepcopy(value)
+
+    def put(self, key: str, value: Dict[str, Any]):
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._dirty = True
+
+    def clear(self):
+        """清空缓存（包括磁盘文件）"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = self.expirations = 0
+            self._dirty = False
+        if self.persist_file is not None:
+            try:
+                self.persist_file.unlink()
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        """命中率等指标"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "persist_file": str(self.persist_file) if self.persist_file else None
+            }
+
+    def _load(self):
+        self._entries = self._read_entries()
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _read_entries(self) -> "OrderedDict[str, Any]":
+        """读取磁盘上未过期的条目，文件缺失、损坏或版本不符时返回空"""
+        entries = OrderedDict()
+        try:
+            with open(self.persist_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return entries
+        if data.get("version") != CACHE_VERSION:
+            return entries
+
+        now = time.time()
+        for key, expires_at, value in data.get("entries", []):
+            if expires_at > now:
+                entries[key] = (expires_at, value)
+        return entries
+
+    def save(self):
+        """写回磁盘（原子替换），没有变化或失败时静默跳过
+
+        持有文件锁读取磁盘上的条目并合并：同一个键保留较新写入的值，
+        本进程的条目视为最近使用，超出容量时淘汰最久未用的。
+        """
+        if self.persist_file is None:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            local = list(self._entries.items())
+            self._dirty = False
+        tmp_file = self.persist_file.with_name(f"{self.persist_file.name}.{os.getpid()}.tmp")
+        lock_file = None
+        try:
+            self.persist_file.parent.mkdir(parents=True, exist_ok=True)
+            lock_file = open(f"{self.persist_file}.lock", 'a')
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            merged = self._read_entries()
+            for key, entry in local:
+                existing = merged.pop(key, None)
+                merged[key] = existing if existing is not None and existing[0] > entry[0] else entry
+            while len(merged) > self.max_entries:
+                merged.popitem(last=False)
+            data = {
+                "version": CACHE_VERSION,
+                # 按LRU顺序保存，加载后保持淘汰顺序
+                "entries": [[key, expires_at, value] for key, (expires_at, value) in merged.items()]
+            }
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, default=_json_default)
+            os.replace(tmp_file, self.persist_file)
+        except OSError:
+            pass
+        finally:
+            if lock_file is not None:
+                lock_file.close()
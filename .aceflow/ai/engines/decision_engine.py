@@ -3,27 +3,27 @@ AceFlow v2.0 智能决策引擎
 从规则引擎升级为机器学习驱动的智能系统
 """
 
+import sys
 import json
 import yaml
 import logging
 from datetime import datetime
 from typing import Dict, List, Any, Optional, Tuple
 from pathlib import Path
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
 from enum import Enum
 
-# 导入AI相关库（实际使用时需要安装）
-try:
-    import numpy as np
-    from sklearn.feature_extraction.text import TfidfVectorizer
-    from sklearn.ensemble import RandomForestClassifier
-    from sklearn.model_selection import train_test_split
-    from sklearn.metrics import accuracy_score
-    HAS_ML_LIBS = True
-except ImportError:
-    # 如果没有安装ML库，使用简化的规则引擎
-    HAS_ML_LIBS = False
-    np = None
+sys.path.append(str(Path(__file__).parent.parent))
+from engines import ml_backend
+from engines.compiled_matcher import CompiledPatternMatcher
+from engines.model_store import ModelStore, ModelHandle, training_data_hash
+from engines.feature_schema import FeatureSchema
+from engines.decision_cache import DecisionCache, normalize_task, cache_key
+from engines.online_learning import OnlineLearner, checkpoint_path, decision_tokens
+from engines.tracing import span, traced
+
+# AI相关库（实际使用时需要安装）只检查是否存在，训练时才导入；未安装时使用简化的规则引擎
+HAS_ML_LIBS = ml_backend.available()
 
 class TaskType(Enum):
     """任务类型枚举"""
@@ -56,24 +56,35 @@ class ProjectContext:
     historical_velocity: float
     risk_factors: List[str]
     
+    # 特征列顺序（模型输入的列顺序，修改后需要重新训练）
+    FEATURE_COLUMNS = (
+        'team_size', 'duration_days', 'completion_percentage', 'historical_velocity',
+        'has_frontend', 'has_backend', 'has_database', 'risk_count',
+        'is_web_project', 'is_mobile_project', 'is_api_project'
+    )
+    
+    def feature_values(self) -> Tuple[Any, ...]:
+        """按 FEATURE_COLUMNS 顺序返回特征值（技术栈和项目类型只转换一次小写）"""
+        # 以换行连接，关键词不会跨越两项技术
+        stack = "\n".join(self.technology_stack).lower()
+        project_type = self.project_type.lower()
+        return (
+            self.team_size,
+            self._parse_duration_to_days(self.duration_estimate),
+            self.completion_percentage,
+            self.historical_velocity,
+            'frontend' in stack or 'react' in stack or 'vue' in stack,
+            'backend' in stack or 'api' in stack or 'django' in stack,
+            'database' in stack or 'sql' in stack or 'mongo' in stack,
+            len(self.risk_factors),
+            project_type in ('web', 'webapp', 'website'),
+            project_type in ('mobile', 'app', 'ios', 'android'),
+            project_type in ('api', 'microservice', 'backend')
+        )
+    
     def to_features(self) -> Dict[str, Any]:
         """转换为ML特征"""
-        return {
-            'team_size': self.team_size,
-            'duration_days': self._parse_duration_to_days(self.duration_estimate),
-            'completion_percentage': self.completion_percentage,
-            'historical_velocity': self.historical_velocity,
-            'has_frontend': any('frontend' in tech.lower() or 'react' in tech.lower() or 'vue' in tech.lower() 
-                             for tech in self.technology_stack),
-            'has_backend': any('backend' in tech.lower() or 'api' in tech.lower() or 'django' in tech.lower() 
-                            for tech in self.technology_stack),
-            'has_database': any('database' in tech.lower() or 'sql' in tech.lower() or 'mongo' in tech.lower() 
-                             for tech in self.technology_stack),
-            'risk_count': len(self.risk_factors),
-            'is_web_project': self.project_type.lower() in ['web', 'webapp', 'website'],
-            'is_mobile_project': self.project_type.lower() in ['mobile', 'app', 'ios', 'android'],
-            'is_api_project': self.project_type.lower() in ['api', 'microservice', 'backend']
-        }
+        return dict(zip(self.FEATURE_COLUMNS, self.feature_values()))
     
     def _parse_duration_to_days(self, duration: str) -> int:
         """解析持续时间为天数"""
@@ -98,26 +109,40 @@ class TaskContext:
     technical_complexity: str
     user_impact: str
     
+    FEATURE_COLUMNS = (
+        'description_length', 'priority_high', 'priority_medium', 'priority_low',
+        'has_dependencies', 'dependency_count',
+        'complexity_high', 'complexity_medium', 'complexity_low',
+        'impact_high', 'impact_medium', 'impact_low',
+        'has_keywords_bug', 'has_keywords_feature', 'has_keywords_test', 'has_keywords_doc'
+    )
+    
+    def feature_values(self) -> Tuple[Any, ...]:
+        """按 FEATURE_COLUMNS 顺序返回特征值（各文本字段只转换一次小写）"""
+        description = self.description.lower()
+        priority = self.priority.lower()
+        complexity = self.technical_complexity.lower()
+        impact = self.user_impact.lower()
+        return (
+            len(self.description),
+            priority == 'high', priority == 'medium', priority == 'low',
+            len(self.dependencies) > 0,
+            len(self.dependencies),
+            complexity == 'high', complexity == 'medium', complexity == 'low',
+            impact == 'high', impact == 'medium', impact == 'low',
+            'bug' in description or 'fix' in description,
+            'feature' in description or 'add' in description,
+            'test' in description,
+            'doc' in description
+        )
+    
     def to_features(self) -> Dict[str, Any]:
         """转换为ML特征"""
-        return {
-            'description_length': len(self.description),
-            'priority_high': self.priority.lower() == 'high',
-            'priority_medium': self.priority.lower() == 'medium',
-            'priority_low': self.priority.lower() == 'low',
-            'has_dependencies': len(self.dependencies) > 0,
-            'dependency_count': len(self.dependencies),
-            'complexity_high': self.technical_complexity.lower() == 'high',
-            'complexity_medium': self.technical_complexity.lower() == 'medium',
-            'complexity_low': self.technical_complexity.lower() == 'low',
-            'impact_high': self.user_impact.lower() == 'high',
-            'impact_medium': self.user_impact.lower() == 'medium',
-            'impact_low': self.user_impact.lower() == 'low',
-            'has_keywords_bug': 'bug' in self.description.lower() or 'fix' in self.description.lower(),
-            'has_keywords_feature': 'feature' in self.description.lower() or 'add' in self.description.lower(),
-            'has_keywords_test': 'test' in self.description.lower() or 'testing' in self.description.lower(),
-            'has_keywords_doc': 'doc' in self.description.lower() or 'documentation' in self.description.lower()
-        }
+        return dict(zip(self.FEATURE_COLUMNS, self.feature_values()))
+
+# 模型输入的特征结构
+PROJECT_FEATURES = FeatureSchema("project_context", ProjectContext.FEATURE_COLUMNS)
+TASK_FEATURES = FeatureSchema("task_context", TaskContext.FEATURE_COLUMNS)
 
 @dataclass
 class AIDecision:
@@ -143,9 +168,74 @@ class AIDecision:
             'timestamp': datetime.now().isoformat()
         }
 
-class TaskClassificationModel:
+class PersistentModel:
+    """可持久化模型的公共逻辑：挂载已保存的版本后，首次预测时才加载组件"""
+    
+    MODEL_NAME = ""
+    # 需要保存的属性
+    ARTIFACTS: Tuple[str, ...] = ("model",)
+    FEATURE_SCHEMA: Dict[str, Any] = {}
+    
+    version: Optional[str] = None
+    _handle: Optional[ModelHandle] = None
+    
+    def attach(self, handle: ModelHandle):
+        """挂载模型版本（不加载组件）"""
+        self._handle = handle
+        self.version = handle.version
+    
+    def _ensure_loaded(self) -> bool:
+        """按需加载挂载的模型版本，加载失败时退回规则方案"""
+        if not self.is_trained and self._handle is not None:
+            handle, self._handle = self._handle, None
+            columns = self.FEATURE_SCHEMA.get("columns")
+            if columns is not None and handle.feature_schema.get("columns", columns) != columns:
+                logging.warning(f"Model {handle.name}@{handle.version} was trained with different "
+                                f"feature columns, retrain it")
+                return False
+            try:
+                with span("model.load", model=handle.name, version=handle.version):
+                    artifacts = handle.load()
+                for key in self.ARTIFACTS:
+                    setattr(self, key, artifacts[key])
+                self.is_trained = True
+            except Exception as e:
+                logging.warning(f"Could not load model {handle.name}@{handle.version}: {e}")
+        return self.is_trained
+    
+    def save(self, store: ModelStore, training_hash: str, metadata: Dict[str, Any] = None) -> Optional[str]:
+        """保存为新版本并启用，未训练时返回 None"""
+        if not self.is_trained:
+            return None
+        self.version = store.save(
+            self.MODEL_NAME,
+            {key: getattr(self, key) for key in self.ARTIFACTS},
+            training_hash,
+            feature_schema=self.FEATURE_SCHEMA,
+            metadata=metadata
+        )
+        return self.version
+
+class TaskClassificationModel(PersistentModel):
     """任务分类模型"""
     
+    MODEL_NAME = "task_classifier"
+    ARTIFACTS = ("vectorizer", "model")
+    FEATURE_SCHEMA = {"input": "task_context.description", "vectorizer": "tfidf", "max_features": 1000}
+    
+    # 规则分类的关键词，按优先级排列
+    RULE_KEYWORDS = {
+        TaskType.BUG_FIX: ['bug', 'fix', 'error', 'issue'],
+        TaskType.TESTING: ['test', 'testing', 'unit test', 'integration'],
+        TaskType.DOCUMENTATION: ['doc', 'documentation', 'readme', 'guide'],
+        TaskType.REFACTORING: ['refactor', 'refactoring', 'cleanup', 'optimize'],
+        TaskType.RESEARCH: ['research', 'investigate', 'spike', 'poc'],
+        TaskType.ARCHITECTURE: ['architecture', 'design', 'framework'],
+        TaskType.DEPLOYMENT: ['deploy', 'deployment', 'release', 'publish']
+    }
+    
+    _rule_matcher = None
+    
     def __init__(self):
         self.model = None
         self.vectorizer = None
@@ -157,14 +247,15 @@ class TaskClassificationModel:
             logging.warning("ML libraries not available, using rule-based classification")
             return
             
+        ml = ml_backend.load()
         descriptions, labels = zip(*training_data)
         
         # 文本向量化
-        self.vectorizer = TfidfVectorizer(max_features=1000, stop_words='english')
+        self.vectorizer = ml.TfidfVectorizer(max_features=1000, stop_words='english')
         X = self.vectorizer.fit_transform(descriptions)
         
         # 训练分类器
-        self.model = RandomForestClassifier(n_estimators=100, random_state=42)
+        self.model = ml.RandomForestClassifier(n_estimators=100, random_state=42)
         self.model.fit(X, labels)
         self.is_trained = True
         
@@ -172,42 +263,60 @@ class TaskClassificationModel:
     
     def predict(self, task_context: TaskContext) -> TaskType:
         """预测任务类型"""
-        if not self.is_trained or not HAS_ML_LIBS:
-            return self._rule_based_classification(task_context)
+        return self.predict_batch([task_context])[0]
+    
+    def predict_batch(self, task_contexts: List[TaskContext]) -> List[TaskType]:
+        """批量预测任务类型（向量化和模型各调用一次）"""
+        if not HAS_ML_LIBS or not self._ensure_loaded():
+            return [self._rule_based_classification(task_context) for task_context in task_contexts]
         
         # 使用ML模型预测
-        X = self.vectorizer.transform([task_context.description])
-        prediction = self.model.predict(X)[0]
-        return TaskType(prediction)
+        X = self.vectorizer.transform([task_context.description for task_context in task_contexts])
+        return [TaskType(prediction) for prediction in self.model.predict(X)]
     
     def _rule_based_classification(self, task_context: TaskContext) -> TaskType:
         """基于规则的任务分类（备用方案）"""
         description = task_context.description.lower()
         
-        # 关键词匹配规则
-        if any(word in description for word in ['bug', 'fix', 'error', 'issue']):
-            return TaskType.BUG_FIX
-        elif any(word in description for word in ['test', 'testing', 'unit test', 'integration']):
-            return TaskType.TESTING
-        elif any(word in description for word in ['doc', 'documentation', 'readme', 'guide']):
-            return TaskType.DOCUMENTATION
-        elif any(word in description for word in ['refactor', 'refactoring', 'cleanup', 'optimize']):
-            return TaskType.REFACTORING
-        elif any(word in description for word in ['research', 'investigate', 'spike', 'poc']):
-            return TaskType.RESEARCH
-        elif any(word in description for word in ['architecture', 'design', 'framework']):
-            return TaskType.ARCHITECTURE
-        elif any(word in description for word in ['deploy', 'deployment', 'release', 'publish']):
-            return TaskType.DEPLOYMENT
-        else:
-            return TaskType.FEATURE_DEVELOPMENT
+        # 关键词匹配规则（预编译，所有类型共享一次扫描）
+        if TaskClassificationModel._rule_matcher is None:
+            TaskClassificationModel._rule_matcher = CompiledPatternMatcher({
+                task_type: [CompiledPatternMatcher.keywords(words)]
+                for task_type, words in self.RULE_KEYWORDS.items()
+            })
+        
+        task_type = TaskClassificationModel._rule_matcher.first_match(description)
+        return task_type or TaskType.FEATURE_DEVELOPMENT
 
-class FlowRecommendationModel:
+class FlowRecommendationModel(PersistentModel):
     """流程推荐模型"""
     
+    MODEL_NAME = "flow_recommender"
+    FEATURE_SCHEMA = PROJECT_FEATURES.to_dict()
+    # 在线学习模型的置信度达到该值时采用其推荐
+    ONLINE_MIN_CONFIDENCE = 0.6
+    
     def __init__(self):
         self.model = None
         self.is_trained = False
+        # 从决策结果增量学习的模型（OnlineLearner），没有检查点时为 None
+        self.online_learner = None
+    
+    @property
+    def online_version(self) -> Optional[int]:
+        """在线模型已学习的样本数，用于决策缓存失效"""
+        return self.online_learner.records_seen if self.online_learner is not None else None
+    
+    def suggest_online(self, task_context: TaskContext, project_context: ProjectContext) -> Optional[str]:
+        """在线学习模型的推荐，模型不存在或置信度不足时返回 None"""
+        if self.online_learner is None:
+            return None
+        prediction = self.online_learner.predict(decision_tokens(
+            {"description": task_context.description, "priority": task_context.priority,
+             "complexity": task_context.technical_complexity},
+            {"team_size": project_context.team_size}
+        ))
+        return prediction["flow"] if prediction["confidence"] >= self.ONLINE_MIN_CONFIDENCE else None
         
     def train(self, training_data: List[Tuple[Dict[str, Any], str]]):
         """训练流程推荐模型"""
@@ -215,20 +324,14 @@ class FlowRecommendationModel:
             logging.warning("ML libraries not available, using rule-based recommendation")
             return
             
-        # 准备训练数据
-        features = []
-        labels = []
-        
-        for feature_dict, flow_mode in training_data:
-            feature_vector = list(feature_dict.values())
-            features.append(feature_vector)
-            labels.append(flow_mode)
+        ml = ml_backend.load()
         
-        X = np.array(features)
-        y = np.array(labels)
+        # 按固定列顺序构造特征矩阵
+        X = PROJECT_FEATURES.matrix_from_dicts(feature_dict for feature_dict, _ in training_data)
+        y = ml.np.array([flow_mode for _, flow_mode in training_data])
         
         # 训练模型
-        self.model = RandomForestClassifier(n_estimators=100, random_state=42)
+        self.model = ml.RandomForestClassifier(n_estimators=100, random_state=42)
         self.model.fit(X, y)
         self.is_trained = True
         
@@ -236,13 +339,16 @@ class FlowRecommendationModel:
     
     def suggest(self, task_type: TaskType, project_context: ProjectContext) -> str:
         """推荐工作流模式"""
-        if not self.is_trained or not HAS_ML_LIBS:
-            return self._rule_based_recommendation(task_type, project_context)
+        return self.suggest_batch([task_type], [project_context])[0]
+    
+    def suggest_batch(self, task_types: List[TaskType], project_contexts: List[ProjectContext]) -> List[str]:
+        """批量推荐工作流模式（模型只调用一次）"""
+        if not HAS_ML_LIBS or not self._ensure_loaded():
+            return [self._rule_based_recommendation(task_type, project_context)
+                    for task_type, project_context in zip(task_types, project_contexts)]
         
         # 使用ML模型推荐
-        features = list(project_context.to_features().values())
-        prediction = self.model.predict([features])[0]
-        return prediction
+        return [str(flow) for flow in self.model.predict(PROJECT_FEATURES.to_matrix(project_contexts))]
     
     def _rule_based_recommendation(self, task_type: TaskType, project_context: ProjectContext) -> str:
         """基于规则的流程推荐（备用方案）"""
@@ -261,9 +367,12 @@ class FlowRecommendationModel:
         # 默认标准模式
         return 'standard'
 
-class ProgressPredictionModel:
+class ProgressPredictionModel(PersistentModel):
     """进度预测模型"""
     
+    MODEL_NAME = "progress_predictor"
+    FEATURE_SCHEMA = {**PROJECT_FEATURES.to_dict(), "target": "duration_hours"}
+    
     def __init__(self):
         self.model = None
         self.is_trained = False
@@ -274,20 +383,13 @@ class ProgressPredictionModel:
             logging.warning("ML libraries not available, using rule-based prediction")
             return
             
-        features = []
-        durations = []
-        
-        for feature_dict, actual_duration in training_data:
-            feature_vector = list(feature_dict.values())
-            features.append(feature_vector)
-            durations.append(actual_duration)
-        
-        X = np.array(features)
-        y = np.array(durations)
+        ml = ml_backend.load()
+        # 训练样本可能含任务特征，只取预测时可用的项目特征列
+        X = PROJECT_FEATURES.matrix_from_dicts(feature_dict for feature_dict, _ in training_data)
+        y = ml.np.array([actual_duration for _, actual_duration in training_data])
         
         # 使用回归模型预测持续时间
-        from sklearn.ensemble import RandomForestRegressor
-        self.model = RandomForestRegressor(n_estimators=100, random_state=42)
+        self.model = ml.RandomForestRegressor(n_estimators=100, random_state=42)
         self.model.fit(X, y)
         self.is_trained = True
         
@@ -295,13 +397,17 @@ class ProgressPredictionModel:
     
     def estimate(self, task_type: TaskType, project_context: ProjectContext) -> int:
         """估算任务持续时间（小时）"""
-        if not self.is_trained or not HAS_ML_LIBS:
-            return self._rule_based_estimation(task_type, project_context)
+        return self.estimate_batch([task_type], [project_context])[0]
+    
+    def estimate_batch(self, task_types: List[TaskType], project_contexts: List[ProjectContext]) -> List[int]:
+        """批量估算任务持续时间（模型只调用一次）"""
+        if not HAS_ML_LIBS or not self._ensure_loaded():
+            return [self._rule_based_estimation(task_type, project_context)
+                    for task_type, project_context in zip(task_types, project_contexts)]
         
         # 使用ML模型预测
-        features = list(project_context.to_features().values())
-        prediction = self.model.predict([features])[0]
-        return max(1, int(prediction))  # 至少1小时
+        predictions = self.model.predict(PROJECT_FEATURES.to_matrix(project_contexts))
+        return [max(1, int(prediction)) for prediction in predictions]  # 至少1小时
     
     def _rule_based_estimation(self, task_type: TaskType, project_context: ProjectContext) -> int:
         """基于规则的时间估算（备用方案）"""
@@ -333,11 +439,20 @@ class ProgressPredictionModel:
 class AIDecisionEngine:
     """AI决策引擎主类"""
     
-    def __init__(self, aceflow_dir: Path):
+    def __init__(self, aceflow_dir: Path, model_versions: Dict[str, str] = None,
+                 decision_cache: DecisionCache = None):
         self.aceflow_dir = aceflow_dir
         self.ai_dir = aceflow_dir / "ai"
         self.models_dir = self.ai_dir / "models"
         self.data_dir = self.ai_dir / "data"
+        # 固定使用的模型版本 {模型名称: 版本}，未指定的使用启用版本
+        self.model_versions = model_versions or {}
+        self.model_store = ModelStore(self.models_dir)
+        self.decision_cache = decision_cache or DecisionCache(
+            persist_file=aceflow_dir / "cache" / "ai_decisions.json"
+        )
+        # config.yaml 的 (mtime, 大小) -> 项目流程模式
+        self._flow_mode_cache = (None, None)
         
         # 初始化模型
         self.task_classifier = TaskClassificationModel()
@@ -368,14 +483,18 @@ class AIDecisionEngine:
         self.logger = logging.getLogger(__name__)
     
     def _load_models(self):
-        """加载预训练模型"""
-        try:
-            # 尝试加载训练好的模型
-            # 这里可以从文件加载保存的模型
-            self.logger.info("Models loaded successfully")
-        except Exception as e:
-            self.logger.warning(f"Could not load pre-trained models: {e}")
-            # 使用默认的训练数据训练模型
+        """挂载已保存的模型版本（只读取清单，首次预测时才加载）"""
+        for model in (self.task_classifier, self.flow_recommender, self.progress_predictor):
+            handle = self.model_store.handle(model.MODEL_NAME, self.model_versions.get(model.MODEL_NAME))
+            if handle is not None:
+                model.attach(handle)
+                self.logger.info(f"Model {handle.name}@{handle.version} attached")
+        
+        # 在线学习的流程模型（由 online_learning 后台训练生成检查点）
+        self.flow_recommender.online_learner = OnlineLearner.load(checkpoint_path(self.aceflow_dir, "decision_flow"))
+        
+        if self.task_classifier.version is None:
+            # 尚无保存的分类模型，使用默认数据训练一次并保存
             self._initialize_with_default_data()
     
     def _initialize_with_default_data(self):
@@ -395,37 +514,64 @@ class AIDecisionEngine:
         # 训练任务分类模型
         self.task_classifier.train(task_training_data)
         
+        try:
+            version = self.task_classifier.save(
+                self.model_store, training_data_hash(task_training_data), metadata={"source": "default"}
+            )
+            if version:
+                self.logger.info(f"Model {TaskClassificationModel.MODEL_NAME}@{version} saved")
+        except Exception as e:
+            self.logger.warning(f"Could not save trained model: {e}")
+        
         self.logger.info("Models initialized with default training data")
     
+    @traced("ai_decision.make_decision")
     def make_decision(self, 
                      task_context: TaskContext, 
                      project_context: ProjectContext) -> AIDecision:
         """做出AI决策"""
         
         try:
+            with span("ai_decision.cache_lookup"):
+                key = self._decision_key(task_context, project_context)
+                cached = self.decision_cache.get(key)
+            if cached is not None:
+                decision = AIDecision(**cached)
+                self._log_decision(decision, task_context, project_context)
+                return decision
+            
             # 1. 任务分类
-            task_type = self.task_classifier.predict(task_context)
+            with span("ai_decision.classify_task"):
+                task_type = self.task_classifier.predict(task_context)
             
             # 2. 流程推荐
-            recommended_flow = self.flow_recommender.suggest(task_type, project_context)
+            with span("ai_decision.recommend_flow"):
+                recommended_flow = (self.flow_recommender.suggest_online(task_context, project_context)
+                                    or self.flow_recommender.suggest(task_type, project_context))
             
             # 3. 时间估算
-            estimated_duration = self.progress_predictor.estimate(task_type, project_context)
+            with span("ai_decision.estimate_duration"):
+                estimated_duration = self.progress_predictor.estimate(task_type, project_context)
             
             # 4. 计算置信度
-            confidence = self._calculate_confidence(task_context, project_context)
+            with span("ai_decision.confidence"):
+                confidence = self._calculate_confidence(task_context, project_context)
             
             # 5. 生成推理解释
-            reasoning = self._explain_decision(task_type, recommended_flow, project_context)
+            with span("ai_decision.explain"):
+                reasoning = self._explain_decision(task_type, recommended_flow, project_context)
             
             # 6. 提供替代方案
-            alternatives = self._suggest_alternatives(recommended_flow, task_type)
+            with span("ai_decision.alternatives"):
+                alternatives = self._suggest_alternatives(recommended_flow, task_type)
             
             # 7. 生成任务建议
-            suggested_tasks = self._generate_task_suggestions(task_type, recommended_flow)
+            with span("ai_decision.task_suggestions"):
+                suggested_tasks = self._generate_task_suggestions(task_type, recommended_flow)
             
             # 8. 风险评估
-            risk_assessment = self._assess_risks(task_context, project_context)
+            with span("ai_decision.assess_risks"):
+                risk_assessment = self._assess_risks(task_context, project_context)
             
             decision = AIDecision(
                 recommended_flow=recommended_flow,
@@ -437,6 +583,8 @@ class AIDecisionEngine:
                 risk_assessment=risk_assessment
             )
             
+            self.decision_cache.put(key, asdict(decision))
+            
             # 记录决策
             self._log_decision(decision, task_context, project_context)
             
@@ -447,6 +595,20 @@ class AIDecisionEngine:
             # 返回默认决策
             return self._get_default_decision()
     
+    def _decision_key(self, task_context: TaskContext, project_context: ProjectContext) -> str:
+        """决策缓存键：规范化的任务描述、其余上下文字段、使用的模型版本和 config.yaml 状态"""
+        task_fields = asdict(task_context)
+        task_fields["description"] = normalize_task(task_context.description)
+        try:
+            st = (self.aceflow_dir / "config.yaml").stat()
+            config_key = f"{st.st_mtime_ns}:{st.st_size}"
+        except OSError:
+            config_key = None
+        model_versions = [model.version for model in
+                          (self.task_classifier, self.flow_recommender, self.progress_predictor)]
+        model_versions.append(self.flow_recommender.online_version)
+        return cache_key(task_fields, asdict(project_context), model_versions, config_key)
+    
     def _calculate_confidence(self, task_context: TaskContext, project_context: ProjectContext) -> float:
         """计算决策置信度"""
         confidence = 0.7  # 基础置信度
@@ -620,12 +782,34 @@ class AIDecisionEngine:
             },
             'decision': decision.to_dict()
         }
+        # 结果标签：项目实际运行的流程，在线学习只从带标签的记录学习
+        actual_flow = self._project_flow_mode()
+        if actual_flow is not None:
+            log_entry['actual_flow'] = actual_flow
         
         # 保存到决策日志文件
         log_file = self.data_dir / "decision_log.jsonl"
         with open(log_file, 'a', encoding='utf-8') as f:
             f.write(json.dumps(log_entry, ensure_ascii=False) + '\n')
     
+    def _project_flow_mode(self) -> Optional[str]:
+        """项目实际运行的流程模式（config.yaml 的 flow.mode），文件未变化时复用"""
+        config_file = self.aceflow_dir / "config.yaml"
+        try:
+            st = config_file.stat()
+        except OSError:
+            return None
+        key = (st.st_mtime_ns, st.st_size)
+        if self._flow_mode_cache[0] != key:
+            try:
+                with open(config_file, 'r', encoding='utf-8') as f:
+                    config = yaml.safe_load(f) or {}
+                mode = (config.get('flow') or {}).get('mode')
+            except (OSError, yaml.YAMLError, AttributeError):
+                mode = None
+            self._flow_mode_cache = (key, mode)
+        return self._flow_mode_cache[1]
+    
     def _get_default_decision(self) -> AIDecision:
         """获取默认决策（错误情况下的备用方案）"""
         return AIDecision(
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+AceFlow v2.0 特征结构
+固定特征列顺序，把一批上下文对象一次性填入预分配的矩阵
+"""
+
+from typing import Dict, Any, Sequence, Iterable, Tuple
+
+from engines import ml_backend
+
+
+class FeatureSchema:
+    """一组有序的特征列
+
+    上下文对象通过 feature_values() 按 columns 顺序返回特征值（布尔值按 0/1 计），
+    训练数据中的特征字典按列名取值，不依赖字典的插入顺序。
+    """
+
+    def __init__(self, name: str, columns: Sequence[str]):
+        self.name = name
+        self.columns: Tuple[str, ...] = tuple(columns)
+        self.index = {column: i for i, column in enumerate(self.columns)}
+
+    def __len__(self) -> int:
+        return len(self.columns)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """写入模型清单的结构描述"""
+        return {"input": self.name, "columns": list(self.columns)}
+
+    def to_matrix(self, contexts: Iterable[Any]):
+        """一批上下文 -> float 矩阵 (样本数, 列数)，逐行填入预分配的数组"""
+        np = ml_backend.numpy()
+        contexts = list(contexts)
+        matrix = np.empty((len(contexts), len(self.columns)), dtype=np.float64)
+        for i, context in enumerate(contexts):
+            matrix[i] = context.feature_values()
+        return matrix
+
+    def matrix_from_dicts(self, rows: Iterable[Dict[str, Any]]):
+        """特征字典 -> 矩阵，按列名取值，缺失或非数值的列记为 0"""
+        np = ml_backend.numpy()
+        rows = list(rows)
+        matrix = np.zeros((len(rows), len(self.columns)), dtype=np.float64)
+        for i, row in enumerate(rows):
+            matrix[i] = [_numeric(row.get(column)) for column in self.columns]
+        return matrix
+
+
+def _numeric(value: Any) -> float:
+    return float(value) if isinstance(value, (bool, int, float)) else 0.0
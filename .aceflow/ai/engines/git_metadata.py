@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+AceFlow v2.0 Git元数据缓存
+一次 git log 流式解析最近提交，按 HEAD 缓存贡献者数量和提交频率，HEAD 前进时增量刷新
+"""
+
+import os
+import json
+import time
+import threading
+import subprocess
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from engines.profile_cache import read_git_head
+from engines.tracing import traced
+
+CACHE_VERSION = 1
+# 统计窗口（天）
+WINDOW_DAYS = 90
+# 提交格式：sha、提交时间戳、作者邮箱，以制表符分隔
+LOG_FORMAT = "%H%x09%ct%x09%ae"
+
+
+class GitMetadata:
+    """项目的Git提交统计
+
+    缓存窗口内每个提交的 (sha, 时间戳, 作者邮箱)。HEAD 未变化时不启动任何子进程，
+    只按当前时间滑动窗口；HEAD 前进时只读取上次缓存的 HEAD 之后的新提交。
+    """
+
+    def __init__(self, project_root: Path, cache_file: Path = None, window_days: int = WINDOW_DAYS,
+                 persist: bool = True):
+        self.project_root = Path(project_root)
+        self.cache_file = cache_file or (self.project_root / ".aceflow" / "cache" / "git_metadata.json")
+        # 不持久化时只在进程内缓存
+        self.persist = persist
+        self.window_days = window_days
+        self._lock = threading.Lock()
+        self._cached: Optional[Dict[str, Any]] = None
+
+    def stats(self) -> Dict[str, Any]:
+        """窗口内的提交数、贡献者数和每周提交数；非Git仓库返回 None 值的 head"""
+        commits, head = self.refresh()
+        contributors = {email for _, _, email in commits if email}
+        return {
+            "head": head,
+            "window_days": self.window_days,
+            "commit_count": len(commits),
+            "contributors": len(contributors),
+            "commits_per_week": round(len(commits) * 7 / self.window_days, 2)
+        }
+
+    def contributor_count(self) -> int:
+        return self.stats()["contributors"]
+
+    def commit_count(self) -> int:
+        return self.stats()["commit_count"]
+
+    @traced("git.refresh")
+    def refresh(self):
+        """返回 (窗口内的提交列表, HEAD)，必要时读取新提交并更新缓存"""
+        head = read_git_head(self.project_root)
+        if head is None:
+            return [], None
+
+        with self._lock:
+            cutoff = time.time() - self.window_days * 86400
+            cached = self._cached or (self._load() if self.persist else None)
+            commits = None
+
+            if cached is not None and cached["head"] == head:
+                commits = cached["commits"]
+            elif cached is not None and self._is_ancestor(cached["head"]):
+                new_commits = self._read_log(cutoff, since_sha=cached["head"])
+                if new_commits is not None:
+                    commits = new_commits + cached["commits"]
+
+            if commits is None:
+                # 无缓存、历史被改写或增量读取失败时完整读取窗口
+                commits = self._read_log(cutoff) or []
+
+            commits = [commit for commit in commits if commit[1] >= cutoff]
+            if cached is None or cached["head"] != head or len(commits) != len(cached["commits"]):
+                self._save(head, commits)
+            self._cached = {"head": head, "commits": commits}
+            return commits, head
+
+    @traced("git.read_log")
+    def _read_log(self, cutoff: float, since_sha: str = None) -> Optional[List[List[Any]]]:
+        """流式解析 git log 输出，失败时返回 None"""
+        args = ["git", "log", f"--format={LOG_FORMAT}",
+                f"--since={datetime.fromtimestamp(cutoff).isoformat(timespec='seconds')}"]
+        if since_sha:
+            args.append(f"{since_sha}..HEAD")
+
+        commits = []
+        try:
+            with subprocess.Popen(args, cwd=self.project_root, stdout=subprocess.PIPE,
+                                  stderr=subprocess.DEVNULL, text=True, errors="replace") as proc:
+                for line in proc.stdout:
+                    parts = line.rstrip("\n").split("\t")
+                    if len(parts) != 3:
+                        continue
+                    try:
+                        commits.append([parts[0], int(parts[1]), parts[2].lower()])
+                    except ValueError:
+                        continue
+            if proc.returncode != 0:
+                return None
+        except OSError:
+            return None
+        return commits
+
+    def _is_ancestor(self, sha: str) -> bool:
+        """缓存的 HEAD 是否仍是当前 HEAD 的祖先（否则历史被改写，需要完整读取）"""
+        try:
+            result = subprocess.run(["git", "merge-base", "--is-ancestor", sha, "HEAD"],
+                                    cwd=self.project_root, stdout=subprocess.DEVNULL,
+                                    stderr=subprocess.DEVNULL)
+        except OSError:
+            return False
+        return result.returncode == 0
+
+    def _load(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != CACHE_VERSION or data.get("window_days") != self.window_days:
+            return None
+        return {"head": data.get("head"), "commits": data.get("commits", [])}
+
+    def _save(self, head: str, commits: List[List[Any]]):
+        """原子写入缓存，失败时静默忽略；不是 AceFlow 项目时不创建 .aceflow 目录"""
+        if not self.persist or not (self.project_root / ".aceflow").is_dir():
+            return
+        data = {"version": CACHE_VERSION, "window_days": self.window_days, "head": head, "commits": commits}
+        tmp_file = self.cache_file.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_file, self.cache_file)
+        except OSError:
+            pass
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+AceFlow v2.0 机器学习后端延迟加载
+numpy/scikit-learn 导入耗时约1秒，只在真正训练或预测时才导入
+"""
+
+import importlib.util
+import threading
+from types import SimpleNamespace
+from typing import Optional
+
+_REQUIRED = ("numpy", "sklearn")
+
+_backend: Optional[SimpleNamespace] = None
+_available: Optional[bool] = None
+_lock = threading.Lock()
+
+
+def available() -> bool:
+    """numpy 和 scikit-learn 是否已安装（只查找模块，不导入）"""
+    global _available
+    if _available is None:
+        _available = all(importlib.util.find_spec(name) is not None for name in _REQUIRED)
+    return _available
+
+
+def load() -> SimpleNamespace:
+    """导入机器学习依赖并返回命名空间（进程内只导入一次），未安装时抛出 ImportError"""
+    global _backend
+    if _backend is None:
+        with _lock:
+            if _backend is None:
+                import numpy as np
+                from sklearn.feature_extraction.text import TfidfVectorizer, HashingVectorizer
+                from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+                from sklearn.linear_model import SGDClassifier
+                from sklearn.model_selection import train_test_split
+                from sklearn.metrics import accuracy_score
+                _backend = SimpleNamespace(
+                    np=np,
+                    TfidfVectorizer=TfidfVectorizer,
+                    HashingVectorizer=HashingVectorizer,
+                    SGDClassifier=SGDClassifier,
+                    RandomForestClassifier=RandomForestClassifier,
+                    RandomForestRegressor=RandomForestRegressor,
+                    train_test_split=train_test_split,
+                    accuracy_score=accuracy_score
+                )
+    return _backend
+
+
+def numpy():
+    """只导入 numpy（特征矩阵等不需要 scikit-learn 的场景）"""
+    if _backend is not None:
+        return _backend.np
+    import numpy as np
+    return np
+
+
+def loaded() -> bool:
+    """是否已经导入过机器学习依赖"""
+    return _backend is not None
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+AceFlow v2.0 模型存储
+按 名称/版本 保存训练好的模型组件及清单（版本、训练数据哈希、特征结构），首次预测时才加载
+"""
+
+import os
+import re
+import json
+import pickle
+import shutil
+import hashlib
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Iterable
+
+from engines.tracing import span
+
+MANIFEST_FILE = "manifest.json"
+# 记录当前启用版本的文件
+ACTIVE_FILE = "ACTIVE"
+MANIFEST_VERSION = 1
+
+
+def _joblib():
+    """joblib 随 scikit-learn 安装，可用时支持内存映射加载"""
+    try:
+        import joblib
+        return joblib
+    except ImportError:
+        return None
+
+
+def training_data_hash(records: Iterable[Any]) -> str:
+    """训练数据的稳定哈希（逐条JSON序列化，Enum 取其值）"""
+    digest = hashlib.sha256()
+    for record in records:
+        digest.update(json.dumps(record, sort_keys=True, ensure_ascii=False,
+                                 default=lambda value: getattr(value, "value", str(value))).encode('utf-8'))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+class ModelHandle:
+    """某个模型版本的句柄：清单立即可用，组件在首次 load() 时才反序列化"""
+
+    def __init__(self, version_dir: Path, manifest: Dict[str, Any]):
+        self.version_dir = version_dir
+        self.manifest = manifest
+        self._artifacts: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        return self.manifest["name"]
+
+    @property
+    def version(self) -> str:
+        return self.manifest["version"]
+
+    @property
+    def feature_schema(self) -> Dict[str, Any]:
+        return self.manifest.get("feature_schema", {})
+
+    @property
+    def loaded(self) -> bool:
+        return self._artifacts is not None
+
+    def load(self) -> Dict[str, Any]:
+        """反序列化全部组件（只执行一次）；joblib 格式的数组以只读内存映射方式加载"""
+        with self._lock:
+            if self._artifacts is None:
+                artifacts = {}
+                for key, info in self.manifest.get("artifacts", {}).items():
+                    path = self.version_dir / info["file"]
+                    with span("model.load_artifact", model=self.name, artifact=key):
+                        if info["format"] == "joblib":
+                            joblib = _joblib()
+                            if joblib is None:
+                                raise ImportError("加载模型需要安装 joblib/scikit-learn")
+                            artifacts[key] = joblib.load(path, mmap_mode="r")
+                        else:
+                            with open(path, 'rb') as f:
+                                artifacts[key] = pickle.load(f)
+                self._artifacts = artifacts
+            return self._artifacts
+
+
+class ModelStore:
+    """模型仓库：<models_dir>/<名称>/<版本>/，不同版本可并存并同时加载"""
+
+    def __init__(self, models_dir: Path):
+        self.models_dir = Path(models_dir)
+        self._handles: Dict[tuple, ModelHandle] = {}
+        self._lock = threading.Lock()
+
+    def save(self, name: str, artifacts: Dict[str, Any], training_hash: str,
+             feature_schema: Dict[str, Any] = None, version: str = None,
+             metadata: Dict[str, Any] = None, activate: bool = True) -> str:
+        """保存一个模型版本并返回版本号；先写临时目录再整体改名，避免读到半成品"""
+        version = version or f"{datetime.now():%Y%m%d%H%M%S}-{training_hash[:8]}"
+        if not re.fullmatch(r"[\w.-]+", version):
+            raise ValueError(f"无效的模型版本号: {version}")
+
+        model_dir = self.models_dir / name
+        model_dir.mkdir(parents=True, exist_ok=True)
+        tmp_dir = model_dir / f".{version}.{os.getpid()}.tmp"
+        tmp_dir.mkdir()
+
+        joblib = _joblib()
+        try:
+            entries = {}
+            for key, obj in artifacts.items():
+                if joblib is not None:
+                    # 不压缩，加载时才能内存映射
+                    file_name = f"{key}.joblib"
+                    joblib.dump(obj, tmp_dir / file_name)
+                    entries[key] = {"file": file_name, "format": "joblib"}
+                else:
+                    file_name = f"{key}.pkl"
+                    with open(tmp_dir / file_name, 'wb') as f:
+                        pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+                    entries[key] = {"file": file_name, "format": "pickle"}
+
+            manifest = {
+                "manifest_version": MANIFEST_VERSION,
+                "name": name,
+                "version": version,
+                "created_at": datetime.now().isoformat(),
+                "training_data_hash": training_hash,
+                "feature_schema": feature_schema or {},
+                "artifacts": entries,
+                "metadata": metadata or {}
+            }
+            with open(tmp_dir / MANIFEST_FILE, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+            os.replace(tmp_dir, model_dir / version)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        if activate:
+            self.activate(name, version)
+        return version
+
+    def versions(self, name: str) -> List[str]:
+        """已保存的版本（按版本号排序）"""
+        model_dir = self.models_dir / name
+        if not model_dir.is_dir():
+            return []
+        return sorted(
+            entry.name for entry in model_dir.iterdir()
+            if entry.is_dir() and not entry.name.startswith(".") and (entry / MANIFEST_FILE).exists()
+        )
+
+    def active_version(self, name: str) -> Optional[str]:
+        """当前启用的版本，未设置时取最新版本"""
+        try:
+            version = (self.models_dir / name / ACTIVE_FILE).read_text(encoding='utf-8').strip()
+            if version:
+                return version
+        except OSError:
+            pass
+        versions = self.versions(name)
+        return versions[-1] if versions else None
+
+    def activate(self, name: str, version: str):
+        """切换启用的版本"""
+        if version not in self.versions(name):
+            raise ValueError(f"模型 {name} 不存在版本 {version}")
+        active_file = self.models_dir / name / ACTIVE_FILE
+        tmp_file = active_file.with_name(f"{ACTIVE_FILE}.{os.getpid()}.tmp")
+        tmp_file.write_text(version, encoding='utf-8')
+        os.replace(tmp_file, active_file)
+
+    def handle(self, name: str, version: str = None) -> Optional[ModelHandle]:
+        """获取模型句柄（只读取清单），同一版本在进程内共享；不存在时返回 None"""
+        version = version or self.active_version(name)
+        if version is None:
+            return None
+
+        key = (name, version)
+        with self._lock:
+            if key not in self._handles:
+                version_dir = self.models_dir / name / version
+                try:
+                    with open(version_dir / MANIFEST_FILE, 'r', encoding='utf-8') as f:
+                        manifest = json.load(f)
+                except (OSError, ValueError):
+                    return None
+                self._handles[key] = ModelHandle(version_dir, manifest)
+            return self._handles[key]
+
+    def find(self, name: str, training_hash: str) -> Optional[str]:
+        """查找用指定训练数据训练的版本（最新的一个）"""
+        for version in reversed(self.versions(name)):
+            handle = self.handle(name, version)
+            if handle and handle.manifest.get("training_data_hash") == training_hash:
+                return version
+        return None
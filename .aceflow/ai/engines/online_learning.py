@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+AceFlow v2.0 在线学习
+流式读取决策日志和真实项目数据（JSONL），增量更新流程推荐模型，按检查点游标只处理新增记录
+"""
+
+import os
+import re
+import sys
+import json
+import math
+import time
+import pickle
+import argparse
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Iterator, Tuple, Callable
+
+sys.path.append(str(Path(__file__).parent.parent))
+from engines import ml_backend
+
+# 流程模式标签（增量分类器需要预先知道全部类别）
+FLOW_LABELS = ("minimal", "standard", "complete")
+DEFAULT_BATCH_SIZE = 500
+# 检查点目录（相对 .aceflow）
+CHECKPOINT_DIR = Path("ai") / "models" / "online"
+
+_WORD_RE = re.compile(r'[a-z0-9_]+')
+_CJK_RUN_RE = re.compile('[\u4e00-\u9fff]+')
+
+
+def text_tokens(text: str) -> List[str]:
+    """英文按单词、中文按字符二元组切分"""
+    text = (text or "").lower()
+    tokens = _WORD_RE.findall(text)
+    for run in _CJK_RUN_RE.findall(text):
+        tokens.extend([run] if len(run) == 1 else [run[i:i + 2] for i in range(len(run) - 1)])
+    return tokens
+
+
+def _identity(tokens):
+    """HashingVectorizer 的分析器：输入已是词元列表（模块级函数以便序列化）"""
+    return tokens
+
+
+class JsonlCursor:
+    """JSONL 文件的读取位置（字节偏移和 inode，文件被轮转或截断时从头读取）"""
+
+    def __init__(self, offset: int = 0, inode: Optional[int] = None):
+        self.offset = offset
+        self.inode = inode
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"offset": self.offset, "inode": self.inode}
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> "JsonlCursor":
+        data = data or {}
+        return cls(data.get("offset", 0), data.get("inode"))
+
+    def read(self, path: Path, limit: int = None) -> Iterator[Dict[str, Any]]:
+        """从当前位置流式读取完整的记录行，读取时前移游标；末尾不完整的行留待下次"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return
+        if st.st_ino != self.inode or st.st_size < self.offset:
+            self.offset, self.inode = 0, st.st_ino
+
+        count = 0
+        with open(path, 'rb') as f:
+            f.seek(self.offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                self.offset += len(line)
+                try:
+                    record = json.loads(line.decode('utf-8'))
+                except ValueError:
+                    continue
+                yield record
+                count += 1
+                if limit is not None and count >= limit:
+                    break
+
+
+class NaiveBayesEstimator:
+    """纯Python多项式朴素贝叶斯，支持增量训练"""
+
+    backend = "naive_bayes"
+
+    def __init__(self, classes=FLOW_LABELS, alpha: float = 1.0):
+        self.classes = tuple(classes)
+        self.alpha = alpha
+        self.class_counts = {label: 0 for label in self.classes}
+        self.token_counts: Dict[str, Dict[str, int]] = {label: {} for label in self.classes}
+        self.token_totals = {label: 0 for label in self.classes}
+        self.vocabulary = set()
+
+    def partial_fit(self, docs: List[List[str]], labels: List[str]):
+        for tokens, label in zip(docs, labels):
+            self.class_counts[label] += 1
+            counts = self.token_counts[label]
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+                self.vocabulary.add(token)
+            self.token_totals[label] += len(tokens)
+
+    def predict_proba(self, tokens: List[str]) -> Dict[str, float]:
+        total = sum(self.class_counts.values())
+        if total == 0:
+            return {label: 1 / len(self.classes) for label in self.classes}
+
+        vocab_size = len(self.vocabulary)
+        scores = {}
+        for label in self.classes:
+            denominator = self.token_totals[label] + self.alpha * vocab_size
+            counts = self.token_counts[label]
+            score = math.log((self.class_counts[label] + self.alpha) / (total + self.alpha * len(self.classes)))
+            for token in tokens:
+                if token in self.vocabulary:
+                    score += math.log((counts.get(token, 0) + self.alpha) / denominator)
+            scores[label] = score
+
+        top = max(scores.values())
+        exp_scores = {label: math.exp(score - top) for label, score in scores.items()}
+        norm = sum(exp_scores.values())
+        return {label: value / norm for label, value in exp_scores.items()}
+
+    def predict(self, tokens: List[str]) -> str:
+        proba = self.predict_proba(tokens)
+        return max(self.classes, key=proba.get)
+
+
+class SGDEstimator:
+    """scikit-learn 增量分类器：特征哈希 + SGD逻辑回归（partial_fit）"""
+
+    backend = "sgd"
+
+    def __init__(self, classes=FLOW_LABELS, n_features: int = 2 ** 18):
+        ml = ml_backend.load()
+        self.classes = tuple(classes)
+        self.vectorizer = ml.HashingVectorizer(analyzer=_identity, n_features=n_features, alternate_sign=False)
+        self.model = ml.SGDClassifier(loss="log_loss", random_state=42)
+
+    def partial_fit(self, docs: List[List[str]], labels: List[str]):
+        self.model.partial_fit(self.vectorizer.transform(docs), list(labels), classes=list(self.classes))
+
+    def predict_proba(self, tokens: List[str]) -> Dict[str, float]:
+        proba = self.model.predict_proba(self.vectorizer.transform([tokens]))[0]
+        return {label: float(value) for label, value in zip(self.model.classes_, proba)}
+
+    def predict(self, tokens: List[str]) -> str:
+        return self.model.predict(self.vectorizer.transform([tokens]))[0]
+
+
+def checkpoint_path(aceflow_dir: Path, name: str) -> Path:
+    """学习器检查点文件"""
+    return Path(aceflow_dir) / CHECKPOINT_DIR / f"{name}.pkl"
+
+
+def create_estimator(classes=FLOW_LABELS):
+    """有 scikit-learn 时使用SGD，否则使用纯Python朴素贝叶斯"""
+    if ml_backend.available():
+        return SGDEstimator(classes)
+    return NaiveBayesEstimator(classes)
+
+
+def decision_tokens(task: Dict[str, Any], project: Dict[str, Any]) -> List[str]:
+    """任务/项目上下文 -> 词元（训练和预测共用）"""
+    tokens = text_tokens(task.get("description") or "")
+    tokens += [f"priority={task.get('priority')}", f"complexity={task.get('complexity')}",
+               f"team_size={project.get('team_size')}"]
+    return tokens
+
+
+def decision_example(record: Dict[str, Any]) -> Optional[Tuple[List[str], str]]:
+    """决策日志记录 -> (词元, 实际采用的流程)
+
+    只学习带有结果标签（actual_flow，记录决策时项目 config.yaml 中实际运行的流程）的记录；
+    引擎自己的推荐不作为标签，避免模型学习自身输出。
+    """
+    label = record.get("actual_flow")
+    if label not in FLOW_LABELS:
+        return None
+    return decision_tokens(record.get("task_context") or {}, record.get("project_context") or {}), label
+
+
+def project_example(record: Dict[str, Any]) -> Optional[Tuple[List[str], str]]:
+    """真实项目数据记录 -> (项目特征词元, 项目实际使用的流程)"""
+    label = record.get("flow_mode")
+    if label not in FLOW_LABELS:
+        return None
+    tokens = [f"{key}={record.get(key)}" for key in ("team_size", "project_type", "agile_framework")
+              if record.get(key) not in (None, "unknown")]
+    return tokens, label
+
+
+class OnlineLearner:
+    """单个数据源上的增量学习器，模型状态与读取游标保存在同一个检查点文件中"""
+
+    def __init__(self, name: str, source: Path, checkpoint_file: Path,
+                 to_example: Callable[[Dict[str, Any]], Optional[Tuple[List[str], str]]]):
+        self.name = name
+        self.source = Path(source) if source is not None else None
+        self.checkpoint_file = Path(checkpoint_file)
+        self.to_example = to_example
+        self._lock = threading.Lock()
+        self.estimator = None
+        self.cursor = JsonlCursor()
+        self.records_seen = 0
+        self._load_checkpoint()
+
+    def _load_checkpoint(self):
+        try:
+            with open(self.checkpoint_file, 'rb') as f:
+                checkpoint = pickle.load(f)
+            self.estimator = checkpoint["estimator"]
+            self.cursor = JsonlCursor.from_dict(checkpoint["cursor"])
+            self.records_seen = checkpoint.get("records_seen", 0)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            # 检查点损坏或依赖变化（如 scikit-learn 被卸载）时从头学习
+            print(f"⚠️ 无法加载检查点 {self.checkpoint_file}，将从头学习: {e}")
+        if self.estimator is None:
+            self.estimator = create_estimator()
+            self.cursor = JsonlCursor()
+            self.records_seen = 0
+
+    def _save_checkpoint(self):
+        """原子写入检查点（模型和游标一起落盘，保证不会重复或遗漏记录）"""
+        self.checkpoint_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.checkpoint_file.with_name(f"{self.checkpoint_file.name}.{os.getpid()}.tmp")
+        checkpoint = {
+            "name": self.name,
+            "backend": self.estimator.backend,
+            "cursor": self.cursor.to_dict(),
+            "records_seen": self.records_seen,
+            "updated_at": datetime.now().isoformat(),
+            "estimator": self.estimator
+        }
+        with open(tmp_file, 'wb') as f:
+            pickle.dump(checkpoint, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.checkpoint_file)
+
+    @classmethod
+    def load(cls, checkpoint_file: Path) -> Optional["OnlineLearner"]:
+        """只读加载检查点用于预测；没有检查点或尚未学习任何样本时返回 None"""
+        checkpoint_file = Path(checkpoint_file)
+        if not checkpoint_file.exists():
+            return None
+        learner = cls(checkpoint_file.stem, None, checkpoint_file, None)
+        return learner if learner.records_seen else None
+
+    def update(self, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        """学习游标之后的新记录，每批保存一次检查点，返回学习的样本数"""
+        learned = 0
+        with self._lock:
+            while True:
+                docs, labels = [], []
+                start_offset = self.cursor.offset
+                for record in self.cursor.read(self.source, limit=batch_size):
+                    example = self.to_example(record)
+                    if example is not None:
+                        docs.append(example[0])
+                        labels.append(example[1])
+                if self.cursor.offset == start_offset:
+                    break
+                if docs:
+                    self.estimator.partial_fit(docs, labels)
+                    self.records_seen += len(docs)
+                    learned += len(docs)
+                self._save_checkpoint()
+        return learned
+
+    def predict(self, tokens: List[str]) -> Dict[str, Any]:
+        with self._lock:
+            proba = self.estimator.predict_proba(tokens)
+        flow = max(proba, key=proba.get)
+        return {"flow": flow, "confidence": round(proba[flow], 4), "probabilities": proba}
+
+
+class OnlineTrainer(threading.Thread):
+    """后台持续学习：定期处理所有数据源的新增记录"""
+
+    def __init__(self, aceflow_dir: Path, interval: float = 60.0, batch_size: int = DEFAULT_BATCH_SIZE):
+        super().__init__(name="aceflow-online-trainer", daemon=True)
+        data_dir = Path(aceflow_dir) / "ai" / "data"
+        self.learners = {
+            "decision_flow": OnlineLearner("decision_flow", data_dir / "decision_log.jsonl",
+                                           checkpoint_path(aceflow_dir, "decision_flow"), decision_example),
+            "project_flow": OnlineLearner("project_flow", data_dir / "real_world_data.jsonl",
+                                          checkpoint_path(aceflow_dir, "project_flow"), project_example)
+        }
+        self.interval = interval
+        self.batch_size = batch_size
+        self._stop_event = threading.Event()
+
+    def run_once(self) -> Dict[str, int]:
+        """处理一次新增记录，返回各学习器新学习的样本数"""
+        return {name: learner.update(self.batch_size) for name, learner in self.learners.items()}
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"⚠️ 在线学习出错: {e}")
+            self._stop_event.wait(self.interval)
+
+    def stop(self, timeout: float = None):
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            name: {
+                "backend": learner.estimator.backend,
+                "records_seen": learner.records_seen,
+                "cursor": learner.cursor.to_dict()
+            }
+            for name, learner in self.learners.items()
+        }
+
+
+def main():
+    """命令行入口：处理一次新增记录，或持续监听"""
+    parser = argparse.ArgumentParser(description="AceFlow 在线学习")
+    parser.add_argument("--aceflow-dir", default=str(Path.cwd() / ".aceflow"), help=".aceflow 目录")
+    parser.add_argument("--watch", type=float, metavar="SECONDS", help="持续运行，每隔指定秒数处理新增记录")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="每批学习的记录数")
+    args = parser.parse_args()
+
+    # 通过包路径引用，使检查点中序列化的类不绑定到 __main__
+    from engines.online_learning import OnlineTrainer
+    trainer = OnlineTrainer(Path(args.aceflow_dir), interval=args.watch or 60.0, batch_size=args.batch_size)
+    if not args.watch:
+        started = time.perf_counter()
+        learned = trainer.run_once()
+        print(json.dumps({"learned": learned, "status": trainer.status(),
+                          "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)},
+                         indent=2, ensure_ascii=False))
+        return
+
+    trainer.start()
+    try:
+        while trainer.is_alive():
+            trainer.join(1.0)
+    except KeyboardInterrupt:
+        trainer.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+AceFlow v2.0 项目画像缓存
+将 ProjectProfile 持久化到 .aceflow/cache/，按输入指纹逐字段失效
+"""
+
+import os
+import json
+from datetime import date
+from pathlib import Path
+from typing import Dict, Any, Optional, Set
+
+CACHE_VERSION = 1
+
+# 参与指纹计算的根目录清单文件
+MANIFEST_FILES = [
+    "package.json", "requirements.txt", "pyproject.toml", "pom.xml", "build.gradle",
+    "Cargo.toml", "go.mod", "pubspec.yaml", "composer.json", "Gemfile", "mix.exs",
+    "project.clj", "Dockerfile", "docker-compose.yml"
+]
+
+# 画像字段 -> 依赖的输入分组
+FIELD_INPUTS = {
+    "project_type": ("config", "manifests"),
+    "team_size": ("config", "git"),
+    "complexity": ("tree", "manifests"),
+    "tech_stack": ("tree", "manifests"),
+    "has_tests": ("tree",),
+    "has_ci_cd": ("tree",),
+    "has_documentation": ("tree",),
+    "git_activity": ("git",),
+    "file_count": ("tree",)
+}
+
+
+def _stat_key(path: Path) -> Optional[str]:
+    """返回文件的 mtime/size 标识，不存在时返回 None"""
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return f"{st.st_mtime_ns}:{st.st_size}"
+
+
+def _resolve_git_dir(project_root: Path) -> Optional[Path]:
+    """定位 .git 目录（兼容 worktree 的 gitdir 文件）"""
+    git_path = project_root / ".git"
+    if git_path.is_dir():
+        return git_path
+    if git_path.is_file():
+        try:
+            content = git_path.read_text(encoding='utf-8').strip()
+        except OSError:
+            return None
+        if content.startswith("gitdir:"):
+            git_dir = Path(content[len("gitdir:"):].strip())
+            return git_dir if git_dir.is_absolute() else (project_root / git_dir)
+    return None
+
+
+def read_git_head(project_root: Path) -> Optional[str]:
+    """直接读取 .git 文件获取 HEAD 提交，避免启动 git 子进程"""
+    git_dir = _resolve_git_dir(project_root)
+    if git_dir is None:
+        return None
+
+    try:
+        head = (git_dir / "HEAD").read_text(encoding='utf-8').strip()
+    except OSError:
+        return None
+
+    if not head.startswith("ref:"):
+        return head
+
+    ref = head[len("ref:"):].strip()
+    # worktree 的分支引用存放在公共目录
+    common_dir = git_dir
+    commondir_file = git_dir / "commondir"
+    if commondir_file.exists():
+        try:
+            common_dir = (git_dir / commondir_file.read_text(encoding='utf-8').strip()).resolve()
+        except OSError:
+            pass
+
+    for base in (git_dir, common_dir):
+        try:
+            return (base / ref).read_text(encoding='utf-8').strip()
+        except OSError:
+            continue
+
+    packed_refs = common_dir / "packed-refs"
+    try:
+        with open(packed_refs, 'r', encoding='utf-8') as f:
+            for line in f:
+                parts = line.strip().split(' ', 1)
+                if len(parts) == 2 and parts[1] == ref:
+                    return parts[0]
+    except OSError:
+        pass
+
+    # 尚无提交的新分支
+    return ref
+
+
+class ProfileCache:
+    """项目画像磁盘缓存"""
+
+    def __init__(self, project_root: Path, cache_file: Path = None):
+        self.project_root = Path(project_root)
+        self.aceflow_dir = self.project_root / ".aceflow"
+        self.cache_file = cache_file or (self.aceflow_dir / "cache" / "project_profile.json")
+
+    def compute_inputs(self) -> Dict[str, Any]:
+        """计算各输入分组的廉价指纹"""
+        head = read_git_head(self.project_root)
+        return {
+            "config": _stat_key(self.aceflow_dir / "config.yaml"),
+            "manifests": {name: _stat_key(self.project_root / name) for name in MANIFEST_FILES},
+            # git 统计基于最近3个月，按天滚动
+            "git": [head, date.today().isoformat()],
+            # 文件树以 HEAD 和根目录 mtime 近似
+            "tree": [head, _stat_key(self.project_root)]
+        }
+
+    def fingerprint(self) -> str:
+        """整体指纹，供其他缓存作为键使用"""
+        return json.dumps(self.compute_inputs(), sort_keys=True)
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """读取缓存内容"""
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if data.get("version") != CACHE_VERSION:
+            return None
+        return data
+
+    def stale_fields(self, cached: Optional[Dict[str, Any]], inputs: Dict[str, Any]) -> Set[str]:
+        """返回输入发生变化、需要重新计算的字段"""
+        if not cached:
+            return set(FIELD_INPUTS)
+
+        old_inputs = cached.get("inputs", {})
+        changed = {group for group, value in inputs.items() if old_inputs.get(group) != value}
+        cached_fields = cached.get("fields", {})
+
+        return {
+            name for name, groups in FIELD_INPUTS.items()
+            if name not in cached_fields or changed.intersection(groups)
+        }
+
+    def save(self, inputs: Dict[str, Any], fields: Dict[str, Any]):
+        """原子写入缓存，失败时静默忽略；不是 AceFlow 项目时不创建 .aceflow 目录"""
+        if not self.aceflow_dir.is_dir():
+            return
+        data = {
+            "version": CACHE_VERSION,
+            "inputs": inputs,
+            "fields": fields
+        }
+        # 临时文件名带进程号，CLI 与守护进程并发写入时互不覆盖
+        tmp_file = self.cache_file.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_file, self.cache_file)
+        except OSError:
+            pass
+
+    def clear(self):
+        """删除缓存文件"""
+        try:
+            self.cache_file.unlink()
+        except OSError:
+            pass
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+AceFlow v2.0 项目文件系统扫描器
+单次 os.scandir 遍历项目目录，生成供 ProjectAnalyzer 使用的快照
+"""
+
+import os
+import re
+from fnmatch import fnmatch, translate
+from pathlib import Path
+from typing import Set
+from dataclasses import dataclass, field
+
+# 遍历时直接剪枝的目录
+IGNORE_DIRS = {'.git', '.aceflow', 'node_modules', '__pycache__', '.pytest_cache', 'target', 'build', 'dist'}
+
+# 不计入文件数量的文件
+IGNORE_FILES = {'.gitignore', '.DS_Store', 'Thumbs.db'}
+
+# 根目录下的配置文件模式
+CONFIG_PATTERNS = [
+    "*.json", "*.yaml", "*.yml", "*.toml", "*.ini", "*.cfg", "*.config",
+    "*.properties", "*.env", "Dockerfile", "docker-compose*"
+]
+
+# 测试文件模式：(文件名模式, 要求父目录名)
+TEST_FILE_PATTERNS = [
+    ("test_*.py", None), ("*.py", "tests"), ("*_test.py", None),
+    ("test*.js", None), ("*.js", "tests"), ("*.test.js", None), ("*.spec.js", None),
+    ("test*.java", None), ("*.java", "tests"), ("*Test.java", None),
+    ("test*.go", None), ("*_test.go", None)
+]
+
+# 预编译为单个正则，避免逐个模式匹配
+_TEST_NAME_RE = re.compile('|'.join(translate(p) for p, parent in TEST_FILE_PATTERNS if parent is None))
+_TESTS_DIR_RE = re.compile('|'.join(translate(p) for p, parent in TEST_FILE_PATTERNS if parent == 'tests'))
+
+# 需要在任意深度识别的文件后缀
+RECURSIVE_SUFFIXES = ('.csproj',)
+
+
+@dataclass
+class ProjectSnapshot:
+    """项目文件系统快照"""
+    root: Path
+    file_count: int = 0
+    max_depth: int = 0
+    test_file_count: int = 0
+    config_file_count: int = 0
+    root_entries: Set[str] = field(default_factory=set)
+    recursive_suffixes: Set[str] = field(default_factory=set)
+
+    def has_path(self, relative_path: str) -> bool:
+        """检查相对路径是否存在，根目录条目直接从快照读取"""
+        if '/' not in relative_path:
+            return relative_path in self.root_entries
+        return (self.root / relative_path).exists()
+
+    def has_suffix(self, suffix: str) -> bool:
+        """检查项目中是否存在指定后缀的文件"""
+        return suffix in self.recursive_suffixes
+
+    @property
+    def has_tests(self) -> bool:
+        return self.test_file_count > 0
+
+
+class ProjectScanner:
+    """项目扫描器"""
+
+    def __init__(self, project_root: Path, ignore_dirs: Set[str] = None):
+        self.project_root = Path(project_root)
+        self.ignore_dirs = IGNORE_DIRS if ignore_dirs is None else ignore_dirs
+
+    def scan(self) -> ProjectSnapshot:
+        """单次遍历项目目录，收集所有分析所需的指标"""
+        snapshot = ProjectSnapshot(root=self.project_root)
+
+        # 根目录条目（包括被剪枝的目录，供存在性检查使用）
+        try:
+            with os.scandir(self.project_root) as entries:
+                for entry in entries:
+                    snapshot.root_entries.add(entry.name)
+                    if self._is_file(entry) and self._is_config_file(entry.name):
+                        snapshot.config_file_count += 1
+        except OSError:
+            return snapshot
+
+        # 迭代式深度优先遍历，栈中保存 (目录路径, 深度, 目录名)
+        stack = [(str(self.project_root), 0, '')]
+        while stack:
+            dir_path, depth, dir_name = stack.pop()
+            try:
+                entries = os.scandir(dir_path)
+            except OSError:
+                continue
+
+            with entries:
+                for entry in entries:
+                    name = entry.name
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                    except OSError:
+                        continue
+
+                    if is_dir:
+                        if name in self.ignore_dirs:
+                            continue
+                        child_depth = depth + 1
+                        if child_depth > snapshot.max_depth:
+                            snapshot.max_depth = child_depth
+                        stack.append((entry.path, child_depth, name))
+                        continue
+
+                    if not self._is_file(entry):
+                        continue
+
+                    if name not in IGNORE_FILES:
+                        snapshot.file_count += 1
+                    if self._is_test_file(name, dir_name):
+                        snapshot.test_file_count += 1
+                    for suffix in RECURSIVE_SUFFIXES:
+                        if name.endswith(suffix):
+                            snapshot.recursive_suffixes.add(suffix)
+
+        return snapshot
+
+    @staticmethod
+    def _is_file(entry: os.DirEntry) -> bool:
+        try:
+            return entry.is_file()
+        except OSError:
+            return False
+
+    @staticmethod
+    def _is_config_file(name: str) -> bool:
+        return any(fnmatch(name, pattern) for pattern in CONFIG_PATTERNS)
+
+    @staticmethod
+    def _is_test_file(name: str, parent_name: str) -> bool:
+        if _TEST_NAME_RE.match(name):
+            return True
+        return parent_name == 'tests' and _TESTS_DIR_RE.match(name) is not None
+
+
+def scan_project(project_root: Path) -> ProjectSnapshot:
+    """扫描项目目录并返回快照"""
+    return ProjectScanner(project_root).scan()
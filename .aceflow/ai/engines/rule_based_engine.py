@@ -4,15 +4,35 @@ AceFlow v2.0 基于规则的轻量级决策引擎
 专为Agent工具集成设计，无需外部LLM
 """
 
+import sys
 import json
 import yaml
 import re
+import time
+import logging
+import threading
 from datetime import datetime
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Iterable, Iterator
+from itertools import islice
 from pathlib import Path
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, replace
 from enum import Enum
 
+sys.path.append(str(Path(__file__).parent.parent))
+from engines.project_scanner import ProjectScanner, ProjectSnapshot
+from engines.profile_cache import ProfileCache
+from engines.git_metadata import GitMetadata
+from engines.compiled_matcher import CompiledPatternMatcher
+from engines.decision_cache import DecisionCache, normalize_task, cache_key
+from engines.rule_compiler import compile_flow_rules
+from engines.tracing import span, traced
+
+RULES_FILE_NAME = "decision_rules.yaml"
+# 框架自带的规则，项目未提供 .aceflow/config/decision_rules.yaml 时使用
+DEFAULT_RULES_FILE = Path(__file__).resolve().parent.parent.parent / "config" / RULES_FILE_NAME
+# 检查规则文件是否修改的最小间隔（秒）
+RULES_RELOAD_INTERVAL = 1.0
+
 # 任务类型枚举
 class TaskType(Enum):
     FEATURE_DEVELOPMENT = "feature_development"
@@ -145,6 +165,11 @@ class PatternMatcher:
                 r'(依赖|库|框架)'
             ]
         }
+        self.compile()
+    
+    def compile(self):
+        """将所有模式编译为单个匹配器（修改 patterns 后需重新调用）"""
+        self.matcher = CompiledPatternMatcher(self.patterns)
     
     def classify_task(self, task_description: str) -> TaskType:
         """基于模式匹配分类任务"""
@@ -152,14 +177,9 @@ class PatternMatcher:
             return TaskType.FEATURE_DEVELOPMENT
         
         task_lower = task_description.lower()
-        scores = {}
         
-        for task_type, patterns in self.patterns.items():
-            score = 0
-            for pattern in patterns:
-                if re.search(pattern, task_lower):
-                    score += 1
-            scores[task_type] = score
+        # 单次扫描统计每种任务类型命中的模式数量
+        scores = self.matcher.scores(task_lower)
         
         # 返回得分最高的任务类型
         if scores:
@@ -168,64 +188,128 @@ class PatternMatcher:
                 return best_type
         
         return TaskType.FEATURE_DEVELOPMENT
+    
+    def classify_tasks(self, task_descriptions: List[str]) -> List[TaskType]:
+        """批量分类任务，相同描述只计算一次"""
+        classified: Dict[str, TaskType] = {}
+        results = []
+        for description in task_descriptions:
+            key = (description or "").lower()
+            task_type = classified.get(key)
+            if task_type is None:
+                task_type = self.classify_task(description)
+                classified[key] = task_type
+            results.append(task_type)
+        return results
 
 class ProjectAnalyzer:
     """项目分析器"""
     
-    def __init__(self, project_root: Path = None):
+    def __init__(self, project_root: Path = None, use_cache: bool = True):
         self.project_root = project_root or Path.cwd()
         self.aceflow_dir = self.project_root / ".aceflow"
+        self.cache = ProfileCache(self.project_root) if use_cache else None
+        self.git = GitMetadata(self.project_root, persist=use_cache)
+        self._snapshot: Optional[ProjectSnapshot] = None
+        self._config: Optional[Dict[str, Any]] = None
+        # 快照和配置是单次分析的临时状态，守护进程中并发请求需串行分析
+        self._lock = threading.Lock()
+    
+    @property
+    def snapshot(self) -> ProjectSnapshot:
+        """文件系统快照，首次访问时扫描一次"""
+        if self._snapshot is None:
+            with span("project.scan"):
+                self._snapshot = ProjectScanner(self.project_root).scan()
+        return self._snapshot
     
     def analyze_project(self) -> ProjectProfile:
         """分析项目特征"""
-        profile = ProjectProfile()
-        
-        # 分析项目类型
-        profile.project_type = self._detect_project_type()
-        
-        # 分析团队规模
-        profile.team_size = self._estimate_team_size()
-        
-        # 分析复杂度
-        profile.complexity = self._assess_complexity()
+        with self._lock:
+            return self._analyze_project()
+    
+    def _analyze_project(self) -> ProjectProfile:
+        # 每次分析重新扫描一次文件系统，所有检测方法共享该快照
+        self._snapshot = None
+        self._config = None
+        
+        # 读取缓存，只重新计算输入发生变化的字段
+        fields = {}
+        stale_fields = None
+        if self.cache is not None:
+            with span("project.profile_cache.load"):
+                inputs = self.cache.compute_inputs()
+                cached = self.cache.load()
+                stale_fields = self.cache.stale_fields(cached, inputs)
+            if cached:
+                fields.update(cached.get("fields", {}))
+        
+        field_analyzers = [
+            # 分析项目类型
+            ("project_type", self._detect_project_type),
+            # 分析团队规模
+            ("team_size", self._estimate_team_size),
+            # 分析复杂度
+            ("complexity", lambda: self._assess_complexity().value),
+            # 分析技术栈
+            ("tech_stack", self._detect_tech_stack),
+            # 分析项目特征
+            ("has_tests", self._has_tests),
+            ("has_ci_cd", self._has_ci_cd),
+            ("has_documentation", self._has_documentation),
+            ("git_activity", self._assess_git_activity),
+            ("file_count", self._count_files)
+        ]
         
-        # 分析技术栈
-        profile.tech_stack = self._detect_tech_stack()
+        for field_name, analyzer in field_analyzers:
+            if stale_fields is None or field_name in stale_fields:
+                with span(f"project.{field_name}"):
+                    fields[field_name] = analyzer()
         
-        # 分析项目特征
-        profile.has_tests = self._has_tests()
-        profile.has_ci_cd = self._has_ci_cd()
-        profile.has_documentation = self._has_documentation()
-        profile.git_activity = self._assess_git_activity()
-        profile.file_count = self._count_files()
+        if self.cache is not None and stale_fields:
+            with span("project.profile_cache.save"):
+                self.cache.save(inputs, fields)
         
+        profile = ProjectProfile(**fields)
+        profile.complexity = ProjectComplexity(profile.complexity)
+        profile.tech_stack = list(profile.tech_stack)
         return profile
     
+    def _load_config(self) -> Dict[str, Any]:
+        """加载项目配置（每次分析只解析一次）"""
+        if self._config is None:
+            self._config = {}
+            config_file = self.aceflow_dir / "config.yaml"
+            if config_file.exists():
+                try:
+                    with span("project.load_config"), open(config_file, 'r', encoding='utf-8') as f:
+                        loaded = yaml.safe_load(f)
+                    if isinstance(loaded, dict):
+                        self._config = loaded
+                except:
+                    pass
+        return self._config
+    
     def _detect_project_type(self) -> str:
         """检测项目类型"""
         # 检查配置文件
-        config_file = self.aceflow_dir / "config.yaml"
-        if config_file.exists():
-            try:
-                with open(config_file, 'r', encoding='utf-8') as f:
-                    config = yaml.safe_load(f)
-                    if 'project' in config and 'project_type' in config['project']:
-                        return config['project']['project_type']
-            except:
-                pass
+        config = self._load_config()
+        if isinstance(config.get('project'), dict) and 'project_type' in config['project']:
+            return config['project']['project_type']
         
         # 基于文件检测
-        if (self.project_root / "package.json").exists():
+        snapshot = self.snapshot
+        if snapshot.has_path("package.json"):
             return "web"
-        elif (self.project_root / "requirements.txt").exists() or (self.project_root / "pyproject.toml").exists():
+        elif snapshot.has_path("requirements.txt") or snapshot.has_path("pyproject.toml"):
             return "python"
-        elif (self.project_root / "pom.xml").exists():
+        elif snapshot.has_path("pom.xml"):
             return "java"
-        elif (self.project_root / "Cargo.toml").exists():
+        elif snapshot.has_path("Cargo.toml"):
             return "rust"
-        elif (self.project_root / "go.mod").exists():
+        elif snapshot.has_path("go.mod"):
             return "go"
-        elif (self.project_root / "pubspec.yaml").exists():
+        elif snapshot.has_path("pubspec.yaml"):
             return "flutter"
         else:
             return "unknown"
@@ -233,38 +317,19 @@ class ProjectAnalyzer:
     def _estimate_team_size(self) -> int:
         """估算团队规模"""
         # 从配置文件读取
-        config_file = self.aceflow_dir / "config.yaml"
-        if config_file.exists():
-            try:
-                with open(config_file, 'r', encoding='utf-8') as f:
-                    config = yaml.safe_load(f)
-                    if 'project' in config and 'team_size' in config['project']:
-                        team_size_str = config['project']['team_size']
-                        if isinstance(team_size_str, int):
-                            return team_size_str
-                        elif isinstance(team_size_str, str):
-                            # 解析 "1-5人" 格式
-                            import re
-                            match = re.search(r'(\d+)', team_size_str)
-                            if match:
-                                return int(match.group(1))
-            except:
-                pass
-        
-        # 基于Git提交者数量估算
-        try:
-            import subprocess
-            result = subprocess.run(
-                ["git", "log", "--pretty=format:%ae", "--since=3 months ago"],
-                capture_output=True, text=True, cwd=self.project_root
-            )
-            if result.returncode == 0:
-                contributors = set(result.stdout.strip().split('\n'))
-                return max(1, len(contributors))
-        except:
-            pass
-        
-        return 1
+        config = self._load_config()
+        if isinstance(config.get('project'), dict) and 'team_size' in config['project']:
+            team_size_str = config['project']['team_size']
+            if isinstance(team_size_str, int):
+                return team_size_str
+            elif isinstance(team_size_str, str):
+                # 解析 "1-5人" 格式
+                match = re.search(r'(\d+)', team_size_str)
+                if match:
+                    return int(match.group(1))
+        
+        # 基于最近3个月的Git提交者数量估算
+        return max(1, self.git.contributor_count())
     
     def _assess_complexity(self) -> ProjectComplexity:
         """评估项目复杂度"""
@@ -343,58 +408,30 @@ class ProjectAnalyzer:
             "ansible": ["Ansible"]
         }
         
+        snapshot = self.snapshot
         for file_pattern, technologies in tech_indicators.items():
             if '*' in file_pattern:
-                # 通配符匹配
-                pattern = file_pattern.replace('*', '**/*')
-                if list(self.project_root.glob(pattern)):
+                # 通配符匹配（扫描时已按后缀收集）
+                if snapshot.has_suffix(file_pattern.lstrip('*')):
                     tech_stack.extend(technologies)
             else:
                 # 精确匹配
-                if (self.project_root / file_pattern).exists():
+                if snapshot.has_path(file_pattern):
                     tech_stack.extend(technologies)
         
         return list(set(tech_stack))
     
     def _count_files(self) -> int:
         """统计文件数量（排除隐藏文件和常见忽略目录）"""
-        ignore_dirs = {'.git', '.aceflow', 'node_modules', '__pycache__', '.pytest_cache', 'target', 'build', 'dist'}
-        ignore_files = {'.gitignore', '.DS_Store', 'Thumbs.db'}
-        
-        count = 0
-        for file_path in self.project_root.rglob('*'):
-            if file_path.is_file():
-                # 检查是否在忽略目录中
-                if any(ignore_dir in file_path.parts for ignore_dir in ignore_dirs):
-                    continue
-                # 检查是否是忽略文件
-                if file_path.name in ignore_files:
-                    continue
-                count += 1
-        
-        return count
+        return self.snapshot.file_count
     
     def _get_max_directory_depth(self) -> int:
         """获取目录最大深度"""
-        max_depth = 0
-        for path in self.project_root.rglob('*'):
-            if path.is_dir():
-                depth = len(path.relative_to(self.project_root).parts)
-                max_depth = max(max_depth, depth)
-        return max_depth
+        return self.snapshot.max_depth
     
     def _count_config_files(self) -> int:
         """统计配置文件数量"""
-        config_patterns = [
-            "*.json", "*.yaml", "*.yml", "*.toml", "*.ini", "*.cfg", "*.config",
-            "*.properties", "*.env", "Dockerfile", "docker-compose*"
-        ]
-        
-        count = 0
-        for pattern in config_patterns:
-            count += len(list(self.project_root.glob(pattern)))
-        
-        return count
+        return self.snapshot.config_file_count
     
     def _count_dependencies(self) -> int:
         """统计依赖数量"""
@@ -402,7 +439,7 @@ class ProjectAnalyzer:
         
         # package.json
         package_json = self.project_root / "package.json"
-        if package_json.exists():
+        if self.snapshot.has_path("package.json"):
             try:
                 with open(package_json, 'r') as f:
                     data = json.load(f)
@@ -413,7 +450,7 @@ class ProjectAnalyzer:
         
         # requirements.txt
         requirements = self.project_root / "requirements.txt"
-        if requirements.exists():
+        if self.snapshot.has_path("requirements.txt"):
             try:
                 with open(requirements, 'r') as f:
                     lines = f.readlines()
@@ -423,7 +460,7 @@ class ProjectAnalyzer:
         
         # pyproject.toml
         pyproject = self.project_root / "pyproject.toml"
-        if pyproject.exists():
+        if self.snapshot.has_path("pyproject.toml"):
             try:
                 import toml
                 with open(pyproject, 'r') as f:
@@ -437,18 +474,7 @@ class ProjectAnalyzer:
     
     def _has_tests(self) -> bool:
         """检查是否有测试文件"""
-        test_patterns = [
-            "**/test_*.py", "**/tests/*.py", "**/*_test.py",
-            "**/test*.js", "**/tests/*.js", "**/*.test.js", "**/*.spec.js",
-            "**/test*.java", "**/tests/*.java", "**/*Test.java",
-            "**/test*.go", "**/*_test.go"
-        ]
-        
-        for pattern in test_patterns:
-            if list(self.project_root.glob(pattern)):
-                return True
-        
-        return False
+        return self.snapshot.has_tests
     
     def _has_ci_cd(self) -> bool:
         """检查是否有CI/CD配置"""
@@ -463,7 +489,7 @@ class ProjectAnalyzer:
         ]
         
         for file_path in ci_cd_files:
-            if (self.project_root / file_path).exists():
+            if self.snapshot.has_path(file_path):
                 return True
         
         return False
@@ -478,92 +504,135 @@ class ProjectAnalyzer:
         ]
         
         for file_path in doc_files:
-            if (self.project_root / file_path).exists():
+            if self.snapshot.has_path(file_path):
                 return True
         
         return False
     
     def _assess_git_activity(self) -> str:
         """评估Git活动水平"""
-        try:
-            import subprocess
-            from datetime import datetime, timedelta
-            
-            # 最近3个月的提交数
-            three_months_ago = (datetime.now() - timedelta(days=90)).strftime('%Y-%m-%d')
-            result = subprocess.run(
-                ["git", "log", "--oneline", f"--since={three_months_ago}"],
-                capture_output=True, text=True, cwd=self.project_root
-            )
-            
-            if result.returncode == 0:
-                commit_count = len(result.stdout.strip().split('\n'))
-                if commit_count > 100:
-                    return "high"
-                elif commit_count > 20:
-                    return "medium"
-                else:
-                    return "low"
-        except:
-            pass
-        
-        return "low"
+        # 最近3个月的提交数
+        commit_count = self.git.commit_count()
+        if commit_count > 100:
+            return "high"
+        elif commit_count > 20:
+            return "medium"
+        else:
+            return "low"
 
 class RuleEngine:
-    """规则引擎"""
+    """规则引擎
     
-    def __init__(self):
-        self.rules = self._load_rules()
-    
-    def _load_rules(self) -> Dict[str, Any]:
-        """加载决策规则"""
-        return {
-            "flow_rules": {
-                "minimal": {
-                    "conditions": [
-                        {"field": "task_type", "operator": "in", "value": ["BUG_FIX", "MAINTENANCE", "DOCUMENTATION"]},
-                        {"field": "team_size", "operator": "<=", "value": 3},
-                        {"field": "complexity", "operator": "==", "value": "SIMPLE"},
-                        {"field": "urgency", "operator": "==", "value": "high"}
-                    ],
-                    "weight": 1.0
-                },
-                "standard": {
-                    "conditions": [
-                        {"field": "task_type", "operator": "in", "value": ["FEATURE_DEVELOPMENT", "TESTING", "REFACTORING"]},
-                        {"field": "team_size", "operator": "between", "value": [3, 8]},
-                        {"field": "complexity", "operator": "in", "value": ["MODERATE", "COMPLEX"]},
-                        {"field": "has_tests", "operator": "==", "value": True}
-                    ],
-                    "weight": 1.0
-                },
-                "complete": {
-                    "conditions": [
-                        {"field": "task_type", "operator": "in", "value": ["ARCHITECTURE", "RESEARCH", "DEPLOYMENT"]},
-                        {"field": "team_size", "operator": ">", "value": 8},
-                        {"field": "complexity", "operator": "==", "value": "ENTERPRISE"},
-                        {"field": "has_ci_cd", "operator": "==", "value": True}
-                    ],
-                    "weight": 1.0
-                }
-            },
-            "estimation_rules": {
-                "BUG_FIX": {"base_hours": 4, "complexity_factor": 1.2},
-                "FEATURE_DEVELOPMENT": {"base_hours": 16, "complexity_factor": 1.5},
-                "REFACTORING": {"base_hours": 8, "complexity_factor": 1.3},
-                "TESTING": {"base_hours": 6, "complexity_factor": 1.1},
-                "DOCUMENTATION": {"base_hours": 4, "complexity_factor": 1.0},
-                "RESEARCH": {"base_hours": 12, "complexity_factor": 1.4},
-                "ARCHITECTURE": {"base_hours": 24, "complexity_factor": 1.6},
-                "DEPLOYMENT": {"base_hours": 8, "complexity_factor": 1.2},
-                "MAINTENANCE": {"base_hours": 6, "complexity_factor": 1.1}
-            }
-        }
+    规则从 YAML 加载并编译为决策表；项目的 .aceflow/config/decision_rules.yaml 按流程名
+    和任务类型覆盖框架自带的规则。规则文件修改后在下一次评估时自动重新编译。
+    """
+    
+    def __init__(self, rules_file: Path = None):
+        # 项目规则文件可能在启动后才创建，重新加载时每次都检查
+        self.project_rules_file = Path(rules_file) if rules_file is not None else None
+        self._lock = threading.Lock()
+        self._next_check = 0.0
+        
+        rules_file = self._candidate_file()
+        self._checked = self._stat_key(rules_file)
+        try:
+            loaded = self._load_rules(rules_file)
+        except (OSError, ValueError, yaml.YAMLError) as e:
+            if rules_file == DEFAULT_RULES_FILE:
+                raise
+            logging.error(f"决策规则 {rules_file} 无效，使用默认规则: {e}")
+            rules_file = DEFAULT_RULES_FILE
+            loaded = self._load_rules(rules_file)
+        self._install(rules_file, *loaded)
+    
+    @property
+    def fingerprint(self) -> str:
+        self.reload_if_changed()
+        return self._fingerprint
+    
+    def _candidate_file(self) -> Path:
+        """应使用的规则文件：项目规则存在时优先"""
+        if self.project_rules_file is not None and self.project_rules_file.exists():
+            return self.project_rules_file
+        return DEFAULT_RULES_FILE
+    
+    @staticmethod
+    def _stat_key(rules_file: Path) -> Optional[Tuple[str, int, int]]:
+        try:
+            st = rules_file.stat()
+        except OSError:
+            return None
+        return (str(rules_file), st.st_mtime_ns, st.st_size)
+    
+    @staticmethod
+    def _read_rules(rules_file: Path) -> Dict[str, Any]:
+        """读取规则文件并检查结构，格式错误时抛出 ValueError"""
+        with open(rules_file, 'r', encoding='utf-8') as f:
+            rules = yaml.safe_load(f)
+        if rules is None:
+            rules = {}
+        if not isinstance(rules, dict):
+            raise ValueError(f"规则文件顶层必须是映射，实际为 {type(rules).__name__}")
+        for section in ("flow_rules", "estimation_rules"):
+            value = rules.setdefault(section, {}) or {}
+            if not isinstance(value, dict):
+                raise ValueError(f"{section} 必须是映射，实际为 {type(value).__name__}")
+            rules[section] = value
+        for flow_name, flow_rule in rules["flow_rules"].items():
+            if not isinstance(flow_rule, dict):
+                raise ValueError(f"流程 {flow_name} 的规则必须是映射")
+        return rules
+    
+    def _load_rules(self, rules_file: Path):
+        """加载并编译决策规则，返回 (规则, 编译结果)
+
+        项目规则在默认规则之上按流程名和任务类型覆盖，只写一个流程不会丢掉其他流程。
+        """
+        rules = self._read_rules(rules_file)
+        if rules_file != DEFAULT_RULES_FILE:
+            merged = self._read_rules(DEFAULT_RULES_FILE)
+            for section in ("flow_rules", "estimation_rules"):
+                merged[section].update(rules.pop(section))
+            merged.update(rules)
+            rules = merged
+        if not rules["flow_rules"]:
+            raise ValueError("flow_rules 为空，至少需要一个流程")
+        return rules, compile_flow_rules(rules["flow_rules"])
+    
+    def _install(self, rules_file: Path, rules: Dict[str, Any], compiled):
+        self.rules_file = rules_file
+        self.rules, self._compiled = rules, compiled
+        # 规则内容指纹，规则变化时决策缓存随之失效
+        self._fingerprint = cache_key(rules)
+    
+    def reload_if_changed(self) -> bool:
+        """规则文件变化（或项目规则文件出现、被删除）时重新加载；新规则无效时保留当前规则"""
+        now = time.monotonic()
+        if now < self._next_check:
+            return False
+        self._next_check = now + RULES_RELOAD_INTERVAL
+        rules_file = self._candidate_file()
+        key = self._stat_key(rules_file)
+        if key is None or key == self._checked:
+            return False
+        
+        with self._lock:
+            if key == self._checked:
+                return False
+            # 无论成功与否都记录，同一份无效文件只警告一次
+            self._checked = key
+            try:
+                loaded = self._load_rules(rules_file)
+            except (OSError, ValueError, yaml.YAMLError) as e:
+                logging.warning(f"重新加载决策规则 {rules_file} 失败，继续使用当前规则: {e}")
+                return False
+            self._install(rules_file, *loaded)
+            return True
     
     def evaluate_flow_rules(self, task_type: TaskType, project_profile: ProjectProfile, 
                            urgency: str = "medium") -> Dict[str, float]:
         """评估流程规则，返回各流程的匹配分数"""
-        scores = {}
+        self.reload_if_changed()
         
         # 构建评估上下文
         context = {
@@ -572,70 +641,23 @@ class RuleEngine:
             "complexity": project_profile.complexity.value.upper(),
             "has_tests": project_profile.has_tests,
             "has_ci_cd": project_profile.has_ci_cd,
+            "has_documentation": project_profile.has_documentation,
+            "project_type": project_profile.project_type,
+            "git_activity": project_profile.git_activity,
+            "file_count": project_profile.file_count,
             "urgency": urgency
         }
         
-        # 评估每个流程
-        for flow_name, flow_rule in self.rules["flow_rules"].items():
-            score = self._evaluate_conditions(flow_rule["conditions"], context)
-            scores[flow_name] = score * flow_rule["weight"]
-        
-        return scores
-    
-    def _evaluate_conditions(self, conditions: List[Dict], context: Dict) -> float:
-        """评估条件集合，返回匹配分数"""
-        if not conditions:
-            return 0.0
-        
-        matched_count = 0
-        total_count = len(conditions)
-        
-        for condition in conditions:
-            if self._evaluate_single_condition(condition, context):
-                matched_count += 1
-        
-        return matched_count / total_count
-    
-    def _evaluate_single_condition(self, condition: Dict, context: Dict) -> bool:
-        """评估单个条件"""
-        field = condition["field"]
-        operator = condition["operator"]
-        value = condition["value"]
-        
-        if field not in context:
-            return False
-        
-        context_value = context[field]
-        
-        if operator == "==":
-            return context_value == value
-        elif operator == "!=":
-            return context_value != value
-        elif operator == "<":
-            return context_value < value
-        elif operator == "<=":
-            return context_value <= value
-        elif operator == ">":
-            return context_value > value
-        elif operator == ">=":
-            return context_value >= value
-        elif operator == "in":
-            return context_value in value
-        elif operator == "not_in":
-            return context_value not in value
-        elif operator == "between":
-            return value[0] <= context_value <= value[1]
-        else:
-            return False
+        return self._compiled.evaluate(context)
     
     def estimate_duration(self, task_type: TaskType, project_profile: ProjectProfile) -> int:
         """估算任务持续时间"""
         task_key = task_type.value.upper()
         
-        if task_key not in self.rules["estimation_rules"]:
+        rule = self.rules["estimation_rules"].get(task_key)
+        if rule is None:
             return 8  # 默认8小时
         
-        rule = self.rules["estimation_rules"][task_key]
         base_hours = rule["base_hours"]
         complexity_factor = rule["complexity_factor"]
         
@@ -660,54 +682,116 @@ class RuleEngine:
 class RuleBasedDecisionEngine:
     """基于规则的决策引擎"""
     
-    def __init__(self, project_root: Path = None):
+    def __init__(self, project_root: Path = None, decision_cache: DecisionCache = None):
         self.project_root = project_root or Path.cwd()
         self.pattern_matcher = PatternMatcher()
         self.project_analyzer = ProjectAnalyzer(self.project_root)
-        self.rule_engine = RuleEngine()
+        self.rule_engine = RuleEngine(self.project_root / ".aceflow" / "config" / RULES_FILE_NAME)
+        # 画像输入指纹（config.yaml、清单文件、HEAD），只读取文件元数据
+        self.profile_inputs = self.project_analyzer.cache or ProfileCache(self.project_root)
+        if decision_cache is None:
+            aceflow_dir = self.project_root / ".aceflow"
+            decision_cache = DecisionCache(
+                persist_file=aceflow_dir / "cache" / "decisions.json" if aceflow_dir.is_dir() else None
+            )
+        self.decision_cache = decision_cache
     
+    @traced("decision.make_decision")
     def make_decision(self, task_input: str, context: Dict[str, Any] = None) -> DecisionResult:
-        """做出决策"""
+        """做出决策，相同任务（规范化后）、上下文和项目画像直接返回缓存结果"""
         if context is None:
             context = {}
         
+        with span("decision.cache_lookup"):
+            key = cache_key(normalize_task(task_input), context,
+                            self.profile_inputs.fingerprint(), self.rule_engine.fingerprint)
+            cached = self.decision_cache.get(key)
+        if cached is not None:
+            cached["metadata"]["timestamp"] = datetime.now().isoformat()
+            return DecisionResult(**cached)
+        
+        result = self._make_decision(task_input, context)
+        self.decision_cache.put(key, result.to_dict())
+        return result
+    
+    def _make_decision(self, task_input: str, context: Dict[str, Any]) -> DecisionResult:
         # 1. 任务分类
-        task_type = self.pattern_matcher.classify_task(task_input)
+        with span("decision.classify_task"):
+            task_type = self.pattern_matcher.classify_task(task_input)
         
         # 2. 项目分析
-        project_profile = self.project_analyzer.analyze_project()
+        with span("decision.analyze_project"):
+            project_profile = self.project_analyzer.analyze_project()
         
         # 3. 应用上下文覆盖
+        with span("decision.context_overrides"):
+            self._apply_context_overrides(project_profile, context)
+        
+        return self._decide(task_type, project_profile, context.get("urgency", "medium"))
+    
+    def make_decisions(self, tasks: Iterable[str], context: Dict[str, Any] = None,
+                       chunk_size: int = 1000) -> Iterator[DecisionResult]:
+        """批量决策：项目只分析一次，按块分类任务并逐条产出结果"""
+        if context is None:
+            context = {}
+        
+        project_profile = self.project_analyzer.analyze_project()
         self._apply_context_overrides(project_profile, context)
+        urgency = context.get("urgency", "medium")
         
+        # 流程推荐只取决于任务类型和项目画像，同一类型只计算一次
+        decisions_by_type: Dict[TaskType, DecisionResult] = {}
+        
+        task_iter = iter(tasks)
+        while True:
+            chunk = list(islice(task_iter, chunk_size))
+            if not chunk:
+                break
+            
+            for task_type in self.pattern_matcher.classify_tasks(chunk):
+                decision = decisions_by_type.get(task_type)
+                if decision is None:
+                    decision = self._decide(task_type, project_profile, urgency)
+                    decisions_by_type[task_type] = decision
+                    yield decision
+                else:
+                    yield replace(decision, metadata={**decision.metadata, "timestamp": datetime.now().isoformat()})
+    
+    def _decide(self, task_type: TaskType, project_profile: ProjectProfile, urgency: str) -> DecisionResult:
+        """基于任务类型和项目画像生成决策"""
         # 4. 流程推荐
-        flow_scores = self.rule_engine.evaluate_flow_rules(
-            task_type, project_profile, context.get("urgency", "medium")
-        )
+        with span("decision.evaluate_flow_rules"):
+            flow_scores = self.rule_engine.evaluate_flow_rules(task_type, project_profile, urgency)
         
         # 5. 选择最佳流程
-        recommended_flow = max(flow_scores, key=flow_scores.get)
-        confidence = flow_scores[recommended_flow]
+        with span("decision.select_flow"):
+            recommended_flow = max(flow_scores, key=flow_scores.get)
+            confidence = flow_scores[recommended_flow]
         
         # 6. 生成步骤
-        steps = self._generate_steps(recommended_flow)
+        with span("decision.generate_steps"):
+            steps = self._generate_steps(recommended_flow)
         
         # 7. 估算时间
-        estimated_hours = self.rule_engine.estimate_duration(task_type, project_profile)
+        with span("decision.estimate_duration"):
+            estimated_hours = self.rule_engine.estimate_duration(task_type, project_profile)
         
         # 8. 生成推理解释
-        reasoning = self._generate_reasoning(task_type, project_profile, recommended_flow, confidence)
+        with span("decision.generate_reasoning"):
+            reasoning = self._generate_reasoning(task_type, project_profile, recommended_flow, confidence)
         
         # 9. 提供替代方案
-        alternatives = self._generate_alternatives(flow_scores, recommended_flow)
+        with span("decision.generate_alternatives"):
+            alternatives = self._generate_alternatives(flow_scores, recommended_flow)
         
         # 10. 元数据
-        metadata = {
-            "task_type": task_type.value,
-            "project_profile": asdict(project_profile),
-            "flow_scores": flow_scores,
-            "timestamp": datetime.now().isoformat()
-        }
+        with span("decision.metadata"):
+            metadata = {
+                "task_type": task_type.value,
+                "project_profile": asdict(project_profile),
+                "flow_scores": flow_scores,
+                "timestamp": datetime.now().isoformat()
+            }
         
         return DecisionResult(
             recommended_flow=recommended_flow,
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+AceFlow v2.0 规则编译器
+把声明式的流程规则（YAML/字典）编译成闭包和决策表：相同条件只求值一次，求值时不再解析运算符
+"""
+
+import json
+from typing import Dict, Any, List, Callable, Tuple
+
+Predicate = Callable[[Any], bool]
+
+
+def _ordered(compare: Callable[[Any, Any], bool]) -> Callable[[Any], Predicate]:
+    """比较运算符：类型不可比较时视为不满足"""
+    def factory(value):
+        def predicate(actual):
+            try:
+                return compare(actual, value)
+            except TypeError:
+                return False
+        return predicate
+    return factory
+
+
+def _membership(value) -> Predicate:
+    try:
+        members = frozenset(value)
+    except TypeError:
+        # 含不可哈希元素时退回线性查找
+        members = list(value)
+    return lambda actual: actual in members
+
+
+def _between(value) -> Predicate:
+    low, high = value
+    return _ordered(lambda actual, bounds: bounds[0] <= actual <= bounds[1])((low, high))
+
+
+# 运算符 -> 谓词工厂（接收条件中的 value，返回判断上下文取值的函数）
+OPERATORS: Dict[str, Callable[[Any], Predicate]] = {
+    "==": lambda value: lambda actual: actual == value,
+    "!=": lambda value: lambda actual: actual != value,
+    "<": _ordered(lambda actual, value: actual < value),
+    "<=": _ordered(lambda actual, value: actual <= value),
+    ">": _ordered(lambda actual, value: actual > value),
+    ">=": _ordered(lambda actual, value: actual >= value),
+    "in": _membership,
+    "not_in": lambda value: (lambda member: lambda actual: not member(actual))(_membership(value)),
+    "between": _between,
+}
+
+
+class CompiledRuleSet:
+    """编译后的流程规则
+
+    conditions 为去重后的 (字段, 谓词) 列表；flows 为决策表，每行是
+    (流程名, 条件下标元组, 权重)。一次评估中每个去重条件只求值一次。
+    """
+
+    def __init__(self, conditions: List[Tuple[str, Predicate]],
+                 flows: List[Tuple[str, Tuple[int, ...], float]]):
+        self.conditions = conditions
+        self.flows = flows
+
+    def evaluate(self, context: Dict[str, Any]) -> Dict[str, float]:
+        """返回各流程的得分：满足的条件比例 × 权重"""
+        missing = object()
+        results = []
+        for field, predicate in self.conditions:
+            actual = context.get(field, missing)
+            results.append(actual is not missing and predicate(actual))
+
+        scores = {}
+        for flow_name, indexes, weight in self.flows:
+            if indexes:
+                scores[flow_name] = sum(results[i] for i in indexes) / len(indexes) * weight
+            else:
+                scores[flow_name] = 0.0
+        return scores
+
+
+def compile_flow_rules(flow_rules: Dict[str, Any]) -> CompiledRuleSet:
+    """编译 flow_rules 段；未知运算符或格式错误时抛出 ValueError"""
+    conditions: List[Tuple[str, Predicate]] = []
+    index: Dict[str, int] = {}
+    flows = []
+
+    for flow_name, flow_rule in flow_rules.items():
+        indexes = []
+        for condition in flow_rule.get("conditions") or []:
+            try:
+                field, operator, value = condition["field"], condition["operator"], condition["value"]
+            except (KeyError, TypeError):
+                raise ValueError(f"流程 {flow_name} 的条件缺少 field/operator/value: {condition}")
+            if operator not in OPERATORS:
+                raise ValueError(f"流程 {flow_name} 使用了未知运算符: {operator}")
+
+            key = json.dumps([field, operator, value], sort_keys=True, default=str)
+            if key not in index:
+                try:
+                    predicate = OPERATORS[operator](value)
+                except (TypeError, ValueError):
+                    raise ValueError(f"流程 {flow_name} 的条件取值无效: {condition}")
+                index[key] = len(conditions)
+                conditions.append((field, predicate))
+            indexes.append(index[key])
+        flows.append((flow_name, tuple(indexes), float(flow_rule.get("weight", 1.0))))
+
+    return CompiledRuleSet(conditions, flows)
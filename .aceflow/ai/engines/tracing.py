@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+AceFlow v2.0 性能追踪
+引擎各步骤的计时区间（span）：累计每个区间的次数、耗时和对数分桶直方图，可导出 Chrome trace。
+未启用时 span() 返回共享的空上下文，开销只有一次标志判断。
+"""
+
+import os
+import json
+import time
+import threading
+import functools
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+# 设置环境变量 ACEFLOW_PROFILE=1 时导入即启用（供嵌入方和子进程使用）
+PROFILE_ENV = "ACEFLOW_PROFILE"
+# 保留的 trace 事件上限，超出后只更新统计
+MAX_EVENTS = 200000
+# 直方图分桶数：第 i 个桶为耗时 <= 2^i 微秒
+BUCKETS = 32
+
+_enabled = os.environ.get(PROFILE_ENV, "") not in ("", "0")
+_local = threading.local()
+
+
+class SpanStats:
+    """单个区间名称的累计统计"""
+
+    __slots__ = ("count", "total_ns", "self_ns", "min_ns", "max_ns", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ns = 0
+        self.self_ns = 0
+        self.min_ns = None
+        self.max_ns = 0
+        self.buckets = [0] * BUCKETS
+
+    def add(self, duration_ns: int, self_ns: int):
+        self.count += 1
+        self.total_ns += duration_ns
+        self.self_ns += self_ns
+        self.min_ns = duration_ns if self.min_ns is None else min(self.min_ns, duration_ns)
+        self.max_ns = max(self.max_ns, duration_ns)
+        self.buckets[min((duration_ns // 1000).bit_length(), BUCKETS - 1)] += 1
+
+    def percentile(self, fraction: float) -> float:
+        """由分桶估算分位数（取桶上界，毫秒）"""
+        target = fraction * self.count
+        seen = 0
+        for i, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= target:
+                return min(2 ** i / 1000, self.max_ns / 1e6)
+        return self.max_ns / 1e6
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "total_ms": round(self.total_ns / 1e6, 3),
+            "self_ms": round(self.self_ns / 1e6, 3),
+            "mean_ms": round(self.total_ns / self.count / 1e6, 4) if self.count else 0.0,
+            "min_ms": round((self.min_ns or 0) / 1e6, 4),
+            "max_ms": round(self.max_ns / 1e6, 4),
+            "p50_ms": round(self.percentile(0.5), 4),
+            "p95_ms": round(self.percentile(0.95), 4),
+            # 键为桶上界（微秒），只列出非空的桶
+            "histogram_us": {str(2 ** i): count for i, count in enumerate(self.buckets) if count}
+        }
+
+
+class Recorder:
+    """收集区间统计和 trace 事件（线程安全）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.keep_events = True
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.stats: Dict[str, SpanStats] = {}
+            self.events: List[tuple] = []
+            self.dropped_events = 0
+            self.origin_ns = time.perf_counter_ns()
+
+    def record(self, name: str, start_ns: int, duration_ns: int, self_ns: int, attrs: Optional[Dict]):
+        with self._lock:
+            stats = self.stats.get(name)
+            if stats is None:
+                stats = self.stats[name] = SpanStats()
+            stats.add(duration_ns, self_ns)
+            if self.keep_events:
+                if len(self.events) < MAX_EVENTS:
+                    self.events.append((name, start_ns, duration_ns, threading.get_ident(), attrs))
+                else:
+                    self.dropped_events += 1
+
+
+_recorder = Recorder()
+
+
+class _Span:
+    __slots__ = ("name", "attrs", "start_ns", "child_ns")
+
+    def __init__(self, name: str, attrs: Optional[Dict[str, Any]]):
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        stack.append(self)
+        self.child_ns = 0
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration_ns = time.perf_counter_ns() - self.start_ns
+        stack = _local.stack
+        stack.pop()
+        if stack:
+            stack[-1].child_ns += duration_ns
+        _recorder.record(self.name, self.start_ns, duration_ns, duration_ns - self.child_ns, self.attrs)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def enable(trace_events: bool = True):
+    """开始记录；trace_events=False 时只累计统计（常驻进程使用，内存不随调用增长）"""
+    global _enabled
+    _recorder.keep_events = trace_events
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def span(name: str, **attrs):
+    """计时区间：with span("decision.classify_task"): ..."""
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name, attrs or None)
+
+
+def traced(name: str = None):
+    """函数计时装饰器，区间名默认为函数的限定名"""
+    def decorate(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Span(span_name, None):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def reset():
+    """清空已记录的统计和事件"""
+    _recorder.reset()
+
+
+def histograms() -> Dict[str, Dict[str, Any]]:
+    """各区间的累计统计和耗时直方图"""
+    with _recorder._lock:
+        return {name: stats.to_dict() for name, stats in sorted(_recorder.stats.items())}
+
+
+def chrome_trace() -> Dict[str, Any]:
+    """Chrome trace 格式（chrome://tracing、Perfetto 可直接打开）"""
+    pid = os.getpid()
+    with _recorder._lock:
+        origin = _recorder.origin_ns
+        events = [
+            {
+                "name": name,
+                "cat": name.split(".", 1)[0],
+                "ph": "X",
+                "ts": (start_ns - origin) / 1000,
+                "dur": duration_ns / 1000,
+                "pid": pid,
+                "tid": tid,
+                **({"args": attrs} if attrs else {})
+            }
+            for name, start_ns, duration_ns, tid, attrs in _recorder.events
+        ]
+        dropped = _recorder.dropped_events
+    return {"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"dropped_events": dropped}}
+
+
+def write_chrome_trace(path: Path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(chrome_trace(), f, ensure_ascii=False, default=str)
+
+
+def format_breakdown() -> str:
+    """按总耗时排序的文本报表（self 为扣除子区间后的耗时）"""
+    rows = histograms()
+    if not rows:
+        return "（没有记录到任何区间）"
+    width = max(len(name) for name in rows)
+    lines = [f"{'span':<{width}}  {'calls':>7}  {'total ms':>10}  {'self ms':>10}  {'mean ms':>9}  {'p95 ms':>9}"]
+    for name, row in sorted(rows.items(), key=lambda item: -item[1]["total_ms"]):
+        lines.append(f"{name:<{width}}  {row['count']:>7}  {row['total_ms']:>10.3f}  {row['self_ms']:>10.3f}  "
+                     f"{row['mean_ms']:>9.3f}  {row['p95_ms']:>9.3f}")
+    return "\n".join(lines)
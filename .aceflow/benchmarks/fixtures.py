@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+AceFlow v2.0 基准测试数据生成
+生成合成项目目录、记忆池和多阶段项目，按 (类型, 规模, 种子) 缓存在 fixtures 目录中重复使用
+"""
+
+import os
+import sys
+import json
+import shutil
+import random
+from pathlib import Path
+
+ACEFLOW_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ACEFLOW_DIR / "scripts"))
+
+# 生成完成后写入的标记文件，中断的生成会在下次运行时重新开始
+READY_MARKER = ".fixture_ready"
+
+SOURCE_EXTENSIONS = [".py", ".js", ".ts", ".tsx", ".go", ".java", ".md", ".json", ".yaml", ".css"]
+TOP_LEVEL_DIRS = ["src", "lib", "app", "tests", "docs", "scripts", "packages", "services"]
+MANIFESTS = {
+    "package.json": json.dumps({"dependencies": {f"dep{i}": "^1.0.0" for i in range(40)}}),
+    "requirements.txt": "\n".join(f"package{i}==1.0.{i}" for i in range(30)),
+    "Dockerfile": "FROM python:3.11\n",
+    "README.md": "# synthetic project\n",
+}
+
+MEMORY_TYPES = ["REQ", "CON", "TASK", "CODE", "TEST", "DEFECT", "FDBK"]
+MEMORY_WORDS = [
+    "login", "payment", "dashboard", "api", "cache", "database", "session", "token", "report",
+    "export", "search", "notification", "upload", "permission", "audit", "billing", "profile",
+    "登录", "支付", "报表", "权限", "缓存", "接口", "性能", "部署", "测试", "缺陷"
+]
+
+
+def _fixture(base: Path, name: str, build) -> Path:
+    """返回已生成的 fixture 目录，不存在或未完成时调用 build(目录) 生成"""
+    path = Path(base) / name
+    if (path / READY_MARKER).exists():
+        return path
+    if path.exists():
+        shutil.rmtree(path)
+    path.mkdir(parents=True)
+    build(path)
+    (path / READY_MARKER).write_text("ok", encoding="utf-8")
+    return path
+
+
+def make_repo(base: Path, files: int, seed: int = 0) -> Path:
+    """合成代码仓库：files 个文件分布在多级目录中，包含常见清单文件、测试和CI配置"""
+    def build(root: Path):
+        rng = random.Random(seed)
+        (root / ".aceflow").mkdir()
+        for name, content in MANIFESTS.items():
+            (root / name).write_text(content, encoding="utf-8")
+        (root / ".github" / "workflows").mkdir(parents=True)
+        (root / ".github" / "workflows" / "ci.yml").write_text("on: push\n", encoding="utf-8")
+
+        # 每个目录约50个文件，目录深度 2~6
+        directories = []
+        for i in range(max(1, files // 50)):
+            depth = rng.randint(1, 5)
+            parts = [rng.choice(TOP_LEVEL_DIRS)] + [f"m{rng.randint(0, 30)}" for _ in range(depth)]
+            directories.append(root.joinpath(*parts))
+        for directory in set(directories):
+            directory.mkdir(parents=True, exist_ok=True)
+
+        for i in range(files - len(MANIFESTS)):
+            directory = directories[i % len(directories)]
+            extension = rng.choice(SOURCE_EXTENSIONS)
+            (directory / f"file_{i}{extension}").write_bytes(b"x\n")
+
+    return _fixture(base, f"repo-{files}-{seed}", build)
+
+
+def make_memory_pool(base: Path, count: int, seed: int = 0) -> Path:
+    """合成记忆池：count 条记忆，通过 GlobalMemoryPool 写入（包含全文索引）
+
+    记忆池存储路径相对当前目录（./.aceflow/memory_pool），返回的目录需作为工作目录使用。
+    """
+    def build(root: Path):
+        from core.memory_pool import GlobalMemoryPool
+
+        rng = random.Random(seed)
+        cwd = os.getcwd()
+        os.chdir(root)
+        try:
+            pool = GlobalMemoryPool()
+            for i in range(count):
+                words = " ".join(rng.choice(MEMORY_WORDS) for _ in range(rng.randint(4, 12)))
+                pool.store_memory(rng.choice(MEMORY_TYPES), f"{words} #{i}", {"seq": i})
+            pool.backend.close()
+        finally:
+            os.chdir(cwd)
+
+    return _fixture(base, f"memory-{count}-{seed}", build)
+
+
+def make_state_project(base: Path, mode: str = "complete") -> Path:
+    """带 config.yaml 和 flow_modes.yaml 的多阶段项目（不缓存状态，每次基准前重新生成）"""
+    root = Path(base) / f"state-{mode}"
+    if root.exists():
+        shutil.rmtree(root)
+    config_dir = root / ".aceflow" / "config"
+    config_dir.mkdir(parents=True)
+    shutil.copy(ACEFLOW_DIR / "config" / "flow_modes.yaml", config_dir / "flow_modes.yaml")
+    (root / ".aceflow" / "config.yaml").write_text(f"flow:\n  mode: {mode}\n", encoding="utf-8")
+    return root
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+AceFlow v2.0 性能基准测试
+覆盖决策、项目分析、记忆检索、状态更新和CLI冷启动的热点路径，输出可在版本间比较的JSON结果
+
+用法:
+    python .aceflow/benchmarks/run_benchmarks.py                      # 全部基准（含 100k 规模）
+    python .aceflow/benchmarks/run_benchmarks.py --quick              # 只跑小规模
+    python .aceflow/benchmarks/run_benchmarks.py -k memory -o new.json
+    python .aceflow/benchmarks/run_benchmarks.py --compare old.json   # 与基线比较，退化超过阈值时返回非零
+"""
+
+import os
+import sys
+import json
+import time
+import timeit
+import logging
+import platform
+import argparse
+import tempfile
+import statistics
+import subprocess
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Callable, Optional
+
+ACEFLOW_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ACEFLOW_DIR / "ai"))
+sys.path.append(str(ACEFLOW_DIR / "scripts"))
+sys.path.append(str(Path(__file__).resolve().parent))
+
+import fixtures
+
+RESULT_VERSION = 1
+# 默认退化阈值：中位数变慢超过20%视为退化
+DEFAULT_THRESHOLD = 0.2
+DEFAULT_FIXTURES_DIR = Path(tempfile.gettempdir()) / "aceflow-bench-fixtures"
+
+SAMPLE_TASKS = [
+    "修复用户登录页面的显示错误", "为移动应用添加推送通知功能", "重构支付模块的代码结构",
+    "编写API接口的单元测试", "更新项目的技术文档", "调研新的前端框架", "设计微服务架构",
+    "部署应用到生产环境", "fix crash when uploading large files", "add export to csv for reports"
+]
+
+
+class Benchmark:
+    """一个基准：setup(fixtures_dir, **params) 准备数据并返回被计时的无参函数"""
+
+    def __init__(self, name: str, setup: Callable, params: Dict[str, Any] = None,
+                 full_only: bool = False, repeat: int = 7, number: int = None):
+        self.name = name
+        self.setup = setup
+        self.params = params or {}
+        self.full_only = full_only
+        self.repeat = repeat
+        self.number = number
+
+    @property
+    def id(self) -> str:
+        suffix = ",".join(f"{key}={value}" for key, value in self.params.items())
+        return f"{self.name}[{suffix}]" if suffix else self.name
+
+    def run(self, fixtures_dir: Path) -> Dict[str, Any]:
+        timer = timeit.Timer(self.setup(fixtures_dir, **self.params))
+        # 自动确定每轮调用次数，使单轮至少约0.2秒
+        number = self.number or timer.autorange()[0]
+        per_call = [total / number * 1000 for total in timer.repeat(repeat=self.repeat, number=number)]
+        return {
+            "name": self.name,
+            "params": self.params,
+            "number": number,
+            "repeat": self.repeat,
+            "min_ms": round(min(per_call), 4),
+            "median_ms": round(statistics.median(per_call), 4),
+            "mean_ms": round(statistics.mean(per_call), 4),
+            "stdev_ms": round(statistics.stdev(per_call), 4) if len(per_call) > 1 else 0.0
+        }
+
+
+# ---- 基准定义 ----
+
+def bench_classify_task(fixtures_dir: Path):
+    from engines.rule_based_engine import PatternMatcher
+    matcher = PatternMatcher()
+    tasks = SAMPLE_TASKS
+    state = {"i": 0}
+
+    def run():
+        state["i"] += 1
+        matcher.classify_task(tasks[state["i"] % len(tasks)])
+    return run
+
+
+def bench_analyze_project(fixtures_dir: Path, files: int, cached: bool):
+    from engines.rule_based_engine import ProjectAnalyzer
+    root = fixtures.make_repo(fixtures_dir, files)
+    analyzer = ProjectAnalyzer(root, use_cache=cached)
+    if cached:
+        analyzer.analyze_project()
+    return analyzer.analyze_project
+
+
+def bench_retrieve_memory(fixtures_dir: Path, memories: int, query: str):
+    from core.memory_pool import GlobalMemoryPool
+    root = fixtures.make_memory_pool(fixtures_dir, memories)
+    cwd = os.getcwd()
+    os.chdir(root)
+    pool = GlobalMemoryPool()
+    os.chdir(cwd)
+    if query == "id":
+        memory_id = next(pool.backend.iter_memories())["id"]
+        return lambda: pool.retrieve_memory(memory_id=memory_id)
+    return lambda: pool.retrieve_memory(keywords=query.split())
+
+
+def bench_complete_stage(fixtures_dir: Path):
+    from core.multi_mode_state_engine import MultiModeStateEngine
+    root = fixtures.make_state_project(fixtures_dir)
+    engine = MultiModeStateEngine(root)
+    stage_id = engine.flow_model().first_stage
+    return lambda: engine.complete_stage(stage_id)
+
+
+def bench_cli_cold_start(fixtures_dir: Path, command: str):
+    scripts = {
+        "agent_describe": [str(ACEFLOW_DIR / "ai" / "cli" / "agent_cli.py"), "--no-daemon", "describe"],
+        "aceflow_help": [str(ACEFLOW_DIR / "scripts" / "cli" / "aceflow_cli_v2.py"), "--help"],
+    }
+    root = fixtures.make_state_project(fixtures_dir)
+    argv = [sys.executable] + scripts[command]
+    return lambda: subprocess.run(argv, cwd=root, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+BENCHMARKS: List[Benchmark] = [
+    Benchmark("pattern_matcher.classify_task", bench_classify_task),
+    Benchmark("project_analyzer.analyze_project", bench_analyze_project, {"files": 1000, "cached": False}),
+    Benchmark("project_analyzer.analyze_project", bench_analyze_project, {"files": 1000, "cached": True}),
+    Benchmark("project_analyzer.analyze_project", bench_analyze_project, {"files": 100000, "cached": False},
+              full_only=True, repeat=3, number=1),
+    Benchmark("project_analyzer.analyze_project", bench_analyze_project, {"files": 100000, "cached": True},
+              full_only=True, repeat=3, number=1),
+    Benchmark("memory_pool.retrieve_memory", bench_retrieve_memory, {"memories": 1000, "query": "id"}),
+    Benchmark("memory_pool.retrieve_memory", bench_retrieve_memory, {"memories": 1000, "query": "login cache"}),
+    Benchmark("memory_pool.retrieve_memory", bench_retrieve_memory, {"memories": 100000, "query": "id"},
+              full_only=True),
+    Benchmark("memory_pool.retrieve_memory", bench_retrieve_memory,
+              {"memories": 100000, "query": "login cache"}, full_only=True, repeat=3),
+    Benchmark("state_engine.complete_stage", bench_complete_stage),
+    Benchmark("cli.cold_start", bench_cli_cold_start, {"command": "agent_describe"}, repeat=5, number=1),
+    Benchmark("cli.cold_start", bench_cli_cold_start, {"command": "aceflow_help"}, repeat=5, number=1),
+]
+
+
+# ---- 运行与比较 ----
+
+def _git_head() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ACEFLOW_DIR, capture_output=True,
+                              text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run_benchmarks(selected: List[Benchmark], fixtures_dir: Path) -> Dict[str, Any]:
+    results = {}
+    for benchmark in selected:
+        print(f"⏱  {benchmark.id} ...", end=" ", flush=True, file=sys.stderr)
+        started = time.perf_counter()
+        try:
+            results[benchmark.id] = benchmark.run(fixtures_dir)
+            print(f"{results[benchmark.id]['median_ms']:.3f} ms "
+                  f"({time.perf_counter() - started:.1f}s)", file=sys.stderr)
+        except Exception as e:
+            results[benchmark.id] = {"name": benchmark.name, "params": benchmark.params, "error": str(e)}
+            print(f"失败: {e}", file=sys.stderr)
+    return {
+        "version": RESULT_VERSION,
+        "generated_at": datetime.now().isoformat(),
+        "git_head": _git_head(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results
+    }
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """按中位数比较两次结果，返回每个共同基准的变化"""
+    changes = []
+    for bench_id, result in current["results"].items():
+        old = baseline.get("results", {}).get(bench_id)
+        if not old or "median_ms" not in old or "median_ms" not in result or not old["median_ms"]:
+            continue
+        ratio = result["median_ms"] / old["median_ms"] - 1
+        changes.append({
+            "id": bench_id,
+            "baseline_ms": old["median_ms"],
+            "current_ms": result["median_ms"],
+            "change": round(ratio, 4),
+            "regression": ratio > threshold
+        })
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AceFlow 性能基准测试")
+    parser.add_argument("-k", "--filter", help="只运行名称包含该字符串的基准")
+    parser.add_argument("--quick", action="store_true", help="跳过 100k 规模的基准")
+    parser.add_argument("-o", "--output", help="结果JSON文件（默认输出到标准输出）")
+    parser.add_argument("--compare", metavar="BASELINE", help="与基线结果比较")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="退化阈值（比例）")
+    parser.add_argument("--fixtures-dir", type=Path, default=DEFAULT_FIXTURES_DIR, help="合成数据缓存目录")
+    parser.add_argument("--list", action="store_true", help="列出基准")
+    args = parser.parse_args()
+
+    selected = [
+        benchmark for benchmark in BENCHMARKS
+        if (not args.filter or args.filter in benchmark.id) and not (args.quick and benchmark.full_only)
+    ]
+    if args.list:
+        for benchmark in selected:
+            print(benchmark.id)
+        return
+
+    # 状态引擎的日志（如交付物未完成警告）会干扰计时输出
+    logging.disable(logging.WARNING)
+    args.fixtures_dir.mkdir(parents=True, exist_ok=True)
+    report = run_benchmarks(selected, args.fixtures_dir)
+
+    exit_code = 1 if any("error" in result for result in report["results"].values()) else 0
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            changes = compare(json.load(f), report, args.threshold)
+        report["comparison"] = {"baseline": args.compare, "threshold": args.threshold, "changes": changes}
+        for change in changes:
+            marker = "❌" if change["regression"] else "✅"
+            print(f"{marker} {change['id']}: {change['baseline_ms']:.3f} -> {change['current_ms']:.3f} ms "
+                  f"({change['change']:+.1%})", file=sys.stderr)
+        if any(change["regression"] for change in changes):
+            exit_code = 1
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding="utf-8")
+    else:
+        print(output)
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
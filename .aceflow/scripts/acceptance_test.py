@@ -10,9 +10,15 @@ import json
 import yaml
 import subprocess
 import time
+import argparse
 from pathlib import Path
 from datetime import datetime
 
+# 导入决策引擎的时间预算（毫秒），可通过环境变量调整
+IMPORT_BUDGET_MS = float(os.environ.get("ACEFLOW_IMPORT_BUDGET_MS", "300"))
+# 导入决策引擎时不应加载的重量级依赖
+HEAVY_MODULES = ("numpy", "sklearn")
+
 class AceFlowAcceptanceTest:
     def __init__(self):
         self.project_root = Path.cwd()
@@ -486,6 +492,80 @@ class AceFlowAcceptanceTest:
                 f"测试错误: {e}"
             )
     
+    def test_import_budget(self):
+        """测试决策引擎的导入耗时（在新进程中测量，取多次中的最小值）"""
+        print("\n⏱️  测试导入耗时...")
+        
+        probe = (
+            "import sys, time, json; sys.path.insert(0, '.aceflow/ai'); "
+            "t = time.perf_counter(); import engines.decision_engine; "
+            "elapsed = (time.perf_counter() - t) * 1000; "
+            f"print(json.dumps({{'ms': elapsed, 'heavy': [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))"
+        )
+        timings = []
+        heavy = []
+        for _ in range(3):
+            success, stdout, stderr = self.run_command(f'"{sys.executable}" -c "{probe}"')
+            if not success:
+                return self.log_test("决策引擎可导入", False, stderr.strip().splitlines()[-1] if stderr.strip() else "")
+            result = json.loads(stdout.strip().splitlines()[-1])
+            timings.append(result["ms"])
+            heavy = result["heavy"]
+        
+        self.log_test(
+            "导入决策引擎不加载numpy/sklearn",
+            not heavy,
+            f"已加载: {', '.join(heavy)}" if heavy else ""
+        )
+        best = min(timings)
+        return self.log_test(
+            "决策引擎导入耗时",
+            best <= IMPORT_BUDGET_MS and not heavy,
+            f"{best:.1f}ms (预算 {IMPORT_BUDGET_MS:.0f}ms)"
+        )
+    
+    def test_online_learning(self):
+        """测试在线学习：带结果标签的决策记录训练后改变流程推荐（在临时目录的新进程中运行）"""
+        print("\n📚 测试在线学习...")
+        
+        probe = "\n".join([
+            "import sys, json, shutil, logging, tempfile",
+            "from pathlib import Path",
+            "sys.path.insert(0, '.aceflow/ai')",
+            "from engines.decision_engine import AIDecisionEngine, TaskContext, ProjectContext",
+            "from engines.decision_cache import DecisionCache",
+            "from engines.online_learning import OnlineTrainer",
+            "logging.disable(logging.CRITICAL)",
+            "root = Path(tempfile.mkdtemp())",
+            "aceflow_dir = root / '.aceflow'",
+            "aceflow_dir.mkdir()",
+            # 项目实际运行 complete 流程，规则推荐则为 minimal
+            "(aceflow_dir / 'config.yaml').write_text('flow:\\n  mode: complete\\n', encoding='utf-8')",
+            "task = TaskContext('修复登录页面的拼写错误', 'low', '1h', [], 'low', 'low')",
+            "project = ProjectContext('demo', 1, '1周', ['python'], 'web', 'implementation', 0.5, 1.0, [])",
+            "engine = AIDecisionEngine(aceflow_dir, decision_cache=DecisionCache())",
+            "before = [engine.make_decision(task, project).recommended_flow for _ in range(3)][0]",
+            "learned = OnlineTrainer(aceflow_dir).run_once()",
+            "after = AIDecisionEngine(aceflow_dir, decision_cache=DecisionCache()).make_decision(task, project)",
+            "shutil.rmtree(root, ignore_errors=True)",
+            "print(json.dumps({'before': before, 'after': after.recommended_flow, 'learned': learned['decision_flow']}))"
+        ])
+        result = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, cwd=self.project_root)
+        if result.returncode != 0:
+            return self.log_test("在线学习", False, result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "")
+        outcome = json.loads(result.stdout.strip().splitlines()[-1])
+        
+        self.log_test(
+            "决策日志记录结果标签",
+            outcome["learned"] > 0,
+            f"学习样本 {outcome['learned']} 条"
+        )
+        return self.log_test(
+            "带标签的记录改变流程推荐",
+            outcome["before"] != "complete" and outcome["after"] == "complete",
+            f"{outcome['before']} -> {outcome['after']}"
+        )
+    
     def run_all_tests(self):
         """运行所有测试"""
         print("🧪 开始AceFlow v2.0第1阶段验收测试")
@@ -506,6 +586,8 @@ class AceFlowAcceptanceTest:
         self.test_wizard_functionality()
         self.test_documentation_quality()
         self.test_integration_complete()
+        self.test_import_budget()
+        self.test_online_learning()
         
         end_time = time.time()
         duration = end_time - start_time
@@ -574,6 +656,15 @@ class AceFlowAcceptanceTest:
 
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description="AceFlow v2.0 验收测试")
+    parser.add_argument("--import-budget", action="store_true",
+                        help="只检查决策引擎导入耗时，超出预算时以非0状态退出（供CI使用）")
+    args = parser.parse_args()
+    
+    if args.import_budget:
+        tester = AceFlowAcceptanceTest()
+        sys.exit(0 if tester.test_import_budget() else 1)
+    
     print("🚀 AceFlow v2.0 第1阶段验收测试")
     print("测试AI驱动的敏捷开发工作流框架核心功能")
     print()
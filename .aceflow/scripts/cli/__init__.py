@@ -39,6 +39,13 @@ def main():
     workflow_parser.add_argument('task_description', help='任务描述')
     workflow_parser.set_defaults(func=determine_workflow)
     
+    # 记忆管理命令
+    memory_parser = subparsers.add_parser('memory', help='记忆池管理')
+    memory_subparsers = memory_parser.add_subparsers(dest='memory_command')
+    gc_parser = memory_subparsers.add_parser('gc', help='清除过期记忆并压缩阶段关联')
+    gc_parser.add_argument('--dry-run', action='store_true', help='只统计过期记忆，不删除')
+    gc_parser.set_defaults(func=memory_gc)
+    
     args = parser.parse_args()
     if hasattr(args, 'func'):
         args.func(args)
@@ -85,6 +92,15 @@ def resolve_abnormality(args):
     else:
         print(f"未找到异常 {args.abnormality_id} 或已解决")
 
+def memory_gc(args):
+    """清除过期记忆"""
+    memory_pool = GlobalMemoryPool()
+    result = memory_pool.purge_expired(dry_run=args.dry_run)
+    if args.dry_run:
+        print(f"过期记忆: {result['expired']} 条（未删除）")
+    else:
+        print(f"已清除 {result['purged']} 条过期记忆，移除 {result['links_removed']} 条失效阶段关联")
+
 def determine_workflow(args):
     """确定流程分支"""
     navigator = WorkflowNavigator()
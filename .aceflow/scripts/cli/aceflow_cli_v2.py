@@ -18,6 +18,8 @@ import webbrowser
 # 导入核心模块
 sys.path.append(str(Path(__file__).parent.parent))
 from core.multi_mode_state_engine import MultiModeStateEngine, FlowMode, StageStatus
+from core.memory_pool import GlobalMemoryPool
+from core import tracing
 from init_wizard import AceFlowInitWizard
 
 class AceFlowCLI:
@@ -175,9 +177,8 @@ class AceFlowCLI:
         if success:
             print(f"✅ 已完成阶段: {stage_id}")
             
-            # 显示下一阶段
-            next_stage = self.engine.state.get('current_stage')
-            if next_stage and next_stage != stage_id:
+            # 显示可以开始的阶段（并行阶段可能有多个）
+            for next_stage in self.engine.get_ready_stages():
                 next_stage_info = self.engine._get_stage_info_by_id(next_stage)
                 if next_stage_info:
                     print(f"➡️  下一阶段: {next_stage_info.display_name}")
@@ -266,13 +267,30 @@ class AceFlowCLI:
             self._add_memory_interactive()
         elif args.search:
             # 搜索记忆
-            self._search_memory(args.search)
+            self._search_memory(args.search, args.type, args.page)
         elif args.list:
             # 列出记忆
             self._list_memories(args.type)
         else:
             print("请指定操作: --add, --search, --list")
     
+    def cmd_forecast(self, args):
+        """预测完成日期"""
+        if not self._ensure_initialized():
+            return
+        
+        forecast = self.engine.forecast_completion(runs=args.runs, seed=args.seed)
+        if args.json:
+            print(json.dumps(forecast, indent=2, ensure_ascii=False))
+            return
+        
+        print(f"\n📅 完成日期预测 ({forecast['runs']} 次模拟)")
+        print(f"  P50: {forecast['p50_date']} (剩余 {forecast['p50_hours']} 工时)")
+        print(f"  P90: {forecast['p90_date']} (剩余 {forecast['p90_hours']} 工时)")
+        print(f"  关键路径: {' → '.join(forecast['critical_path'])}")
+        if forecast['calibration'] != 1.0:
+            print(f"  历史校准系数: {forecast['calibration']}")
+    
     def cmd_web(self, args):
         """启动Web界面"""
         if not self._ensure_initialized():
@@ -349,6 +367,7 @@ class AceFlowCLI:
   start          开始阶段
   complete       完成阶段
   progress       更新进度
+  forecast       预测完成日期
   mode           切换流程模式
   
 内容管理:
@@ -497,10 +516,21 @@ class AceFlowCLI:
         # 目前先显示占位符
         print("🧠 记忆添加功能开发中...")
     
-    def _search_memory(self, query: str):
+    def _search_memory(self, query: str, memory_type: str = None, page: int = 1):
         """搜索记忆"""
         print(f"🔍 搜索记忆: {query}")
-        print("记忆搜索功能开发中...")
+        result = GlobalMemoryPool().search_memory(query, mem_type=memory_type, page=page)
+        
+        if not result['results']:
+            print("未找到相关记忆")
+            return
+        
+        print(f"共 {result['total']} 条结果，第 {result['page']} 页")
+        for memory in result['results']:
+            content = memory['content']
+            preview = content[:80] + "..." if len(content) > 80 else content
+            print(f"  [{memory['type']}] {memory['id']} (相关度 {memory['score']:.2f})")
+            print(f"      {preview}")
     
     def _list_memories(self, memory_type: str = None):
         """列出记忆"""
@@ -531,6 +561,8 @@ def main():
         description="AceFlow CLI v2.0 - AI驱动的敏捷开发工作流",
         formatter_class=argparse.RawDescriptionHelpFormatter
     )
+    parser.add_argument('--profile', action='store_true', help='在标准错误输出各步骤耗时')
+    parser.add_argument('--trace', metavar='FILE', help='写出 Chrome trace JSON（chrome://tracing、Perfetto 可打开）')
     
     subparsers = parser.add_subparsers(dest='command', help='可用命令')
     
@@ -602,8 +634,18 @@ def main():
     parser_memory.add_argument('--search', help='搜索记忆')
     parser_memory.add_argument('--list', action='store_true', help='列出记忆')
     parser_memory.add_argument('--type', help='记忆类型')
+    parser_memory.add_argument('--page', type=int, default=1, help='搜索结果页码')
     parser_memory.set_defaults(func=cli.cmd_memory)
     
+    # forecast 命令
+    parser_forecast = subparsers.add_parser('forecast', help='预测完成日期')
+    parser_forecast.add_argument('--runs', type=int, default=2000,
+                               help='模拟次数')
+    parser_forecast.add_argument('--seed', type=int, help='随机种子')
+    parser_forecast.add_argument('--json', action='store_true',
+                               help='以JSON格式输出')
+    parser_forecast.set_defaults(func=cli.cmd_forecast)
+    
     # web 命令
     parser_web = subparsers.add_parser('web', help='启动Web界面')
     parser_web.add_argument('--serve', action='store_true',
@@ -633,6 +675,9 @@ def main():
         parser.print_help()
         return
     
+    if args.profile or args.trace:
+        tracing.enable(trace_events=bool(args.trace))
+    
     try:
         # 执行命令
         args.func(args)
@@ -645,6 +690,11 @@ def main():
             import traceback
             traceback.print_exc()
         sys.exit(1)
+    finally:
+        if args.profile:
+            print(tracing.format_breakdown(), file=sys.stderr)
+        if args.trace:
+            tracing.write_chrome_trace(args.trace)
 
 
 if __name__ == "__main__":
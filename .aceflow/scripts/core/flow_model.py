@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+AceFlow 流程模式模型 v2.0
+将 flow_modes.yaml 编译为不可变的阶段索引，按文件 mtime 失效
+"""
+
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Dict, List, Optional, Any, Tuple, Mapping
+
+import yaml
+import logging
+
+from core.tracing import span
+
+logger = logging.getLogger(__name__)
+
+# 工期换算：按工作时间计，1天=8小时，1周=5天
+HOURS_PER_UNIT = {'小时': 1, 'h': 1, 'hour': 1, 'hours': 1,
+                  '天': 8, 'd': 8, 'day': 8, 'days': 8,
+                  '周': 40, 'w': 40, 'week': 40, 'weeks': 40}
+_DURATION_RE = re.compile(
+    r'(\d+(?:\.\d+)?)\s*(?:(?:-|~|～|到|至)\s*(\d+(?:\.\d+)?))?\s*(小时|天|周|hours?|days?|weeks?|[hdw])?',
+    re.IGNORECASE
+)
+
+
+def parse_duration(text: Any) -> Optional[Tuple[float, float]]:
+    """将 "4-8小时"、"1-4天"、"1天" 等工期描述解析为 (最短, 最长) 小时数，无法解析时返回 None"""
+    if isinstance(text, (int, float)):
+        return float(text), float(text)
+    match = _DURATION_RE.search(str(text or ''))
+    if not match:
+        return None
+    low = float(match.group(1))
+    high = float(match.group(2)) if match.group(2) else low
+    factor = HOURS_PER_UNIT.get((match.group(3) or '小时').lower(), 1)
+    return min(low, high) * factor, max(low, high) * factor
+
+
+@dataclass(frozen=True)
+class StageInfo:
+    """阶段信息"""
+    id: str
+    name: str
+    display_name: str
+    description: str
+    duration_estimate: str
+    deliverables: Tuple[str, ...] = ()
+    next_stage: Optional[str] = None
+    dependencies: Tuple[str, ...] = field(default_factory=tuple)
+
+
+def _stage_entries(stages_config: Any) -> List[Tuple[str, Dict]]:
+    """兼容两种写法：以ID为键的字典，或带 id 字段的列表"""
+    if isinstance(stages_config, dict):
+        return [(str(stage_id), config or {}) for stage_id, config in stages_config.items()]
+    entries = []
+    for config in stages_config or []:
+        if isinstance(config, dict) and 'id' in config:
+            entries.append((str(config['id']), config))
+    return entries
+
+
+class FlowModeModel:
+    """单个流程模式的编译结果（只读）"""
+
+    def __init__(self, mode: str, mode_config: Dict):
+        self.mode = mode
+        self.name = mode_config.get('name', mode)
+        entries = _stage_entries(mode_config.get('stages', {}))
+        declared = [stage_id for stage_id, _ in entries]
+        known = set(declared)
+
+        # 未显式声明 next_stage 时按声明顺序串联
+        next_of = {}
+        for index, (stage_id, config) in enumerate(entries):
+            default_next = declared[index + 1] if index + 1 < len(declared) else None
+            next_of[stage_id] = config.get('next_stage', default_next)
+
+        predecessors = {}
+        for stage_id, config in entries:
+            dependencies = config.get('dependencies')
+            if dependencies is None:
+                dependencies = [other for other in declared if next_of[other] == stage_id]
+            unknown = [dep for dep in dependencies if dep not in known]
+            if unknown:
+                logger.warning(f"流程模式 {mode} 的阶段 {stage_id} 依赖未知阶段: {unknown}")
+            predecessors[stage_id] = tuple(dep for dep in dependencies if dep in known)
+        # 排序时去掉成环的依赖，之后的调度都基于无环的前置关系
+        order = self._topological_order(declared, predecessors)
+
+        stages = {}
+        for stage_id, config in entries:
+            name = config.get('name', stage_id)
+            stages[stage_id] = StageInfo(
+                id=stage_id,
+                name=name,
+                display_name=config.get('display_name', name),
+                description=config.get('description', ''),
+                duration_estimate=config.get('duration_estimate') or config.get('typical_duration', ''),
+                deliverables=tuple(config.get('deliverables') or ()),
+                next_stage=next_of[stage_id],
+                dependencies=predecessors[stage_id]
+            )
+
+        successors = {stage_id: [] for stage_id in declared}
+        for stage_id in declared:
+            for dep in predecessors[stage_id]:
+                successors[dep].append(stage_id)
+
+        deliverable_index: Dict[str, List[str]] = {}
+        for stage_id in declared:
+            for deliverable in stages[stage_id].deliverables:
+                deliverable_index.setdefault(deliverable, []).append(stage_id)
+
+        self.stages: Mapping[str, StageInfo] = MappingProxyType(stages)
+        self.predecessors: Mapping[str, Tuple[str, ...]] = MappingProxyType(predecessors)
+        self.successors: Mapping[str, Tuple[str, ...]] = MappingProxyType(
+            {stage_id: tuple(children) for stage_id, children in successors.items()}
+        )
+        self.deliverable_index: Mapping[str, Tuple[str, ...]] = MappingProxyType(
+            {deliverable: tuple(ids) for deliverable, ids in deliverable_index.items()}
+        )
+        self.order: Tuple[str, ...] = order
+        self.stage_list: Tuple[StageInfo, ...] = tuple(self.stages[stage_id] for stage_id in self.order)
+        self.first_stage: Optional[str] = self.order[0] if self.order else None
+        self.duration_ranges: Mapping[str, Tuple[float, float]] = MappingProxyType({
+            stage_id: parse_duration(stages[stage_id].duration_estimate) or (0.0, 0.0)
+            for stage_id in declared
+        })
+
+    def _topological_order(self, declared: List[str], predecessors: Dict[str, Tuple[str, ...]]) -> Tuple[str, ...]:
+        """Kahn 拓扑排序，同层保持声明顺序
+
+        存在环时取声明最靠前的未排序阶段，忽略它对未排序阶段的依赖（原地修改 predecessors）后继续。
+        """
+        position = {stage_id: index for index, stage_id in enumerate(declared)}
+        successors = {stage_id: [] for stage_id in declared}
+        for stage_id in declared:
+            for dep in predecessors[stage_id]:
+                successors[dep].append(stage_id)
+        in_degree = {stage_id: len(predecessors[stage_id]) for stage_id in declared}
+        ready = [stage_id for stage_id in declared if in_degree[stage_id] == 0]
+        order = []
+        placed = set()
+        while len(order) < len(declared):
+            if not ready:
+                stage_id = min((sid for sid in declared if sid not in placed), key=position.get)
+                dropped = [dep for dep in predecessors[stage_id] if dep not in placed]
+                logger.error(f"流程模式 {self.mode} 的阶段依赖存在环，忽略阶段 {stage_id} 对 {dropped} 的依赖")
+                predecessors[stage_id] = tuple(dep for dep in predecessors[stage_id] if dep in placed)
+                ready.append(stage_id)
+            ready.sort(key=position.get)
+            stage_id = ready.pop(0)
+            order.append(stage_id)
+            placed.add(stage_id)
+            for child in successors[stage_id]:
+                in_degree[child] -= 1
+                if in_degree[child] == 0 and child not in placed:
+                    ready.append(child)
+        return tuple(order)
+
+    def ready_stages(self, completed, started=()) -> Tuple[str, ...]:
+        """前置阶段均已完成、自身尚未开始的阶段（按拓扑顺序）"""
+        completed = set(completed)
+        started = set(started)
+        return tuple(
+            stage_id for stage_id in self.order
+            if stage_id not in completed and stage_id not in started
+            and all(dep in completed for dep in self.predecessors[stage_id])
+        )
+
+    def expected_hours(self, stage_id: str) -> float:
+        """阶段预估工期（区间中值，小时）"""
+        low, high = self.duration_ranges.get(stage_id, (0.0, 0.0))
+        return (low + high) / 2
+
+    def earliest_finish(self, durations: Optional[Mapping[str, float]] = None) -> Dict[str, Tuple[float, float]]:
+        """正向遍历DAG，返回 {阶段ID: (最早开始, 最早完成)}（小时，相对起点）
+
+        durations 未给出的阶段取预估工期中值。
+        """
+        durations = durations or {}
+        schedule = {}
+        for stage_id in self.order:
+            start = max((schedule[dep][1] for dep in self.predecessors[stage_id]), default=0.0)
+            duration = durations.get(stage_id)
+            if duration is None:
+                duration = self.expected_hours(stage_id)
+            schedule[stage_id] = (start, start + duration)
+        return schedule
+
+    def critical_path(self, durations: Optional[Mapping[str, float]] = None) -> Tuple[List[str], float]:
+        """关键路径及总工期（小时）：从最晚完成的阶段沿决定其开始时间的前置阶段回溯"""
+        schedule = self.earliest_finish(durations)
+        if not schedule:
+            return [], 0.0
+        stage_id = max(self.order, key=lambda sid: schedule[sid][1])
+        total = schedule[stage_id][1]
+        path = [stage_id]
+        while self.predecessors[stage_id]:
+            stage_id = max(self.predecessors[stage_id], key=lambda dep: schedule[dep][1])
+            path.append(stage_id)
+        path.reverse()
+        return path, total
+
+    def get(self, stage_id: Optional[str]) -> Optional[StageInfo]:
+        return self.stages.get(stage_id) if stage_id else None
+
+    def stages_for_deliverable(self, deliverable: str) -> Tuple[str, ...]:
+        return self.deliverable_index.get(deliverable, ())
+
+    def __contains__(self, stage_id) -> bool:
+        return stage_id in self.stages
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+
+class FlowModes:
+    """flow_modes.yaml 的原始配置及各模式的编译结果"""
+
+    def __init__(self, raw: Dict):
+        self.raw = raw or {}
+        modes = self.raw.get('flow_modes') or {}
+        self.models: Mapping[str, FlowModeModel] = MappingProxyType(
+            {mode: FlowModeModel(mode, config or {}) for mode, config in modes.items()}
+        )
+
+    def model(self, mode: str) -> FlowModeModel:
+        model = self.models.get(mode)
+        if model is None:
+            # 未定义的模式返回空模型，调用方无需特殊处理
+            model = FlowModeModel(mode, {})
+        return model
+
+
+_EMPTY = FlowModes({})
+_cache: Dict[str, Tuple[Tuple[int, int], FlowModes]] = {}
+_cache_lock = threading.Lock()
+
+
+def load_flow_modes(path) -> FlowModes:
+    """加载并编译流程模式配置，同一文件在 mtime/大小不变时复用编译结果"""
+    path = str(path)
+    try:
+        st = os.stat(path)
+    except OSError:
+        return _EMPTY
+    key = (st.st_mtime_ns, st.st_size)
+
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+    try:
+        with span("state.load_flow_modes"), open(path, 'r', encoding='utf-8') as f:
+            compiled = FlowModes(yaml.safe_load(f))
+    except Exception as e:
+        logger.error(f"加载流程模式配置失败: {e}")
+        return _EMPTY
+
+    with _cache_lock:
+        _cache[path] = (key, compiled)
+    return compiled
@@ -0,0 +1,459 @@
+import os
+import json
+import sqlite3
+import bisect
+import threading
+from datetime import datetime
+
+# 过期索引追加日志超过该大小（字节）时合并回索引文件
+EXPIRY_LOG_LIMIT = 64 * 1024
+
+
+def _write_json_atomic(path, data, **dump_kwargs):
+    """先写同目录临时文件再 os.replace，中途失败不会留下半截JSON"""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, **dump_kwargs)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _expiry_timestamp(memory):
+    """将 expires_at 转换为时间戳，永不过期返回 None"""
+    expires_at = memory.get('expires_at')
+    if not expires_at:
+        return None
+    return datetime.fromisoformat(expires_at).timestamp()
+
+
+def is_expired(memory, now=None):
+    """判断记忆是否已过期"""
+    if not memory.get('expires_at'):
+        return False
+    return datetime.fromisoformat(memory['expires_at']) < (now or datetime.now())
+
+
+class MemoryBackend:
+    """记忆存储后端接口"""
+
+    name = None
+
+    def put(self, memory):
+        """写入（或覆盖）一条记忆"""
+        raise NotImplementedError
+
+    def get(self, memory_id):
+        """按ID读取记忆，不存在返回 None"""
+        raise NotImplementedError
+
+    def get_many(self, memory_ids):
+        """按ID批量读取，返回 {memory_id: memory}"""
+        return {mid: memory for mid in memory_ids for memory in [self.get(mid)] if memory}
+
+    def query(self, mem_type=None, keywords=None, include_expired=False):
+        """按类型和关键词检索记忆"""
+        raise NotImplementedError
+
+    def delete(self, memory_id):
+        """删除记忆及其阶段关联，返回是否删除"""
+        raise NotImplementedError
+
+    def delete_many(self, memory_ids):
+        """批量删除记忆，返回删除数量"""
+        return sum(1 for memory_id in memory_ids if self.delete(memory_id))
+
+    def expired_ids(self, now=None):
+        """按过期时间顺序返回已过期的记忆ID"""
+        raise NotImplementedError
+
+    def iter_memories(self):
+        """遍历全部记忆（含过期）"""
+        raise NotImplementedError
+
+    def count(self):
+        """记忆总数（含过期）"""
+        return sum(1 for _ in self.iter_memories())
+
+    def link(self, memory_id, stage_id):
+        """将记忆关联到阶段"""
+        raise NotImplementedError
+
+    def stage_links(self, stage_id):
+        """返回阶段关联的记忆ID（按关联顺序）"""
+        raise NotImplementedError
+
+    def all_links(self):
+        """返回全部阶段关联 {stage_id: [memory_id, ...]}"""
+        raise NotImplementedError
+
+    def compact_links(self):
+        """清理指向不存在记忆的阶段关联和空阶段，返回移除的关联数"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class FileMemoryBackend(MemoryBackend):
+    """一条记忆一个JSON文件的存储布局（兼容旧版记忆池）"""
+
+    name = 'file'
+
+    def __init__(self, storage_path, memory_types):
+        self.storage_path = storage_path
+        self.memory_types = list(memory_types)
+        self.link_file = os.path.join(storage_path, 'stage_links.json')
+        self.expiry_file = os.path.join(storage_path, 'expiry_index.json')
+        # 写入只追加一行 [过期时间或null, 记忆ID]，读取索引时合并
+        self.expiry_log = os.path.join(storage_path, 'expiry_index.log')
+        os.makedirs(storage_path, exist_ok=True)
+        for mem_type in self.memory_types:
+            os.makedirs(os.path.join(storage_path, mem_type), exist_ok=True)
+
+    def _memory_path(self, mem_type, memory_id):
+        return os.path.join(self.storage_path, mem_type, f"{memory_id}.json")
+
+    @staticmethod
+    def _type_from_id(memory_id):
+        # 记忆ID格式: MEM-{type}-{timestamp}-{hash}
+        parts = memory_id.split('-')
+        return parts[1] if len(parts) >= 4 and parts[0] == 'MEM' else None
+
+    def put(self, memory):
+        file_path = self._memory_path(memory['type'], memory['id'])
+        overwrite = os.path.exists(file_path)
+        _write_json_atomic(file_path, memory, ensure_ascii=False, indent=2)
+
+        # 新记录不过期则无需登记；覆盖写入时追加一行以替换（或移除）旧的过期项
+        expires_ts = _expiry_timestamp(memory)
+        if expires_ts is None and not overwrite:
+            return
+        with open(self.expiry_log, 'a', encoding='utf-8') as f:
+            f.write(json.dumps([expires_ts, memory['id']]) + '\n')
+        if os.path.getsize(self.expiry_log) > EXPIRY_LOG_LIMIT:
+            self._save_expiry_index(self._load_expiry_index())
+
+    def get(self, memory_id):
+        mem_type = self._type_from_id(memory_id)
+        candidates = [mem_type] if mem_type in self.memory_types else self.memory_types
+        for candidate in candidates:
+            file_path = self._memory_path(candidate, memory_id)
+            if os.path.exists(file_path):
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        return None
+
+    def query(self, mem_type=None, keywords=None, include_expired=False):
+        now = datetime.now()
+        results = []
+        for memory in self._iter_type(mem_type):
+            if not include_expired and is_expired(memory, now):
+                continue
+            if keywords and not any(keyword in memory['content'] for keyword in keywords):
+                continue
+            results.append(memory)
+        return results
+
+    def delete(self, memory_id):
+        return self.delete_many([memory_id]) == 1
+
+    def delete_many(self, memory_ids):
+        deleted = set()
+        for memory_id in memory_ids:
+            memory = self.get(memory_id)
+            if memory is None:
+                continue
+            os.remove(self._memory_path(memory['type'], memory_id))
+            deleted.add(memory_id)
+        if not deleted:
+            return 0
+
+        # 删除后统一重写一次关联和过期索引
+        links = self.all_links()
+        compacted = {stage_id: [mid for mid in ids if mid not in deleted] for stage_id, ids in links.items()}
+        if compacted != links:
+            self._save_links(compacted)
+        entries = self._load_expiry_index()
+        self._save_expiry_index([entry for entry in entries if entry[1] not in deleted])
+        return len(deleted)
+
+    def expired_ids(self, now=None):
+        now_ts = (now or datetime.now()).timestamp()
+        entries = self._load_expiry_index()
+        # 过期索引按时间排序，二分定位截止位置
+        end = bisect.bisect_left(entries, [now_ts])
+        return [memory_id for _, memory_id in entries[:end]]
+
+    def _load_expiry_index(self):
+        """读取过期索引并合并追加日志；文件缺失或损坏时扫描重建"""
+        if not os.path.exists(self.expiry_file):
+            return self._rebuild_expiry_index()
+        try:
+            with open(self.expiry_file, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+            updates = {}
+            if os.path.exists(self.expiry_log):
+                with open(self.expiry_log, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        if line.strip():
+                            expires_ts, memory_id = json.loads(line)
+                            updates[memory_id] = expires_ts
+        except ValueError:
+            return self._rebuild_expiry_index()
+        if not updates:
+            return entries
+
+        entries = [entry for entry in entries if entry[1] not in updates]
+        entries.extend([expires_ts, memory_id] for memory_id, expires_ts in updates.items()
+                       if expires_ts is not None)
+        entries.sort()
+        return entries
+
+    def _rebuild_expiry_index(self):
+        """旧版存储没有过期索引，首次使用时扫描生成"""
+        entries = sorted(
+            [_expiry_timestamp(memory), memory['id']]
+            for memory in self._iter_type(None) if memory.get('expires_at')
+        )
+        self._save_expiry_index(entries)
+        return entries
+
+    def _save_expiry_index(self, entries):
+        """写入完整索引，追加日志已并入其中，随后清空"""
+        _write_json_atomic(self.expiry_file, entries)
+        try:
+            os.remove(self.expiry_log)
+        except FileNotFoundError:
+            pass
+
+    def iter_memories(self):
+        return self._iter_type(None)
+
+    def count(self):
+        # 只统计文件名，不解析记忆内容
+        total = 0
+        for mem_type in self.memory_types:
+            try:
+                with os.scandir(os.path.join(self.storage_path, mem_type)) as entries:
+                    total += sum(1 for entry in entries if entry.name.endswith('.json'))
+            except FileNotFoundError:
+                continue
+        return total
+
+    def _iter_type(self, mem_type):
+        search_types = [mem_type] if mem_type else self.memory_types
+        for search_type in search_types:
+            search_dir = os.path.join(self.storage_path, search_type)
+            if not os.path.exists(search_dir):
+                continue
+            for filename in os.listdir(search_dir):
+                if filename.endswith('.json'):
+                    with open(os.path.join(search_dir, filename), 'r', encoding='utf-8') as f:
+                        yield json.load(f)
+
+    def link(self, memory_id, stage_id):
+        links = self.all_links()
+        stage_ids = links.setdefault(stage_id, [])
+        if memory_id not in stage_ids:
+            stage_ids.append(memory_id)
+        self._save_links(links)
+
+    def stage_links(self, stage_id):
+        return self.all_links().get(stage_id, [])
+
+    def all_links(self):
+        if not os.path.exists(self.link_file):
+            return {}
+        with open(self.link_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def compact_links(self):
+        links = self.all_links()
+        existing = set()
+        for memory_ids in links.values():
+            existing.update(memory_id for memory_id in memory_ids if self.get(memory_id) is not None)
+
+        compacted = {}
+        removed = 0
+        for stage_id, memory_ids in links.items():
+            kept = [memory_id for memory_id in memory_ids if memory_id in existing]
+            removed += len(memory_ids) - len(kept)
+            if kept:
+                compacted[stage_id] = kept
+        if compacted != links:
+            self._save_links(compacted)
+        return removed
+
+    def _save_links(self, links):
+        _write_json_atomic(self.link_file, links, ensure_ascii=False, indent=2)
+
+
+class SQLiteMemoryBackend(MemoryBackend):
+    """基于 sqlite3 的存储，索引 ID、类型、过期时间和阶段关联"""
+
+    name = 'sqlite'
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS memories (
+            id TEXT PRIMARY KEY,
+            type TEXT NOT NULL,
+            content TEXT NOT NULL,
+            created_at TEXT,
+            expires_ts REAL,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_memories_type ON memories(type);
+        CREATE INDEX IF NOT EXISTS idx_memories_expires ON memories(expires_ts);
+        CREATE TABLE IF NOT EXISTS stage_links (
+            stage_id TEXT NOT NULL,
+            memory_id TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            PRIMARY KEY (stage_id, memory_id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_stage_links_memory ON stage_links(memory_id);
+    """
+
+    DB_NAME = 'memory.db'
+
+    def __init__(self, storage_path, memory_types=None, db_name=DB_NAME):
+        self.storage_path = storage_path
+        self.memory_types = list(memory_types or [])
+        os.makedirs(storage_path, exist_ok=True)
+        self.db_path = os.path.join(storage_path, db_name)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.executescript(self.SCHEMA)
+
+    def put(self, memory):
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO memories (id, type, content, created_at, expires_ts, data) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (memory['id'], memory['type'], memory.get('content', ''), memory.get('created_at'),
+                 _expiry_timestamp(memory), json.dumps(memory, ensure_ascii=False))
+            )
+
+    def get(self, memory_id):
+        with self._lock:
+            row = self._conn.execute('SELECT data FROM memories WHERE id = ?', (memory_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_many(self, memory_ids):
+        memory_ids = list(memory_ids)
+        found = {}
+        # 分批查询，避免超过 SQLite 参数数量上限
+        for start in range(0, len(memory_ids), 500):
+            batch = memory_ids[start:start + 500]
+            placeholders = ','.join('?' * len(batch))
+            with self._lock:
+                rows = self._conn.execute(
+                    f'SELECT id, data FROM memories WHERE id IN ({placeholders})', batch
+                ).fetchall()
+            found.update((mid, json.loads(data)) for mid, data in rows)
+        return found
+
+    def query(self, mem_type=None, keywords=None, include_expired=False):
+        sql = 'SELECT data FROM memories WHERE 1=1'
+        params = []
+        if mem_type:
+            sql += ' AND type = ?'
+            params.append(mem_type)
+        if not include_expired:
+            sql += ' AND (expires_ts IS NULL OR expires_ts >= ?)'
+            params.append(datetime.now().timestamp())
+        if keywords:
+            # instr 区分大小写，与子串匹配语义一致
+            sql += ' AND (' + ' OR '.join('instr(content, ?) > 0' for _ in keywords) + ')'
+            params.extend(keywords)
+        sql += ' ORDER BY created_at, rowid'
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def delete(self, memory_id):
+        return self.delete_many([memory_id]) == 1
+
+    def delete_many(self, memory_ids):
+        params = [(memory_id,) for memory_id in memory_ids]
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany('DELETE FROM memories WHERE id = ?', params)
+            deleted = self._conn.total_changes - before
+            self._conn.executemany('DELETE FROM stage_links WHERE memory_id = ?', params)
+        return deleted
+
+    def expired_ids(self, now=None):
+        now_ts = (now or datetime.now()).timestamp()
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT id FROM memories WHERE expires_ts < ? ORDER BY expires_ts', (now_ts,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def iter_memories(self):
+        with self._lock:
+            rows = self._conn.execute('SELECT data FROM memories ORDER BY created_at, rowid').fetchall()
+        for row in rows:
+            yield json.loads(row[0])
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM memories').fetchone()[0]
+
+    def link(self, memory_id, stage_id):
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR IGNORE INTO stage_links (stage_id, memory_id, position) '
+                'SELECT ?, ?, COALESCE(MAX(position), -1) + 1 FROM stage_links WHERE stage_id = ?',
+                (stage_id, memory_id, stage_id)
+            )
+
+    def stage_links(self, stage_id):
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT memory_id FROM stage_links WHERE stage_id = ? ORDER BY position', (stage_id,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def all_links(self):
+        links = {}
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT stage_id, memory_id FROM stage_links ORDER BY stage_id, position'
+            ).fetchall()
+        for stage_id, memory_id in rows:
+            links.setdefault(stage_id, []).append(memory_id)
+        return links
+
+    def compact_links(self):
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                'DELETE FROM stage_links WHERE memory_id NOT IN (SELECT id FROM memories)'
+            )
+        return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+BACKENDS = {
+    FileMemoryBackend.name: FileMemoryBackend,
+    SQLiteMemoryBackend.name: SQLiteMemoryBackend
+}
+
+
+def create_backend(name, storage_path, memory_types):
+    """按名称创建存储后端"""
+    if name not in BACKENDS:
+        raise ValueError(f"不支持的记忆存储后端: {name}")
+    return BACKENDS[name](storage_path, memory_types)
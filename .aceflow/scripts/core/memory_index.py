@@ -0,0 +1,213 @@
+import os
+import re
+import math
+import heapq
+import sqlite3
+import threading
+from collections import Counter
+from datetime import datetime
+
+# BM25 参数
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_CJK_RANGES = '\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af'
+_CJK_RE = re.compile(f'[{_CJK_RANGES}]')
+# 连续的CJK字符为一段，其余按单词切分
+_RUN_RE = re.compile(f'[{_CJK_RANGES}]+|[^\\W{_CJK_RANGES}]+')
+
+
+def tokenize(text, query=False):
+    """分词：中文等CJK文本切为字符二元组，其他文本按单词切分并转小写
+
+    索引时每段CJK文本额外保留末字单字词元，配合前缀查询使任意单字都可检索；
+    查询时仅单字段落产生单字词元。
+    """
+    tokens = []
+    for run in _RUN_RE.findall(text.lower()):
+        if _CJK_RE.match(run):
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+            if not query or len(run) == 1:
+                tokens.append(run[-1])
+        else:
+            tokens.append(run)
+    return tokens
+
+
+def memory_text(memory):
+    """记忆的可检索文本：内容和关键词"""
+    keywords = memory.get('keywords') or memory.get('metadata', {}).get('keywords') or []
+    return ' '.join([memory.get('content', '')] + [str(keyword) for keyword in keywords])
+
+
+class MemoryIndex:
+    """增量维护的记忆倒排索引（SQLite 存储，BM25 排序）"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS postings (
+            term TEXT NOT NULL,
+            doc_id TEXT NOT NULL,
+            tf INTEGER NOT NULL,
+            PRIMARY KEY (term, doc_id)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_postings_doc ON postings(doc_id);
+        CREATE TABLE IF NOT EXISTS docs (
+            doc_id TEXT PRIMARY KEY,
+            length INTEGER NOT NULL,
+            tag TEXT,
+            expires_ts REAL,
+            signature TEXT
+        );
+        CREATE TABLE IF NOT EXISTS stats (
+            key TEXT PRIMARY KEY,
+            value REAL NOT NULL
+        );
+    """
+
+    def __init__(self, index_path):
+        self.index_path = index_path
+        os.makedirs(os.path.dirname(index_path) or '.', exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(index_path, check_same_thread=False, timeout=30)
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.executescript(self.SCHEMA)
+
+    def add(self, doc_id, text, tag=None, expires_at=None, signature=None):
+        """索引（或重新索引）一篇文档"""
+        counts = Counter(tokenize(text))
+        length = sum(counts.values())
+        expires_ts = datetime.fromisoformat(expires_at).timestamp() if expires_at else None
+
+        with self._lock, self._conn:
+            self._remove(doc_id)
+            self._conn.executemany(
+                'INSERT INTO postings (term, doc_id, tf) VALUES (?, ?, ?)',
+                [(term, doc_id, tf) for term, tf in counts.items()]
+            )
+            self._conn.execute(
+                'INSERT INTO docs (doc_id, length, tag, expires_ts, signature) VALUES (?, ?, ?, ?, ?)',
+                (doc_id, length, tag, expires_ts, signature)
+            )
+            self._bump_stats(1, length)
+
+    def remove(self, doc_id):
+        """从索引中删除文档"""
+        with self._lock, self._conn:
+            return self._remove(doc_id)
+
+    def remove_many(self, doc_ids):
+        """在一个事务中批量删除文档"""
+        with self._lock, self._conn:
+            return sum(1 for doc_id in doc_ids if self._remove(doc_id))
+
+    def _remove(self, doc_id):
+        row = self._conn.execute('SELECT length FROM docs WHERE doc_id = ?', (doc_id,)).fetchone()
+        if row is None:
+            return False
+        self._conn.execute('DELETE FROM postings WHERE doc_id = ?', (doc_id,))
+        self._conn.execute('DELETE FROM docs WHERE doc_id = ?', (doc_id,))
+        self._bump_stats(-1, -row[0])
+        return True
+
+    def _bump_stats(self, doc_delta, length_delta):
+        for key, delta in (('doc_count', doc_delta), ('total_length', length_delta)):
+            self._conn.execute(
+                'INSERT INTO stats (key, value) VALUES (?, ?) '
+                'ON CONFLICT(key) DO UPDATE SET value = value + excluded.value',
+                (key, delta)
+            )
+
+    def _stats(self):
+        stats = dict(self._conn.execute('SELECT key, value FROM stats').fetchall())
+        return int(stats.get('doc_count', 0)), stats.get('total_length', 0)
+
+    def count(self):
+        """已索引的文档数"""
+        with self._lock:
+            return self._stats()[0]
+
+    def signatures(self):
+        """返回 {doc_id: signature}，用于与数据源增量同步"""
+        with self._lock:
+            return dict(self._conn.execute('SELECT doc_id, signature FROM docs').fetchall())
+
+    def sync(self, current, load_text):
+        """按签名与数据源同步：current 为 {doc_id: signature}，load_text(doc_id) 返回文本"""
+        indexed = self.signatures()
+        for doc_id in set(indexed) - set(current):
+            self.remove(doc_id)
+        for doc_id, signature in current.items():
+            if indexed.get(doc_id, object()) != signature:
+                text = load_text(doc_id)
+                if text is None:
+                    self.remove(doc_id)
+                else:
+                    self.add(doc_id, text, signature=signature)
+
+    def _expand_terms(self, tokens):
+        """单个CJK字符的查询词扩展为以其开头的所有词元"""
+        terms = set()
+        for token in tokens:
+            if len(token) == 1 and _CJK_RE.match(token):
+                rows = self._conn.execute(
+                    'SELECT DISTINCT term FROM postings WHERE term >= ? AND term < ?',
+                    (token, token + '\U0010ffff')
+                ).fetchall()
+                terms.update(row[0] for row in rows)
+            else:
+                terms.add(token)
+        return terms
+
+    def search(self, query, limit=20, offset=0, tag=None, include_expired=False):
+        """BM25 排序检索，返回 (命中总数, [(doc_id, score), ...])
+
+        limit 为 None 时返回全部命中。
+        """
+        tokens = tokenize(query, query=True)
+        if not tokens:
+            return 0, []
+
+        with self._lock:
+            doc_count, total_length = self._stats()
+            if doc_count == 0:
+                return 0, []
+            avg_length = total_length / doc_count
+            now = datetime.now().timestamp()
+
+            scores = {}
+            for term in self._expand_terms(tokens):
+                rows = self._conn.execute(
+                    'SELECT p.doc_id, p.tf, d.length, d.tag, d.expires_ts '
+                    'FROM postings p JOIN docs d ON d.doc_id = p.doc_id WHERE p.term = ?',
+                    (term,)
+                ).fetchall()
+                if not rows:
+                    continue
+
+                idf = math.log((doc_count - len(rows) + 0.5) / (len(rows) + 0.5) + 1)
+                for doc_id, tf, length, doc_tag, expires_ts in rows:
+                    if tag and doc_tag != tag:
+                        continue
+                    if not include_expired and expires_ts is not None and expires_ts < now:
+                        continue
+                    norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1) / norm
+
+        ranked = ((score, doc_id) for doc_id, score in scores.items())
+        if limit is None:
+            top = sorted(ranked, key=lambda item: (-item[0], item[1]))[offset:]
+        else:
+            top = heapq.nsmallest(offset + limit, ranked, key=lambda item: (-item[0], item[1]))[offset:]
+        return len(scores), [(doc_id, round(score, 4)) for score, doc_id in top]
+
+    def clear(self):
+        """清空索引"""
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM postings')
+            self._conn.execute('DELETE FROM docs')
+            self._conn.execute('DELETE FROM stats')
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,13 +1,23 @@
 import os
-import json
 import hashlib
+import logging
+import threading
 from datetime import datetime, timedelta
 from utils.config_loader import load_config
+from core.memory_backends import create_backend, is_expired, SQLiteMemoryBackend
+from core.memory_index import MemoryIndex, memory_text
+from core.tracing import traced
+
+DEFAULT_BACKEND = SQLiteMemoryBackend.name
+DEFAULT_RETENTION_DAYS = 7
+
+logger = logging.getLogger(__name__)
 
 class GlobalMemoryPool:
-    def __init__(self):
+    def __init__(self, backend=None):
         self.config = load_config('workflow_rules.json')
-        self.storage_path = self.config.get('memory_pool_config', {}).get('storage_path', './.aceflow/memory_pool')
+        pool_config = self.config.get('memory_pool_config', {})
+        self.storage_path = pool_config.get('storage_path', './.aceflow/memory_pool')
         self.memory_types = {
             'REQ': '需求记忆',
             'CON': '约束记忆',
@@ -17,10 +27,43 @@ class GlobalMemoryPool:
             'DEFECT': '缺陷记忆',
             'FDBK': '反馈记忆'
         }
-        # 创建存储目录
-        os.makedirs(self.storage_path, exist_ok=True)
-        for mem_type in self.memory_types.keys():
-            os.makedirs(os.path.join(self.storage_path, mem_type), exist_ok=True)
+        self.retention_days = self._load_retention_days()
+        self._sweeper = None
+
+        # 存储后端：默认 SQLite，file 为旧版每条记忆一个JSON文件的布局
+        self.backend_name = backend or self._configured_backend(pool_config.get('backend', DEFAULT_BACKEND))
+        self.backend = create_backend(self.backend_name, self.storage_path, self.memory_types.keys())
+
+        # 全文检索倒排索引，随存储和删除增量更新
+        self.index = MemoryIndex(os.path.join(self.storage_path, 'search_index.db'))
+        if self.index.count() != self.backend.count():
+            self.rebuild_index()
+
+    def _load_retention_days(self):
+        """记忆保留天数，读取 dynamic_thresholds.json 的 global.memory_retention_days"""
+        try:
+            thresholds = load_config('dynamic_thresholds.json')
+        except (FileNotFoundError, ValueError):
+            return DEFAULT_RETENTION_DAYS
+        return thresholds.get('global', {}).get('memory_retention_days', DEFAULT_RETENTION_DAYS)
+
+    def _configured_backend(self, configured):
+        """旧版文件记忆尚未迁移（没有数据库文件）时继续使用 file 后端，避免已有记忆读取不到"""
+        if (configured == SQLiteMemoryBackend.name
+                and not os.path.exists(os.path.join(self.storage_path, SQLiteMemoryBackend.DB_NAME))
+                and self._has_file_layout()):
+            logger.info(f"{self.storage_path} 中存在旧版文件记忆，继续使用 file 后端；可运行 "
+                        f"scripts/migrations/memory_backend_migrator.py 迁移到 {configured} 后端")
+            return 'file'
+        return configured
+
+    def _has_file_layout(self):
+        """检查存储目录中是否残留文件后端的记忆"""
+        for mem_type in self.memory_types:
+            type_dir = os.path.join(self.storage_path, mem_type)
+            if os.path.isdir(type_dir) and any(name.endswith('.json') for name in os.listdir(type_dir)):
+                return True
+        return False
 
     def generate_memory_id(self, mem_type, content):
         """生成唯一记忆ID"""
@@ -29,6 +72,7 @@ class GlobalMemoryPool:
         short_hash = hash_obj.hexdigest()[:6]
         return f"MEM-{mem_type}-{timestamp}-{short_hash}"
 
+    @traced("memory.store")
     def store_memory(self, mem_type, content, metadata=None):
         """存储记忆片段"""
         if mem_type not in self.memory_types:
@@ -42,75 +86,115 @@ class GlobalMemoryPool:
             'content': content,
             'metadata': metadata or {},
             'created_at': datetime.now().isoformat(),
-            'expires_at': (datetime.now() + timedelta(days=7)).isoformat() if mem_type != 'REQ' else None
+            'expires_at': (datetime.now() + timedelta(days=self.retention_days)).isoformat() if mem_type != 'REQ' else None
         }
         
-        # 保存到文件
-        file_path = os.path.join(self.storage_path, mem_type, f"{memory_id}.json")
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(memory_data, f, ensure_ascii=False, indent=2)
-            
+        self.backend.put(memory_data)
+        self._index_memory(memory_data)
         return memory_id
 
+    def delete_memory(self, memory_id):
+        """删除记忆及其索引和阶段关联"""
+        self.index.remove(memory_id)
+        return self.backend.delete(memory_id)
+
+    def purge_expired(self, now=None, dry_run=False):
+        """清除已过期的记忆并压缩阶段关联"""
+        expired = self.backend.expired_ids(now)
+        if dry_run:
+            return {'expired': len(expired), 'purged': 0, 'links_removed': 0}
+
+        self.index.remove_many(expired)
+        purged = self.backend.delete_many(expired)
+        links_removed = self.backend.compact_links()
+        return {'expired': len(expired), 'purged': purged, 'links_removed': links_removed}
+
+    def start_sweeper(self, interval=3600):
+        """为常驻进程启动后台过期清理线程"""
+        if self._sweeper is None or not self._sweeper.is_alive():
+            self._sweeper = MemorySweeper(self, interval)
+            self._sweeper.start()
+        return self._sweeper
+
+    def stop_sweeper(self):
+        """停止后台过期清理线程"""
+        if self._sweeper is not None:
+            self._sweeper.stop()
+            self._sweeper = None
+
+    def _index_memory(self, memory):
+        self.index.add(memory['id'], memory_text(memory), tag=memory['type'], expires_at=memory.get('expires_at'))
+
+    def rebuild_index(self):
+        """根据存储后端重建全文索引（迁移或外部修改后使用）"""
+        self.index.clear()
+        for memory in self.backend.iter_memories():
+            self._index_memory(memory)
+
+    @traced("memory.retrieve")
     def retrieve_memory(self, memory_id=None, mem_type=None, keywords=None):
         """检索记忆片段"""
-        results = []
-        
-        # 确定要搜索的目录
-        search_dirs = [os.path.join(self.storage_path, t) for t in self.memory_types.keys()] if not mem_type else [os.path.join(self.storage_path, mem_type)]
-        
-        # 搜索文件
-        for search_dir in search_dirs:
-            if not os.path.exists(search_dir):
-                continue
-                
-            for filename in os.listdir(search_dir):
-                if filename.endswith('.json'):
-                    file_path = os.path.join(search_dir, filename)
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        memory = json.load(f)
-                        
-                    # 检查过期
-                    if memory['expires_at'] and datetime.fromisoformat(memory['expires_at']) < datetime.now():
-                        continue
-                        
-                    # 筛选条件
-                    if memory_id and memory['id'] != memory_id:
-                        continue
-                        
-                    if keywords and not any(keyword in memory['content'] for keyword in keywords):
-                        continue
-                        
-                    results.append(memory)
-                    
-        return results
+        if memory_id:
+            memory = self.backend.get(memory_id)
+            if memory is None or is_expired(memory):
+                return []
+            if mem_type and memory['type'] != mem_type:
+                return []
+            if keywords and not any(keyword in memory['content'] for keyword in keywords):
+                return []
+            return [memory]
+
+        if keywords:
+            # 关键词检索走倒排索引，结果按相关性排序
+            _, hits = self.index.search(' '.join(keywords), limit=None, tag=mem_type)
+            memories = self.backend.get_many(doc_id for doc_id, _ in hits)
+            return [memories[doc_id] for doc_id, _ in hits if doc_id in memories]
+
+        return self.backend.query(mem_type=mem_type)
+
+    @traced("memory.search")
+    def search_memory(self, query, mem_type=None, page=1, page_size=20):
+        """全文检索记忆，按 BM25 相关性排序并分页"""
+        page = max(page, 1)
+        total, hits = self.index.search(query, limit=page_size, offset=(page - 1) * page_size, tag=mem_type)
+        memories = self.backend.get_many(doc_id for doc_id, _ in hits)
+        return {
+            'query': query,
+            'total': total,
+            'page': page,
+            'page_size': page_size,
+            'results': [dict(memories[doc_id], score=score) for doc_id, score in hits if doc_id in memories]
+        }
 
     def link_memory_to_stage(self, memory_id, stage_id):
         """将记忆关联到阶段"""
-        link_file = os.path.join(self.storage_path, 'stage_links.json')
-        links = {}
-        
-        if os.path.exists(link_file):
-            with open(link_file, 'r', encoding='utf-8') as f:
-                links = json.load(f)
-                
-        if stage_id not in links:
-            links[stage_id] = []
-            
-        if memory_id not in links[stage_id]:
-            links[stage_id].append(memory_id)
-            
-        with open(link_file, 'w', encoding='utf-8') as f:
-            json.dump(links, f, ensure_ascii=False, indent=2)
-            
+        self.backend.link(memory_id, stage_id)
+
     def get_stage_memories(self, stage_id):
         """获取阶段关联的记忆"""
-        link_file = os.path.join(self.storage_path, 'stage_links.json')
-        if not os.path.exists(link_file):
-            return []
-            
-        with open(link_file, 'r', encoding='utf-8') as f:
-            links = json.load(f)
-            
-        memory_ids = links.get(stage_id, [])
-        return [self.retrieve_memory(memory_id=mid)[0] for mid in memory_ids if self.retrieve_memory(memory_id=mid)]
+        memory_ids = self.backend.stage_links(stage_id)
+        memories = self.backend.get_many(memory_ids)
+        now = datetime.now()
+        return [memories[mid] for mid in memory_ids if mid in memories and not is_expired(memories[mid], now)]
+
+
+class MemorySweeper(threading.Thread):
+    """定期清除过期记忆的后台线程"""
+
+    def __init__(self, pool, interval=3600):
+        super().__init__(name='memory-sweeper', daemon=True)
+        self.pool = pool
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.pool.purge_expired()
+            except Exception as e:
+                logger.warning(f"记忆过期清理失败: {e}")
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join(timeout=5)
@@ -6,6 +6,9 @@ AceFlow 增强状态引擎 v2.0
 
 import json
 import yaml
+import atexit
+import threading
+from contextlib import contextmanager
 from typing import Dict, List, Optional, Any, Tuple
 from pathlib import Path
 from datetime import datetime, timedelta
@@ -13,6 +16,14 @@ from dataclasses import dataclass, asdict
 from enum import Enum
 import logging
 
+from core.state_store import StateStore
+from core.flow_model import StageInfo, FlowModeModel, load_flow_modes
+from core.schedule_forecast import ScheduleForecaster
+from core.state_events import (
+    StageEventLog, apply_event, replay, default_actor,
+    STAGE_UPDATED, CURRENT_STAGE_CHANGED, STATE_REPLACED
+)
+
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -25,28 +36,15 @@ class StageStatus(Enum):
     BLOCKED = "blocked"
     SKIPPED = "skipped"
 
+# 视为已结束的阶段状态（满足后续阶段的依赖）
+DONE_STATUSES = (StageStatus.COMPLETED.value, StageStatus.SKIPPED.value)
+
 class FlowMode(Enum):
     """流程模式枚举"""
     MINIMAL = "minimal"
     STANDARD = "standard"
     COMPLETE = "complete"
 
-@dataclass
-class StageInfo:
-    """阶段信息"""
-    id: str
-    name: str
-    display_name: str
-    description: str
-    duration_estimate: str
-    deliverables: List[str]
-    next_stage: Optional[str] = None
-    dependencies: List[str] = None
-    
-    def __post_init__(self):
-        if self.dependencies is None:
-            self.dependencies = []
-
 @dataclass
 class StageState:
     """阶段状态"""
@@ -68,19 +66,32 @@ class StageState:
 class MultiModeStateEngine:
     """多模式状态引擎"""
     
-    def __init__(self, project_root: Path = None):
+    # 事件日志超过该大小（字节）时在写快照后归档
+    LOG_ROTATE_BYTES = 1024 * 1024
+    
+    def __init__(self, project_root: Path = None, actor: Optional[str] = None):
         self.project_root = project_root or Path.cwd()
         self.aceflow_dir = self.project_root / ".aceflow"
         self.config_file = self.aceflow_dir / "config.yaml"
         self.state_file = self.aceflow_dir / "current_state.json"
+        self.store = StateStore(self.state_file)
+        self.events = StageEventLog(self.aceflow_dir / "state_events.jsonl")
+        self.actor = actor or default_actor()
         self.flow_modes_file = self.aceflow_dir / "config" / "flow_modes.yaml"
         
         # 加载配置
         self.config = self._load_config()
-        self.flow_modes = self._load_flow_modes()
         self.current_mode = FlowMode(self.config.get('flow', {}).get('mode', 'minimal'))
         
-        # 初始化状态
+        # 批量/延迟写入：未落盘的事件和配置
+        self._write_lock = threading.RLock()
+        self._batch_depth = 0
+        self._pending_events = []
+        self._config_dirty = False
+        self._write_behind_delay = None
+        self._flush_timer = None
+        
+        # 初始化状态：读取快照并重放其后的事件
         self.state = self._load_state()
         
     def _load_config(self) -> Dict:
@@ -93,34 +104,155 @@ class MultiModeStateEngine:
             logger.error(f"加载配置失败: {e}")
         return {}
     
-    def _load_flow_modes(self) -> Dict:
-        """加载流程模式配置"""
-        try:
-            if self.flow_modes_file.exists():
-                with open(self.flow_modes_file, 'r', encoding='utf-8') as f:
-                    return yaml.safe_load(f)
-        except Exception as e:
-            logger.error(f"加载流程模式配置失败: {e}")
-        return {}
+    @property
+    def flow_modes(self) -> Dict:
+        """流程模式原始配置"""
+        return load_flow_modes(self.flow_modes_file).raw
+    
+    def flow_model(self, mode: Optional[FlowMode] = None) -> FlowModeModel:
+        """指定模式（默认当前模式）的编译模型，flow_modes.yaml 修改后自动重新编译"""
+        mode = mode or self.current_mode
+        return load_flow_modes(self.flow_modes_file).model(mode.value)
     
     def _load_state(self) -> Dict:
-        """加载当前状态"""
+        """加载当前状态：最近的快照 + 快照之后的事件"""
+        state_data = None
         try:
-            if self.state_file.exists():
-                with open(self.state_file, 'r', encoding='utf-8') as f:
-                    state_data = json.load(f)
-                    # 转换datetime字符串
-                    for stage_id, stage_state in state_data.get('stage_states', {}).items():
-                        if stage_state.get('start_time'):
-                            stage_state['start_time'] = datetime.fromisoformat(stage_state['start_time'])
-                        if stage_state.get('end_time'):
-                            stage_state['end_time'] = datetime.fromisoformat(stage_state['end_time'])
-                    return state_data
+            state_data = self.store.read()
         except Exception as e:
             logger.error(f"加载状态失败: {e}")
         
-        # 返回默认状态
-        return self._create_default_state()
+        if state_data is None:
+            # 返回默认状态
+            state_data = self._create_default_state()
+        elif '_events' not in state_data:
+            # 快照由外部写入（如重新初始化），不包含日志位置：之前的事件不属于该状态，跳到日志末尾
+            self.events.seek(0, 0)
+            self.events.read_new()
+            state_data['_events'] = {'offset': self.events.offset, 'seq': self.events.last_seq}
+        
+        position = state_data.get('_events', {})
+        self.events.seek(position.get('offset', 0), position.get('seq', 0))
+        events = self.events.read_new()
+        replay(state_data, events)
+        return self._parse_state(state_data)
+    
+    def refresh(self):
+        """重放其他进程新追加的事件"""
+        with self._write_lock:
+            events = self.events.read_new()
+            self._apply_foreign(events)
+            return len(events)
+    
+    def _apply_foreign(self, events: List[Dict]):
+        """应用其他进程的事件；未落盘的本地事件随后重新应用，结果与日志顺序一致"""
+        if not events:
+            return
+        replay(self.state, events)
+        replay(self.state, self._pending_events)
+        self._parse_state(self.state)
+    
+    def _record_event(self, event_type: str, stage_id: Optional[str] = None, **payload):
+        """记录事件并应用到内存状态；批量或延迟写入模式下暂存，否则立即追加"""
+        event = {'type': event_type, 'actor': self.actor, 'ts': datetime.now().isoformat(), **payload}
+        if stage_id is not None:
+            event['stage_id'] = stage_id
+        event = self._to_json(event)
+        
+        with self._write_lock:
+            apply_event(self.state, event)
+            self._parse_state(self.state)
+            self._pending_events.append(event)
+            
+            if self._batch_depth > 0:
+                return event
+            if self._write_behind_delay is not None:
+                self._schedule_flush()
+                return event
+            self.flush()
+        return event
+    
+    def flush(self):
+        """将暂存的事件一次性追加到日志并写快照，同时写入延迟的配置"""
+        with self._write_lock:
+            self._cancel_flush_timer()
+            if self._config_dirty:
+                self._write_config()
+                self._config_dirty = False
+            if not self._pending_events:
+                return
+            
+            # 快照随每次落盘更新，current_state.json 始终是最新状态
+            self._save_state()
+    
+    @contextmanager
+    def batch(self):
+        """批量修改：with engine.batch(): ... 结束时只写一次日志（和配置）"""
+        with self._write_lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._write_lock:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    if self._write_behind_delay is None:
+                        self.flush()
+                    elif self._pending_events or self._config_dirty:
+                        self._schedule_flush()
+    
+    def enable_write_behind(self, delay: float = 0.5):
+        """延迟写入：修改后 delay 秒内无新修改才落盘，适合常驻进程嵌入"""
+        with self._write_lock:
+            if self._write_behind_delay is None:
+                atexit.register(self.flush)
+            self._write_behind_delay = delay
+    
+    def disable_write_behind(self):
+        """关闭延迟写入并立即落盘"""
+        with self._write_lock:
+            if self._write_behind_delay is not None:
+                atexit.unregister(self.flush)
+            self._write_behind_delay = None
+            self.flush()
+    
+    def _schedule_flush(self):
+        self._cancel_flush_timer()
+        self._flush_timer = threading.Timer(self._write_behind_delay, self.flush)
+        self._flush_timer.daemon = True
+        self._flush_timer.start()
+    
+    def _cancel_flush_timer(self):
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+    
+    def get_stage_history(self, stage_id: Optional[str] = None) -> List[Dict]:
+        """阶段变更审计历史（谁在何时做了什么）"""
+        return list(self.events.iter_events(stage_id))
+    
+    def _parse_state(self, state_data: Dict) -> Dict:
+        """转换datetime字符串"""
+        for stage_id, stage_state in state_data.get('stage_states', {}).items():
+            if stage_state.get('start_time') and isinstance(stage_state['start_time'], str):
+                stage_state['start_time'] = datetime.fromisoformat(stage_state['start_time'])
+            if stage_state.get('end_time') and isinstance(stage_state['end_time'], str):
+                stage_state['end_time'] = datetime.fromisoformat(stage_state['end_time'])
+        return state_data
+    
+    def _serialize_state(self) -> Dict:
+        """深拷贝当前状态并将datetime转换为字符串"""
+        return self._to_json(self.state)
+    
+    @staticmethod
+    def _to_json(data):
+        def convert(value):
+            if isinstance(value, datetime):
+                return value.isoformat()
+            if isinstance(value, Enum):
+                return value.value
+            raise TypeError(f"无法序列化: {type(value)}")
+        return json.loads(json.dumps(data, default=convert, ensure_ascii=False))
     
     def _create_default_state(self) -> Dict:
         """创建默认状态"""
@@ -139,62 +271,37 @@ class MultiModeStateEngine:
         }
     
     def _save_state(self):
-        """保存当前状态"""
+        """写入快照：事件日志是权威数据，快照记录已包含的日志位置"""
         try:
-            # 确保目录存在
-            self.aceflow_dir.mkdir(parents=True, exist_ok=True)
-            
-            # 准备保存的数据
-            save_data = self.state.copy()
-            save_data['metadata']['last_updated'] = datetime.now().isoformat()
-            
-            # 转换datetime对象为字符串
-            for stage_id, stage_state in save_data.get('stage_states', {}).items():
-                if isinstance(stage_state.get('start_time'), datetime):
-                    stage_state['start_time'] = stage_state['start_time'].isoformat()
-                if isinstance(stage_state.get('end_time'), datetime):
-                    stage_state['end_time'] = stage_state['end_time'].isoformat()
-            
-            with open(self.state_file, 'w', encoding='utf-8') as f:
-                json.dump(save_data, f, indent=2, ensure_ascii=False)
+            with self._write_lock, self.events.lock():
+                # 先落盘暂存事件；持有日志锁并读到末尾，快照必然包含全部已追加的事件
+                if self._pending_events:
+                    foreign, _ = self.events.append_many(self._pending_events)
+                    self._apply_foreign(foreign)
+                    self._pending_events = []
+                self.refresh()
+                # 快照包含全部事件后才归档日志，新快照从新日志的起点开始
+                self.events.rotate(self.LOG_ROTATE_BYTES)
+                self.state['_events'] = {'offset': self.events.offset, 'seq': self.events.last_seq}
+                save_data = self._serialize_state()
+                self.store.write(save_data, check_version=False)
+                self.state['_version'] = save_data['_version']
                 
         except Exception as e:
             logger.error(f"保存状态失败: {e}")
     
     def get_stages_for_mode(self, mode: FlowMode) -> List[StageInfo]:
-        """获取指定模式的阶段列表"""
-        if not self.flow_modes or 'flow_modes' not in self.flow_modes:
-            return []
-        
-        mode_config = self.flow_modes['flow_modes'].get(mode.value, {})
-        stages_config = mode_config.get('stages', [])
-        
-        stages = []
-        for stage_config in stages_config:
-            stage = StageInfo(
-                id=stage_config['id'],
-                name=stage_config['name'],
-                display_name=stage_config['display_name'],
-                description=stage_config['description'],
-                duration_estimate=stage_config['duration_estimate'],
-                deliverables=stage_config['deliverables'],
-                next_stage=stage_config.get('next_stage'),
-                dependencies=stage_config.get('dependencies', [])
-            )
-            stages.append(stage)
-        
-        return stages
+        """获取指定模式的阶段列表（按依赖的拓扑顺序）"""
+        return list(self.flow_model(mode).stage_list)
     
     def get_current_stage_info(self) -> Optional[StageInfo]:
         """获取当前阶段信息"""
-        if not self.state.get('current_stage'):
-            return None
-        
-        stages = self.get_stages_for_mode(self.current_mode)
-        for stage in stages:
-            if stage.id == self.state['current_stage']:
-                return stage
-        return None
+        return self.flow_model().get(self.state.get('current_stage'))
+    
+    def get_stages_for_deliverable(self, deliverable: str) -> List[StageInfo]:
+        """查找产出指定交付物的阶段"""
+        model = self.flow_model()
+        return [model.stages[stage_id] for stage_id in model.stages_for_deliverable(deliverable)]
     
     def get_stage_state(self, stage_id: str) -> StageState:
         """获取阶段状态"""
@@ -212,109 +319,146 @@ class MultiModeStateEngine:
         )
     
     def update_stage_state(self, stage_id: str, **kwargs):
-        """更新阶段状态"""
-        if 'stage_states' not in self.state:
-            self.state['stage_states'] = {}
-        
-        if stage_id not in self.state['stage_states']:
-            self.state['stage_states'][stage_id] = {}
-        
-        stage_state = self.state['stage_states'][stage_id]
-        
-        # 更新状态字段
-        for key, value in kwargs.items():
-            if key == 'status' and isinstance(value, StageStatus):
-                stage_state[key] = value.value
-            elif key in ['start_time', 'end_time'] and isinstance(value, datetime):
-                stage_state[key] = value
-            else:
-                stage_state[key] = value
+        """更新阶段状态（追加一条 stage_updated 事件）"""
+        stage_state = self.state.get('stage_states', {}).get(stage_id, {})
+        changes = dict(kwargs)
         
         # 自动设置时间戳
         if 'status' in kwargs:
-            if kwargs['status'] == StageStatus.IN_PROGRESS and 'start_time' not in stage_state:
-                stage_state['start_time'] = datetime.now()
+            if kwargs['status'] == StageStatus.IN_PROGRESS and 'start_time' not in stage_state and 'start_time' not in kwargs:
+                changes['start_time'] = datetime.now()
             elif kwargs['status'] == StageStatus.COMPLETED:
-                stage_state['end_time'] = datetime.now()
-                stage_state['progress'] = 100
+                changes['end_time'] = datetime.now()
+                changes['progress'] = 100
         
-        self._save_state()
+        self._record_event(STAGE_UPDATED, stage_id, changes=changes)
         logger.info(f"更新阶段 {stage_id} 状态: {kwargs}")
     
+    def _set_current_stage(self, stage_id: Optional[str]):
+        """切换当前阶段（追加一条 current_stage_changed 事件）"""
+        self._record_event(CURRENT_STAGE_CHANGED, stage_id)
+    
     def start_stage(self, stage_id: str, assignee: Optional[str] = None) -> bool:
         """开始阶段"""
-        # 检查依赖
-        if not self._check_dependencies(stage_id):
-            logger.error(f"阶段 {stage_id} 的依赖条件未满足")
-            return False
+        # 状态和当前阶段的变更合并为一次日志写入
+        with self.batch():
+            # 检查依赖
+            if not self._check_dependencies(stage_id):
+                logger.error(f"阶段 {stage_id} 的依赖条件未满足")
+                return False
         
-        # 更新状态
-        self.update_stage_state(
-            stage_id,
-            status=StageStatus.IN_PROGRESS,
-            start_time=datetime.now(),
-            assignee=assignee
-        )
+            # 更新状态
+            self.update_stage_state(
+                stage_id,
+                status=StageStatus.IN_PROGRESS,
+                start_time=datetime.now(),
+                assignee=assignee
+            )
         
-        # 更新当前阶段
-        self.state['current_stage'] = stage_id
-        self._save_state()
+            # 更新当前阶段
+            self._set_current_stage(stage_id)
         
-        logger.info(f"开始阶段: {stage_id}")
-        return True
+            logger.info(f"开始阶段: {stage_id}")
+            return True
     
     def complete_stage(self, stage_id: str, notes: List[str] = None) -> bool:
         """完成阶段"""
-        stage_info = self._get_stage_info_by_id(stage_id)
-        if not stage_info:
-            logger.error(f"未找到阶段: {stage_id}")
-            return False
+        # 状态和当前阶段的变更合并为一次日志写入
+        with self.batch():
+            stage_info = self._get_stage_info_by_id(stage_id)
+            if not stage_info:
+                logger.error(f"未找到阶段: {stage_id}")
+                return False
         
-        # 检查交付物
-        if not self._check_deliverables(stage_id):
-            logger.warning(f"阶段 {stage_id} 的交付物尚未完成")
+            # 检查交付物
+            if not self._check_deliverables(stage_id):
+                logger.warning(f"阶段 {stage_id} 的交付物尚未完成")
         
-        # 更新状态
-        update_data = {
-            'status': StageStatus.COMPLETED,
-            'end_time': datetime.now(),
-            'progress': 100
-        }
+            # 更新状态
+            update_data = {
+                'status': StageStatus.COMPLETED,
+                'end_time': datetime.now(),
+                'progress': 100
+            }
         
-        if notes:
-            existing_notes = self.get_stage_state(stage_id).notes
-            update_data['notes'] = existing_notes + notes
+            if notes:
+                existing_notes = self.get_stage_state(stage_id).notes
+                update_data['notes'] = existing_notes + notes
         
-        self.update_stage_state(stage_id, **update_data)
+            self.update_stage_state(stage_id, **update_data)
         
-        # 移动到下一阶段
-        if stage_info.next_stage:
-            self.state['current_stage'] = stage_info.next_stage
-            self._save_state()
+            # 当前阶段完成后聚焦到下一个活跃阶段（DAG中可能同时有多个）
+            if self.state.get('current_stage') == stage_id:
+                active = self.get_active_stages()
+                if active:
+                    self._set_current_stage(active[0])
         
-        logger.info(f"完成阶段: {stage_id}")
-        return True
+            logger.info(f"完成阶段: {stage_id}")
+            return True
     
     def _get_stage_info_by_id(self, stage_id: str) -> Optional[StageInfo]:
         """根据ID获取阶段信息"""
-        stages = self.get_stages_for_mode(self.current_mode)
-        for stage in stages:
-            if stage.id == stage_id:
-                return stage
-        return None
+        return self.flow_model().get(stage_id)
     
     def _check_dependencies(self, stage_id: str) -> bool:
         """检查阶段依赖"""
-        stage_info = self._get_stage_info_by_id(stage_id)
-        if not stage_info or not stage_info.dependencies:
-            return True
-        
-        for dep_stage_id in stage_info.dependencies:
-            dep_state = self.get_stage_state(dep_stage_id)
-            if dep_state.status != StageStatus.COMPLETED:
-                return False
-        
-        return True
+        stage_states = self.state.get('stage_states', {})
+        return all(
+            stage_states.get(dep_stage_id, {}).get('status') in DONE_STATUSES
+            for dep_stage_id in self.flow_model().predecessors.get(stage_id, ())
+        )
+    
+    def _stage_progress_sets(self) -> Tuple[set, set]:
+        """返回 (已结束的阶段, 已开始未结束的阶段)"""
+        done, started = set(), set()
+        for stage_id, stage_state in self.state.get('stage_states', {}).items():
+            status = stage_state.get('status')
+            if status in DONE_STATUSES:
+                done.add(stage_id)
+            elif status in (StageStatus.IN_PROGRESS.value, StageStatus.BLOCKED.value):
+                started.add(stage_id)
+        return done, started
+    
+    def get_ready_stages(self) -> List[str]:
+        """依赖已全部满足、可以立即开始的阶段"""
+        done, started = self._stage_progress_sets()
+        return list(self.flow_model().ready_stages(done, started))
+    
+    def get_active_stages(self) -> List[str]:
+        """活跃阶段：进行中的阶段和可以立即开始的阶段（按拓扑顺序）"""
+        model = self.flow_model()
+        done, started = self._stage_progress_sets()
+        active = started.union(model.ready_stages(done, started))
+        return [stage_id for stage_id in model.order if stage_id in active]
+    
+    def get_schedule(self) -> Dict:
+        """按剩余工作量计算各阶段最早开始/完成时间（小时）和关键路径
+        
+        已结束阶段剩余工期为0，进行中阶段按进度折算预估工期。
+        """
+        model = self.flow_model()
+        remaining = {}
+        for stage_id in model.order:
+            state = self.get_stage_state(stage_id)
+            if state.status.value in DONE_STATUSES:
+                remaining[stage_id] = 0.0
+            elif state.status == StageStatus.IN_PROGRESS:
+                remaining[stage_id] = model.expected_hours(stage_id) * (100 - state.progress) / 100
+        
+        schedule = model.earliest_finish(remaining)
+        critical_path, total_hours = model.critical_path(remaining)
+        return {
+            'mode': self.current_mode.value,
+            'remaining_hours': round(total_hours, 1),
+            'critical_path': critical_path,
+            'stages': {
+                stage_id: {
+                    'earliest_start': round(start, 1),
+                    'earliest_finish': round(finish, 1)
+                }
+                for stage_id, (start, finish) in schedule.items()
+            }
+        }
     
     def _check_deliverables(self, stage_id: str) -> bool:
         """检查交付物完成情况"""
@@ -332,14 +476,16 @@ class MultiModeStateEngine:
     
     def update_deliverable_status(self, stage_id: str, deliverable: str, completed: bool):
         """更新交付物状态"""
-        stage_state_data = self.state.get('stage_states', {}).get(stage_id, {})
-        deliverables_status = stage_state_data.get('deliverables_status', {})
-        deliverables_status[deliverable] = completed
+        # 交付物状态和进度合并为一次日志写入
+        with self.batch():
+            stage_state_data = self.state.get('stage_states', {}).get(stage_id, {})
+            deliverables_status = dict(stage_state_data.get('deliverables_status', {}))
+            deliverables_status[deliverable] = completed
         
-        self.update_stage_state(stage_id, deliverables_status=deliverables_status)
+            self.update_stage_state(stage_id, deliverables_status=deliverables_status)
         
-        # 自动更新进度
-        self._update_stage_progress(stage_id)
+            # 自动更新进度
+            self._update_stage_progress(stage_id)
     
     def _update_stage_progress(self, stage_id: str):
         """自动更新阶段进度"""
@@ -358,33 +504,44 @@ class MultiModeStateEngine:
     
     def switch_flow_mode(self, new_mode: FlowMode, preserve_progress: bool = True) -> bool:
         """切换流程模式"""
-        if new_mode == self.current_mode:
-            logger.info(f"已经是 {new_mode.value} 模式")
-            return True
-        
-        old_mode = self.current_mode
-        
-        # 如果保留进度，尝试映射状态
-        if preserve_progress:
-            success = self._migrate_state(old_mode, new_mode)
-            if not success:
-                logger.error(f"从 {old_mode.value} 到 {new_mode.value} 的状态迁移失败")
-                return False
-        else:
-            # 重置状态
-            self.state = self._create_default_state()
-        
-        # 更新模式
-        self.current_mode = new_mode
-        self.state['flow_mode'] = new_mode.value
-        
-        # 更新配置文件
-        self.config['flow']['mode'] = new_mode.value
-        self._save_config()
-        self._save_state()
+        # 配置和状态替换事件合并落盘
+        with self.batch():
+            if new_mode == self.current_mode:
+                logger.info(f"已经是 {new_mode.value} 模式")
+                return True
+        
+            old_mode = self.current_mode
+            self.refresh()
+        
+            # 如果保留进度，尝试映射状态
+            if preserve_progress:
+                success = self._migrate_state(old_mode, new_mode)
+                if not success:
+                    logger.error(f"从 {old_mode.value} 到 {new_mode.value} 的状态迁移失败")
+                    return False
+            else:
+                # 重置状态
+                self.state = self._create_default_state()
+        
+            # 更新模式
+            self.current_mode = new_mode
+            self.state['flow_mode'] = new_mode.value
+        
+            # 更新配置文件
+            self.config['flow']['mode'] = new_mode.value
+            self._save_config()
+        
+            # 整体替换阶段状态，记录事件后立即写快照
+            self._record_event(
+                STATE_REPLACED,
+                flow_mode=self.state['flow_mode'],
+                current_stage=self.state.get('current_stage'),
+                stage_states=self.state.get('stage_states', {})
+            )
+            self._save_state()
         
-        logger.info(f"切换流程模式: {old_mode.value} -> {new_mode.value}")
-        return True
+            logger.info(f"切换流程模式: {old_mode.value} -> {new_mode.value}")
+            return True
     
     def _migrate_state(self, old_mode: FlowMode, new_mode: FlowMode) -> bool:
         """迁移状态数据"""
@@ -548,13 +705,27 @@ class MultiModeStateEngine:
         return merged_state
     
     def _save_config(self):
-        """保存配置文件"""
+        """保存配置文件（批量或延迟写入模式下推迟到 flush）"""
+        with self._write_lock:
+            if self._batch_depth > 0 or self._write_behind_delay is not None:
+                self._config_dirty = True
+                if self._batch_depth == 0:
+                    self._schedule_flush()
+                return
+        self._write_config()
+    
+    def _write_config(self):
         try:
             with open(self.config_file, 'w', encoding='utf-8') as f:
                 yaml.dump(self.config, f, default_flow_style=False, allow_unicode=True)
         except Exception as e:
             logger.error(f"保存配置失败: {e}")
     
+    def forecast_completion(self, runs: int = 2000, seed: Optional[int] = None) -> Dict:
+        """蒙特卡洛预测剩余工期：P50/P90 完成日期和关键路径"""
+        forecaster = ScheduleForecaster(self.flow_model(), self.state.get('stage_states', {}))
+        return forecaster.forecast(runs=runs, seed=seed)
+    
     def get_flow_summary(self) -> Dict:
         """获取流程摘要"""
         stages = self.get_stages_for_mode(self.current_mode)
@@ -582,6 +753,7 @@ class MultiModeStateEngine:
         return {
             'mode': self.current_mode.value,
             'current_stage': self.state.get('current_stage'),
+            'active_stages': self.get_active_stages(),
             'overall_progress': overall_progress,
             'completed_stages': completed_stages,
             'total_stages': len(stages),
@@ -631,17 +803,18 @@ class MultiModeStateEngine:
                     'priority': 'high'
                 })
         
-        elif current_state.status == StageStatus.COMPLETED:
-            # 建议进入下一阶段
-            if current_stage.next_stage:
-                next_stage = self._get_stage_info_by_id(current_stage.next_stage)
-                if next_stage:
-                    actions.append({
-                        'type': 'start_next_stage',
-                        'title': f'开始 {next_stage.display_name}',
-                        'description': next_stage.description,
-                        'priority': 'high'
-                    })
+        # 依赖已满足的其他阶段可以开始（当前阶段完成后为下一批阶段，否则可并行开始）
+        current_done = current_state.status.value in DONE_STATUSES
+        for stage_id in self.get_ready_stages():
+            if stage_id == current_stage_id:
+                continue
+            stage = self._get_stage_info_by_id(stage_id)
+            actions.append({
+                'type': 'start_next_stage' if current_done else 'start_parallel_stage',
+                'title': f'开始 {stage.display_name}',
+                'description': stage.description,
+                'priority': 'high' if current_done else 'medium'
+            })
         
         return actions
 
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+AceFlow 进度预测 v2.0
+基于阶段DAG的蒙特卡洛工期模拟，输出 P50/P90 完成日期和关键路径
+"""
+
+import math
+import random
+import statistics
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Any, Tuple
+
+from core.flow_model import FlowModeModel, HOURS_PER_UNIT
+
+# 可选依赖：有 NumPy 时整批向量化模拟；首次模拟时才导入，避免拖慢状态引擎的加载
+_numpy = None
+
+
+def _load_numpy():
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = False
+    return _numpy or None
+
+HOURS_PER_DAY = HOURS_PER_UNIT['天']
+# 工作时间（每天 HOURS_PER_DAY 小时）
+WORKDAY_START = 9
+WORKDAY_END = WORKDAY_START + HOURS_PER_DAY
+DONE_STATUSES = ('completed', 'skipped')
+# 实际/预估工期比的取值范围，避免个别异常记录主导预测
+CALIBRATION_BOUNDS = (0.25, 4.0)
+
+
+def _parse_time(value) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(value) if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _next_working_day(day: datetime) -> datetime:
+    """下一个工作日的上班时间"""
+    day = (day + timedelta(days=1)).replace(hour=WORKDAY_START, minute=0, second=0, microsecond=0)
+    while day.weekday() >= 5:
+        day += timedelta(days=1)
+    return day
+
+
+def _working_moment(moment: datetime) -> datetime:
+    """不在工作时间内时顺延到最近的上班时间"""
+    if moment.weekday() >= 5 or moment.hour >= WORKDAY_END:
+        return _next_working_day(moment)
+    if moment.hour < WORKDAY_START:
+        return moment.replace(hour=WORKDAY_START, minute=0, second=0, microsecond=0)
+    return moment
+
+
+def add_working_hours(start: datetime, hours: float) -> datetime:
+    """按工作日 09:00-17:00、跳过周末，将工作小时数换算为日历时间"""
+    current = _working_moment(start)
+    days, remainder = divmod(hours, HOURS_PER_DAY)
+    # 恰好整天时落在当天下班时间，而不是下一个工作日的上班时间
+    if days >= 1 and remainder == 0:
+        days, remainder = days - 1, HOURS_PER_DAY
+    while days >= 1:
+        current += timedelta(days=1)
+        if current.weekday() < 5:
+            days -= 1
+    
+    end_of_day = current.replace(hour=WORKDAY_END, minute=0, second=0, microsecond=0)
+    left_today = (end_of_day - current).total_seconds() / 3600
+    if remainder <= left_today:
+        return current + timedelta(hours=remainder)
+    return _next_working_day(current) + timedelta(hours=remainder - left_today)
+
+
+def _triangular_ppf(u: float, low: float, mode: float, high: float) -> float:
+    """三角分布的逆CDF（low == high 时退化为常数）"""
+    span = high - low
+    if span <= 0:
+        return low
+    cut = (mode - low) / span
+    if u < cut:
+        return low + math.sqrt(u * span * (mode - low))
+    return high - math.sqrt((1 - u) * span * (high - mode))
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    """线性插值百分位（输入已排序）"""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+class ScheduleForecaster:
+    """流程模式的工期预测
+
+    每个阶段的工期服从三角分布：区间取自 duration_estimate/typical_duration，
+    众数取区间中值；已完成阶段的实际耗时与预估的比值（中位数）用于整体校准。
+    已结束的阶段剩余工期为0，进行中的阶段按进度折算。
+    """
+
+    def __init__(self, model: FlowModeModel, stage_states: Optional[Dict[str, Dict]] = None):
+        self.model = model
+        self.stage_states = stage_states or {}
+        self.calibration = self._calibration_factor()
+
+    def _calibration_factor(self) -> float:
+        """已完成阶段的实际/预估工期比（中位数），无观测数据时为1"""
+        ratios = []
+        for stage_id, stage_state in self.stage_states.items():
+            if stage_state.get('status') != 'completed' or stage_id not in self.model:
+                continue
+            start = _parse_time(stage_state.get('start_time'))
+            end = _parse_time(stage_state.get('end_time'))
+            expected = self.model.expected_hours(stage_id)
+            if not start or not end or end <= start or expected <= 0:
+                continue
+            # 日历耗时按每天工作小时数折算为工作小时
+            worked = (end - start).total_seconds() / 3600 * HOURS_PER_DAY / 24
+            ratios.append(worked / expected)
+        if not ratios:
+            return 1.0
+        low, high = CALIBRATION_BOUNDS
+        return min(max(statistics.median(ratios), low), high)
+
+    def _stage_params(self) -> List[Tuple[float, float, float, float]]:
+        """按拓扑顺序返回每个阶段的 (最短, 众数, 最长, 剩余比例)"""
+        params = []
+        for stage_id in self.model.order:
+            low, high = self.model.duration_ranges[stage_id]
+            low, high = low * self.calibration, high * self.calibration
+            stage_state = self.stage_states.get(stage_id, {})
+            if stage_state.get('status') in DONE_STATUSES:
+                remaining = 0.0
+            elif stage_state.get('status') == 'in_progress':
+                remaining = 1 - min(max(stage_state.get('progress', 0), 0), 100) / 100
+            else:
+                remaining = 1.0
+            params.append((low, (low + high) / 2, high, remaining))
+        return params
+
+    def simulate(self, runs: int = 2000, seed: Optional[int] = None) -> Tuple[List[float], Dict[str, float], str]:
+        """模拟 runs 次，返回 (排序后的总剩余工时, 各阶段处于关键路径的比例, 使用的实现)"""
+        np = _load_numpy()
+        if np is not None:
+            return self._simulate_numpy(np, runs, seed)
+        return self._simulate_python(runs, seed)
+
+    def _simulate_numpy(self, np, runs, seed):
+        order = self.model.order
+        index = {stage_id: i for i, stage_id in enumerate(order)}
+        params = np.array(self._stage_params(), dtype=float).reshape(-1, 4)
+        low, mode, high, remaining = params.T
+
+        rng = np.random.default_rng(seed)
+        u = rng.random((runs, len(order)))
+        span = high - low
+        safe_span = np.where(span > 0, span, 1.0)
+        cut = np.where(span > 0, (mode - low) / safe_span, 0.0)
+        durations = np.where(
+            u < cut,
+            low + np.sqrt(u * span * (mode - low)),
+            high - np.sqrt((1 - u) * span * (high - mode))
+        )
+        durations = np.where(span > 0, durations, low) * remaining
+
+        finish = np.zeros_like(durations)
+        for i, stage_id in enumerate(order):
+            preds = [index[dep] for dep in self.model.predecessors[stage_id]]
+            start = finish[:, preds].max(axis=1) if preds else 0.0
+            finish[:, i] = start + durations[:, i]
+        total = finish.max(axis=1) if order else np.zeros(runs)
+
+        # 反向计算最晚完成时间，总时差为0的阶段在该次模拟中处于关键路径
+        latest = np.repeat(total[:, None], len(order), axis=1)
+        for i in reversed(range(len(order))):
+            succs = [index[child] for child in self.model.successors[order[i]]]
+            if succs:
+                latest[:, i] = (latest[:, succs] - durations[:, succs]).min(axis=1)
+        critical = np.isclose(latest, finish)
+        criticality = {stage_id: float(critical[:, i].mean()) for i, stage_id in enumerate(order)}
+        return np.sort(total).tolist(), criticality, 'numpy'
+
+    def _simulate_python(self, runs, seed):
+        order = self.model.order
+        count = len(order)
+        index = {stage_id: i for i, stage_id in enumerate(order)}
+        preds = [[index[dep] for dep in self.model.predecessors[stage_id]] for stage_id in order]
+        succs = [[index[child] for child in self.model.successors[stage_id]] for stage_id in order]
+        params = self._stage_params()
+        rand = random.Random(seed).random
+        totals = []
+        critical_counts = [0] * count
+
+        for _ in range(runs):
+            durations = [_triangular_ppf(rand(), low, mode, high) * remaining
+                         for low, mode, high, remaining in params]
+            finish = [0.0] * count
+            for i in range(count):
+                start = max([finish[dep] for dep in preds[i]]) if preds[i] else 0.0
+                finish[i] = start + durations[i]
+            total = max(finish) if count else 0.0
+
+            latest = [total] * count
+            for i in range(count - 1, -1, -1):
+                if succs[i]:
+                    latest[i] = min([latest[child] - durations[child] for child in succs[i]])
+                if abs(latest[i] - finish[i]) <= 1e-9 * max(total, 1.0):
+                    critical_counts[i] += 1
+            totals.append(total)
+
+        totals.sort()
+        criticality = {stage_id: critical_counts[i] / runs for i, stage_id in enumerate(order)}
+        return totals, criticality, 'python'
+
+    def forecast(self, runs: int = 2000, seed: Optional[int] = None,
+                 now: Optional[datetime] = None) -> Dict[str, Any]:
+        """生成预测：P50/P90 剩余工时与完成日期、关键路径及各阶段的关键度"""
+        now = now or datetime.now()
+        runs = max(int(runs), 1)
+        totals, criticality, backend = self.simulate(runs, seed)
+        p50 = _percentile(totals, 50)
+        p90 = _percentile(totals, 90)
+
+        # 关键路径取中值工期下的确定性关键路径，只列出仍有剩余工作的阶段
+        params = dict(zip(self.model.order, self._stage_params()))
+        median_durations = {stage_id: mode * remaining for stage_id, (_, mode, _, remaining) in params.items()}
+        critical_path, _ = self.model.critical_path(median_durations)
+        pending = [stage_id for stage_id in self.model.order if params[stage_id][3] > 0]
+
+        return {
+            'mode': self.model.mode,
+            'runs': runs,
+            'backend': backend,
+            'calibration': round(self.calibration, 3),
+            'p50_hours': round(p50, 1),
+            'p90_hours': round(p90, 1),
+            'p50_date': add_working_hours(now, p50).isoformat(timespec='minutes'),
+            'p90_date': add_working_hours(now, p90).isoformat(timespec='minutes'),
+            'critical_path': [stage_id for stage_id in critical_path if stage_id in pending],
+            'criticality': {stage_id: round(criticality[stage_id], 3) for stage_id in pending}
+        }
@@ -1,13 +1,14 @@
-import json
 import os
 from datetime import datetime
 from utils.config_loader import load_config
+from core.state_store import StateStore, retry_on_conflict
 
 class PATEOASStateEngineEnhanced:
     def __init__(self, project_root='.'):
         self.project_root = project_root
         self.config = load_config('dynamic_thresholds.json')
         self.state_file = os.path.join(project_root, '.aceflow', 'current_state.json')
+        self.store = StateStore(self.state_file)
         self.stage_definitions = {
             'S1': {'name': '用户故事细化', 'next_stage': 'S2', 'required_output': 's1_user_story.md', 'dependencies': []},
             'S2': {'name': '任务拆分', 'next_stage': 'S3', 'required_output': 's2_tasks.md', 'dependencies': ['S1']},
@@ -22,9 +23,10 @@ class PATEOASStateEngineEnhanced:
         # 初始化状态目录
         os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
         
-        # 初始化状态文件
-        if not os.path.exists(self.state_file):
-            self.initialize_state()
+        # 初始化状态文件（持锁检查，避免并发初始化覆盖已有状态）
+        with self.store.lock():
+            if not self.store.exists():
+                self.initialize_state()
 
     def initialize_state(self):
         """初始化项目状态"""
@@ -44,16 +46,18 @@ class PATEOASStateEngineEnhanced:
         return initial_state
 
     def get_current_state(self):
-        """获取当前状态"""
-        with open(self.state_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        """获取当前状态（带版本号）"""
+        state = self.store.read()
+        if state is None:
+            raise FileNotFoundError(f"状态文件不存在: {self.state_file}")
+        return state
 
     def save_state(self, state_data):
-        """保存状态数据"""
+        """原子保存状态数据，状态已被其他写入方更新时抛出 StateConflictError"""
         state_data['last_updated'] = datetime.now().isoformat()
-        with open(self.state_file, 'w', encoding='utf-8') as f:
-            json.dump(state_data, f, ensure_ascii=False, indent=2)
+        self.store.write(state_data)
 
+    @retry_on_conflict
     def update_stage_progress(self, stage_id, progress, memory_ids=None):
         """更新阶段进度，包含前置条件检查"""
         state = self.get_current_state()
@@ -116,6 +120,7 @@ class PATEOASStateEngineEnhanced:
                 return True
         return False
 
+    @retry_on_conflict
     def record_abnormality(self, stage_id, issue_description, severity='medium'):
         """记录异常状态"""
         state = self.get_current_state()
@@ -133,6 +138,7 @@ class PATEOASStateEngineEnhanced:
         self.save_state(state)
         return abnormality
 
+    @retry_on_conflict
     def resolve_abnormality(self, abnormality_id):
         """解决异常状态"""
         state = self.get_current_state()
@@ -192,6 +198,7 @@ class PATEOASStateEngineEnhanced:
                 
         return suggestions
 
+    @retry_on_conflict
     def associate_output_to_stage(self, stage_id, output_path):
         """关联输出产物到阶段"""
         state = self.get_current_state()
@@ -203,6 +210,7 @@ class PATEOASStateEngineEnhanced:
             self.save_state(state)
         return True
 
+    @retry_on_conflict
     def record_stage_review(self, stage_id, review_result):
         """记录阶段评审结果"""
         state = self.get_current_state()
@@ -213,6 +221,7 @@ class PATEOASStateEngineEnhanced:
         self.save_state(state)
         return True
 
+    @retry_on_conflict
     def revert_to_stage(self, target_stage):
         """回退到指定阶段"""
         state = self.get_current_state()
@@ -0,0 +1,214 @@
+import os
+import json
+import getpass
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+from core.tracing import traced
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# 事件类型
+STAGE_UPDATED = 'stage_updated'
+CURRENT_STAGE_CHANGED = 'current_stage_changed'
+STATE_REPLACED = 'state_replaced'
+
+
+def default_actor():
+    """事件的操作者，可通过 ACEFLOW_ACTOR 环境变量指定（如 Agent 名称）"""
+    actor = os.environ.get('ACEFLOW_ACTOR')
+    if actor:
+        return actor
+    try:
+        return getpass.getuser()
+    except Exception:
+        return 'unknown'
+
+
+def apply_event(state, event):
+    """将单个事件应用到状态字典（时间字段保持ISO字符串）"""
+    event_type = event.get('type')
+    if event_type == STAGE_UPDATED:
+        stage_state = state.setdefault('stage_states', {}).setdefault(event['stage_id'], {})
+        stage_state.update(event.get('changes', {}))
+    elif event_type == CURRENT_STAGE_CHANGED:
+        state['current_stage'] = event.get('stage_id')
+    elif event_type == STATE_REPLACED:
+        for key in ('flow_mode', 'current_stage', 'stage_states'):
+            if key in event:
+                state[key] = event[key]
+    state.setdefault('metadata', {})['last_updated'] = event.get('ts')
+    return state
+
+
+def replay(state, events):
+    """依次重放事件"""
+    for event in events:
+        apply_event(state, event)
+    return state
+
+
+class StageEventLog:
+    """阶段状态的追加式事件日志（JSONL）
+
+    日志对象记录已读取到的位置（字节偏移和序号）。追加时在锁内先读出其他进程
+    新写入的事件返回给调用方，再写入自己的事件，因此每次写入都是 O(1) 追加。
+    日志过大时改名归档为 <日志名>.<最后序号>；读取位置与文件不符时按序号从归档补读。
+    """
+
+    def __init__(self, path, durable=True):
+        self.path = str(path)
+        self.lock_path = self.path + '.lock'
+        self.durable = durable
+        self.offset = 0
+        self.last_seq = 0
+        self._thread_lock = threading.RLock()
+        self._lock_file = None
+        self._lock_depth = 0
+
+    @contextmanager
+    def lock(self):
+        """独占锁（进程内可重入）"""
+        with self._thread_lock:
+            if self._lock_depth == 0:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                self._lock_file = open(self.lock_path, 'a+')
+                if fcntl is not None:
+                    fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0:
+                    if fcntl is not None:
+                        fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+                    self._lock_file.close()
+                    self._lock_file = None
+
+    def seek(self, offset, last_seq):
+        """从快照记录的位置开始读取"""
+        self.offset = offset
+        self.last_seq = last_seq
+
+    @staticmethod
+    def _scan(path, offset):
+        """读取 offset 之后的完整行，返回 (事件列表, 读到的位置)；offset 超出文件长度时事件为 None"""
+        events = []
+        try:
+            with open(path, 'rb') as f:
+                if offset > os.fstat(f.fileno()).st_size:
+                    return None, offset
+                f.seek(offset)
+                for line in f:
+                    # 末尾不完整的行（写入中途崩溃）留待下次读取
+                    if not line.endswith(b'\n'):
+                        break
+                    offset += len(line)
+                    try:
+                        events.append(json.loads(line.decode('utf-8')))
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            if offset > 0:
+                return None, offset
+        return events, offset
+
+    def _archives(self):
+        """已归档的日志 [(最后序号, 路径)]，按序号排序"""
+        directory = os.path.dirname(self.path) or '.'
+        prefix = os.path.basename(self.path) + '.'
+        archives = []
+        try:
+            names = os.listdir(directory)
+        except FileNotFoundError:
+            return archives
+        for name in names:
+            suffix = name[len(prefix):]
+            if name.startswith(prefix) and suffix.isdigit():
+                archives.append((int(suffix), os.path.join(directory, name)))
+        return sorted(archives)
+
+    @traced("state.events.read_new")
+    def read_new(self):
+        """读取当前位置之后的事件并前移位置"""
+        events, offset = self._scan(self.path, self.offset)
+        if events is None or (events and events[0].get('seq', self.last_seq + 1) != self.last_seq + 1):
+            # 日志已被轮转（或快照来自旧日志）：偏移不再有效，按序号从归档和当前日志补读
+            since = self.last_seq
+            events = []
+            for last_seq, path in self._archives():
+                if last_seq > since:
+                    events.extend(event for event in self._scan(path, 0)[0] if event.get('seq', 0) > since)
+            current, offset = self._scan(self.path, 0)
+            events.extend(event for event in current if event.get('seq', 0) > since)
+        self.offset = offset
+        for event in events:
+            self.last_seq = max(self.last_seq, event.get('seq', 0))
+        return events
+
+    def rotate(self, max_bytes):
+        """日志超过 max_bytes 时归档，之后的事件写入新文件；返回是否轮转"""
+        with self.lock():
+            self.read_new()
+            try:
+                size = os.path.getsize(self.path)
+            except FileNotFoundError:
+                return False
+            if size < max_bytes or self.last_seq == 0:
+                return False
+            os.replace(self.path, f"{self.path}.{self.last_seq}")
+            self.offset = 0
+            return True
+
+    def append(self, event):
+        """追加事件，返回 (其他写入方新追加的事件, 带序号的本事件)"""
+        foreign, events = self.append_many([event])
+        return foreign, events[0]
+
+    @traced("state.events.append")
+    def append_many(self, events):
+        """一次写入（一次 fsync）追加多个事件，返回 (其他写入方新追加的事件, 带序号的事件列表)"""
+        with self.lock():
+            foreign = self.read_new()
+            stamped = []
+            for event in events:
+                event = dict(event, seq=self.last_seq + len(stamped) + 1)
+                event.setdefault('ts', datetime.now().isoformat())
+                stamped.append(event)
+            payload = b''.join(
+                (json.dumps(event, ensure_ascii=False) + '\n').encode('utf-8') for event in stamped
+            )
+
+            with open(self.path, 'ab') as f:
+                # 跳过之前崩溃留下的半行，保证新事件独占一行
+                if f.tell() > self.offset:
+                    f.write(b'\n')
+                f.write(payload)
+                f.flush()
+                if self.durable:
+                    os.fsync(f.fileno())
+                self.offset = f.tell()
+            if stamped:
+                self.last_seq = stamped[-1]['seq']
+        return foreign, stamped
+
+    def iter_events(self, stage_id=None):
+        """遍历全部事件（审计历史，含归档）"""
+        paths = [path for _, path in self._archives()] + [self.path]
+        for path in paths:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            event = json.loads(line)
+                        except ValueError:
+                            continue
+                        if stage_id is None or event.get('stage_id') == stage_id:
+                            yield event
+            except FileNotFoundError:
+                continue
@@ -0,0 +1,166 @@
+import os
+import json
+import copy
+import time
+import random
+import functools
+import threading
+from contextlib import contextmanager, nullcontext
+
+from core.tracing import traced
+
+try:
+    import fcntl
+except ImportError:
+    # Windows 下没有 fcntl，仅保留原子替换
+    fcntl = None
+
+# 文档内的版本号字段
+VERSION_KEY = '_version'
+
+
+class StateConflictError(Exception):
+    """状态文件已被其他写入方更新"""
+
+
+def retry_on_conflict(method=None, retries=3):
+    """版本冲突时重新执行整个读-改-写方法（方法内部须重新读取状态）
+
+    乐观重试 retries 次仍冲突时，持有 self.store 的独占锁执行最后一次，保证高争用下也能完成。
+    """
+    if method is None:
+        return functools.partial(retry_on_conflict, retries=retries)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        for attempt in range(retries):
+            try:
+                return method(self, *args, **kwargs)
+            except StateConflictError:
+                # 随机退避，避免多个写入方同步重试
+                time.sleep(random.uniform(0, 0.002 * (attempt + 1)))
+        with self.store.lock():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class StateStore:
+    """原子写入、加锁、带版本号的JSON状态文件
+
+    写入先落到同目录临时文件并 fsync，再用 os.replace 替换，崩溃时不会留下半截JSON；
+    写入过程持有 fcntl 建议锁；每次写入版本号加一，写入方携带读取时的版本号，
+    版本不一致时拒绝写入，由调用方重新读取后重试。
+    """
+
+    def __init__(self, path, max_retries=3, indent=2):
+        self.path = str(path)
+        self.lock_path = self.path + '.lock'
+        self.max_retries = max_retries
+        self.indent = indent
+        self._thread_lock = threading.RLock()
+        self._lock_file = None
+        self._lock_depth = 0
+
+    @contextmanager
+    def lock(self):
+        """独占锁（进程内可重入）"""
+        with self._thread_lock:
+            if self._lock_depth == 0:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                self._lock_file = open(self.lock_path, 'a+')
+                if fcntl is not None:
+                    fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0:
+                    if fcntl is not None:
+                        fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+                    self._lock_file.close()
+                    self._lock_file = None
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    @traced("state.read")
+    def read(self, default=None):
+        """读取状态，文件不存在时返回 default；返回的字典带有版本号"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return default
+        data.setdefault(VERSION_KEY, 0)
+        return data
+
+    def current_version(self):
+        data = self.read()
+        return data[VERSION_KEY] if data is not None else 0
+
+    def write(self, data, check_version=True):
+        """原子写入，返回新版本号；data 携带的版本号与磁盘不一致时抛出 StateConflictError"""
+        with self.lock():
+            current = self.current_version()
+            expected = data.get(VERSION_KEY)
+            if check_version and expected is not None and expected != current:
+                raise StateConflictError(
+                    f"{self.path} 已被更新（期望版本 {expected}，当前版本 {current}）"
+                )
+            data[VERSION_KEY] = current + 1
+            self._atomic_write(data)
+            return data[VERSION_KEY]
+
+    def update(self, mutate, default=None):
+        """乐观并发的读-改-写：mutate 原地修改状态（或返回新状态），版本冲突时重新读取并重试"""
+        for attempt in range(self.max_retries + 1):
+            # 最后一次持锁执行，保证完成
+            with (self.lock() if attempt == self.max_retries else nullcontext()):
+                state = self.read(default=copy.deepcopy(default))
+                if state is None:
+                    raise FileNotFoundError(self.path)
+                result = mutate(state)
+                if result is not None:
+                    result.setdefault(VERSION_KEY, state.get(VERSION_KEY))
+                    state = result
+                try:
+                    self.write(state)
+                    return state
+                except StateConflictError:
+                    time.sleep(random.uniform(0, 0.002 * (attempt + 1)))
+
+    @traced("state.write")
+    def _atomic_write(self, data):
+        directory = os.path.dirname(self.path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=self.indent, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        self._fsync_dir(directory)
+
+    @staticmethod
+    def _fsync_dir(directory):
+        """同步目录项，保证替换在掉电后仍然生效"""
+        if not hasattr(os, 'O_DIRECTORY'):
+            return
+        try:
+            fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
@@ -0,0 +1,22 @@
+"""
+AceFlow v2.0 性能追踪
+复用 ai/engines/tracing，状态引擎、记忆池与决策引擎的计时记录在同一处
+"""
+
+import sys
+from pathlib import Path
+
+# 只把 ai 目录追加到路径末尾：scripts/cli 是常规包，优先于 ai/cli 命名空间包
+_AI_DIR = str(Path(__file__).resolve().parent.parent.parent / "ai")
+if _AI_DIR not in sys.path:
+    sys.path.append(_AI_DIR)
+
+from engines.tracing import (  # noqa: E402
+    span, traced, enable, disable, is_enabled, reset, histograms,
+    chrome_trace, write_chrome_trace, format_breakdown
+)
+
+__all__ = [
+    "span", "traced", "enable", "disable", "is_enabled", "reset", "histograms",
+    "chrome_trace", "write_chrome_trace", "format_breakdown"
+]
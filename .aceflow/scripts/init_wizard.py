@@ -351,6 +351,14 @@ class AceFlowInitWizard:
         
         with open(self.aceflow_dir / "current_state.json", 'w') as f:
             json.dump(initial_state, f, indent=2)
+        
+        # 重新初始化时归档旧的状态事件日志（含轮转出的 state_events.jsonl.<序号>），避免旧进度被重放到新状态上
+        stamp = datetime.now().strftime('%Y%m%d%H%M%S')
+        for events_file in self.aceflow_dir.glob("state_events.jsonl*"):
+            if events_file.name == "state_events.jsonl":
+                events_file.rename(self.aceflow_dir / f"state_events.{stamp}.jsonl")
+            elif events_file.suffix[1:].isdigit():
+                events_file.rename(self.aceflow_dir / f"state_events.{stamp}.jsonl{events_file.suffix}")
     
     def _generate_initial_templates(self, flow_mode: str):
         """生成初始模板文件"""
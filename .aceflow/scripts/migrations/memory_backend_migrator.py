@@ -0,0 +1,65 @@
+import os
+import sys
+import argparse
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from core.memory_backends import create_backend, BACKENDS
+from core.memory_pool import GlobalMemoryPool
+
+
+class MemoryBackendMigrator:
+    """在记忆存储后端之间迁移数据（保留记忆ID和阶段关联）"""
+
+    def __init__(self, source='file', target='sqlite', storage_path=None):
+        pool = GlobalMemoryPool(backend=source)
+        self.storage_path = storage_path or pool.storage_path
+        if self.storage_path == pool.storage_path:
+            self.source = pool.backend
+        else:
+            pool.backend.close()
+            self.source = create_backend(source, self.storage_path, pool.memory_types)
+        self.target = create_backend(target, self.storage_path, pool.memory_types)
+
+    def migrate(self):
+        """执行迁移，返回迁移的记忆数和关联数"""
+        memory_count = 0
+        for memory in self.source.iter_memories():
+            self.target.put(memory)
+            memory_count += 1
+
+        link_count = 0
+        for stage_id, memory_ids in self.source.all_links().items():
+            for memory_id in memory_ids:
+                self.target.link(memory_id, stage_id)
+                link_count += 1
+
+        self.source.close()
+        self.target.close()
+        return memory_count, link_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='AceFlow 记忆存储后端迁移工具')
+    parser.add_argument('--from', dest='source', choices=sorted(BACKENDS), default='file', help='源存储后端')
+    parser.add_argument('--to', dest='target', choices=sorted(BACKENDS), default='sqlite', help='目标存储后端')
+    parser.add_argument('--storage-path', help='记忆池目录（默认读取 workflow_rules.json）')
+    args = parser.parse_args()
+
+    if args.source == args.target:
+        print("源后端与目标后端相同，无需迁移")
+        return 1
+
+    if args.storage_path and not os.path.isdir(args.storage_path):
+        print(f"记忆池目录不存在: {args.storage_path}")
+        return 1
+
+    migrator = MemoryBackendMigrator(args.source, args.target, args.storage_path)
+    memory_count, link_count = migrator.migrate()
+    print(f"迁移完成: {memory_count} 条记忆, {link_count} 条阶段关联 ({args.source} → {args.target})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
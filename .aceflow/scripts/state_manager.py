@@ -5,16 +5,18 @@ AceFlow 状态管理器
 用于更新和查询流程状态。
 """
 
-import json
 import sys
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, Any, Optional
 
+from core.state_store import StateStore, retry_on_conflict
+
 class StateManager:
     """管理 state.json 文件的类"""
     def __init__(self, state_file: Path = Path(".aceflow/state.json")):
         self.state_file = state_file
+        self.store = StateStore(state_file)
         if not self.state_file.exists():
             print(f"❌ 错误: 状态文件不存在于 {self.state_file}")
             print("请先运行 'python .aceflow/scripts/init.py'")
@@ -22,16 +24,19 @@ class StateManager:
         self.state = self._load_state()
 
     def _load_state(self) -> Dict[str, Any]:
-        """加载状态文件"""
-        return json.loads(self.state_file.read_text(encoding='utf-8'))
+        """加载状态文件（带版本号）"""
+        return self.store.read()
 
     def _save_state(self):
-        """保存状态文件"""
+        """原子保存状态文件，其他进程已更新时抛出 StateConflictError"""
         self.state['updated_at'] = datetime.now().isoformat()
-        self.state_file.write_text(json.dumps(self.state, indent=2, ensure_ascii=False), encoding='utf-8')
+        self.store.write(self.state)
 
+    @retry_on_conflict
     def update_stage(self, stage: str, progress: int):
         """更新当前阶段和进度"""
+        # 基于最新版本修改，版本冲突时整体重放
+        self.state = self._load_state()
         self.state['current_stage'] = stage
         self.state['progress'] = progress
         self.state['status'] = 'in_progress' if progress < 100 else 'completed'
@@ -42,14 +47,18 @@ class StateManager:
         self._save_state()
         print(f"✅ 状态更新 -> 阶段: {stage}, 进度: {progress}%")
 
+    @retry_on_conflict
     def add_memory_ref(self, memory_id: str):
         """添加记忆引用"""
+        self.state = self._load_state()
         self.state.setdefault('memory_refs', []).append(memory_id)
         self._save_state()
         print(f"✅ 添加记忆引用: {memory_id}")
 
+    @retry_on_conflict
     def update_metrics(self, **kwargs):
         """更新指标"""
+        self.state = self._load_state()
         self.state.setdefault('metrics', {}).update(kwargs)
         self._save_state()
         print(f"✅ 更新指标: {kwargs}")
@@ -59,6 +68,8 @@ class StateManager:
         print("\n📊 AceFlow 当前状态")
         print("="*40)
         for key, value in self.state.items():
+            if key.startswith('_'):
+                continue
             if isinstance(value, list) and value:
                 print(f"- {key.replace('_', ' ').title()}: {', '.join(map(str, value))}")
             elif isinstance(value, dict):